@@ -1,5 +1,5 @@
-from .cfg.config import set_coordinate_branch
+from .cfg.config import GeometryConfig, set_coordinate_branch, use_config
 from .io.geo_handler import load_geometry
 from .vis.geo import plot_geometry
 
-__all__ = ["load_geometry", "plot_geometry", "pygeosimplify", "set_coordinate_branch"]
+__all__ = ["GeometryConfig", "load_geometry", "plot_geometry", "pygeosimplify", "set_coordinate_branch", "use_config"]
@@ -1,9 +1,22 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
 # supported coordinate systems
 allowed_coordinate_systems = ["XYZ", "EtaPhiR", "EtaPhiZ", "RPhiZ"]
 # List of branches that are always required to be available
 required_branches = ["eta", "phi", "layer", "r", "z", "isBarrel"]
 # Dictionary mapping coordinate system to coordinate branch name, e.g. {"XYZ": "isXYZ"}
 coordinate_branch_names = {}  # type: dict[str, str]
+# Branches that are required in addition for each coordinate system
+coordinate_system_branches = {
+    "XYZ": ["x", "y", "z", "dx", "dy", "dz"],
+    "EtaPhiR": ["eta", "phi", "r", "deta", "dphi", "dr"],
+    "EtaPhiZ": ["eta", "phi", "z", "deta", "dphi", "dz"],
+    "RPhiZ": ["r", "phi", "z", "dr", "dphi", "dz"],
+}
 
 
 def reset_coordinate_branches() -> None:
@@ -26,17 +39,10 @@ def set_coordinate_branch(coordinate_system: str, branch_name: str) -> None:
 
     coordinate_branch_names[coordinate_system] = branch_name
 
-    required_branches.append(branch_name)
-
-    # Add required branches depending on the set coordinate system
-    if "XYZ" in coordinate_system:
-        required_branches += ["x", "y", "z", "dx", "dy", "dz"]
-    elif "EtaPhiR" in coordinate_system:
-        required_branches += ["eta", "phi", "r", "deta", "dphi", "dr"]
-    elif "EtaPhiZ" in coordinate_system:
-        required_branches += ["eta", "phi", "z", "deta", "dphi", "dz"]
-    elif "RPhiZ" in coordinate_system:
-        required_branches += ["r", "phi", "z", "dr", "dphi", "dz"]
+    # Add required branches depending on the set coordinate system, skipping the ones that are already required
+    for branch in [branch_name, *coordinate_system_branches[coordinate_system]]:
+        if branch not in required_branches:
+            required_branches.append(branch)
 
 
 def set_coordinate_branch_dict(coordinate_branch_dict: dict) -> None:
@@ -52,17 +58,118 @@ def set_coordinate_branch_dict(coordinate_branch_dict: dict) -> None:
                 f" {allowed_coordinate_systems}"
             )
 
-    coordinate_branch_names = coordinate_branch_dict
+    for coordinate_system, branch_name in coordinate_branch_dict.items():
+        set_coordinate_branch(coordinate_system, branch_name)
+
+
+@dataclass(frozen=True)
+class GeometryConfig:
+    """
+    An immutable configuration of the coordinate branches of a geometry.
+    Unlike the module level configuration, a GeometryConfig can be passed explicitly or installed for the current
+    thread or task with use_config, such that geometries with different branch schemes can be processed concurrently.
+    As it is hashable, it can also serve as a cache key. The pairs are kept in the order of allowed_coordinate_systems,
+    such that configurations with the same coordinate branches are equal, independent of the order they are given in.
+
+    Attributes:
+        coordinate_branches (tuple[tuple[str, str], ...]): Pairs of coordinate system and coordinate branch name,
+            e.g. (("XYZ", "isXYZ"),).
+    """
+
+    coordinate_branches: tuple[tuple[str, str], ...] = ()
+
+    def __post_init__(self) -> None:
+        for coordinate_system, _ in self.coordinate_branches:
+            if coordinate_system not in allowed_coordinate_systems:
+                raise ValueError(
+                    f"Coordinate system {coordinate_system} is not supported. Supported coordinate systems are"
+                    f" {allowed_coordinate_systems}"
+                )
+        # The configuration is frozen, so the canonical order is set through object.__setattr__
+        canonical_branches = tuple(
+            sorted(self.coordinate_branches, key=lambda branch: allowed_coordinate_systems.index(branch[0]))
+        )
+        object.__setattr__(self, "coordinate_branches", canonical_branches)
+
+    @classmethod
+    def from_dict(cls, coordinate_branch_dict: dict[str, str]) -> "GeometryConfig":
+        """
+        Creates a configuration from a dictionary mapping coordinate system to coordinate branch name.
 
-    required_branches += list(coordinate_branch_dict.values())
+        Args:
+            coordinate_branch_dict (dict[str, str]): The coordinate branch names, e.g. {"XYZ": "isXYZ"}.
 
-    # Add required branches depending on the set coordinate system
-    for coordinate_system in coordinate_branch_dict:
-        if "XYZ" in coordinate_system:
-            required_branches += ["x", "y", "z", "dx", "dy", "dz"]
-        elif "EtaPhiR" in coordinate_system:
-            required_branches += ["eta", "phi", "r", "deta", "dphi", "dr"]
-        elif "EtaPhiZ" in coordinate_system:
-            required_branches += ["eta", "phi", "z", "deta", "dphi", "dz"]
-        elif "RPhiZ" in coordinate_system:
-            required_branches += ["r", "phi", "z", "dr", "dphi", "dz"]
+        Returns:
+            GeometryConfig: The corresponding configuration.
+        """
+        return cls(tuple(coordinate_branch_dict.items()))
+
+    def with_coordinate_branch(self, coordinate_system: str, branch_name: str) -> "GeometryConfig":
+        """
+        Returns a copy of the configuration with the coordinate branch of a coordinate system set.
+
+        Args:
+            coordinate_system (str): The coordinate system, one of allowed_coordinate_systems.
+            branch_name (str): The name of the branch flagging cells defined in the coordinate system.
+
+        Returns:
+            GeometryConfig: The updated configuration.
+        """
+        return GeometryConfig.from_dict({**self.coordinate_branch_names, coordinate_system: branch_name})
+
+    @property
+    def coordinate_branch_names(self) -> dict[str, str]:
+        """Dictionary mapping coordinate system to coordinate branch name."""
+        return dict(self.coordinate_branches)
+
+    @property
+    def required_branches(self) -> list[str]:
+        """The branches that are required to be available in the geometry, without duplicates."""
+        branches = ["eta", "phi", "layer", "r", "z", "isBarrel"]
+        for coordinate_system, branch_name in self.coordinate_branches:
+            branches += [branch_name, *coordinate_system_branches[coordinate_system]]
+
+        return list(dict.fromkeys(branches))
+
+
+# Configuration installed for the current thread or task, if any
+_active_config: ContextVar[Optional[GeometryConfig]] = ContextVar("geometry_config", default=None)
+
+
+def get_config(config: Optional[GeometryConfig] = None) -> GeometryConfig:
+    """
+    Resolves the configuration to use.
+
+    Args:
+        config (GeometryConfig, optional): An explicitly passed configuration, which takes precedence.
+
+    Returns:
+        GeometryConfig: The explicitly passed configuration, else the one installed with use_config, else a snapshot
+        of the module level coordinate branches.
+    """
+    if config is not None:
+        return config
+
+    active_config = _active_config.get()
+    if active_config is not None:
+        return active_config
+
+    return GeometryConfig.from_dict(coordinate_branch_names)
+
+
+@contextmanager
+def use_config(config: GeometryConfig) -> Iterator[GeometryConfig]:
+    """
+    Installs a configuration for the current thread or task for the duration of the context.
+
+    Args:
+        config (GeometryConfig): The configuration to install.
+
+    Yields:
+        GeometryConfig: The installed configuration.
+    """
+    token = _active_config.set(config)
+    try:
+        yield config
+    finally:
+        _active_config.reset(token)
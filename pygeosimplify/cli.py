@@ -0,0 +1,326 @@
+import argparse
+import cProfile
+import os
+import pstats
+import statistics
+import sys
+import tempfile
+from typing import Optional
+
+import pandas as pd
+
+from pygeosimplify.cfg.config import GeometryConfig, allowed_coordinate_systems
+from pygeosimplify.geo.query import GeometryIndex
+from pygeosimplify.io.cache import load_geometry_cached
+from pygeosimplify.io.geo_handler import load_geometry
+from pygeosimplify.simplify.analysis import LayerCache
+from pygeosimplify.simplify.batch import STREAMING_CACHE_WARNING, SimplificationJob, SimplificationSettings, run_batch
+from pygeosimplify.simplify.detector import SimplifiedDetector
+from pygeosimplify.simplify.layer import GeoLayer
+from pygeosimplify.simplify.overlap_solver import OVERLAP_SOLVERS
+from pygeosimplify.simplify.process_cache import ProcessCache
+from pygeosimplify.simplify.streaming import stream_layer_analyses
+from pygeosimplify.utils.message_type import MessageType as mt
+from pygeosimplify.utils.tracing import tracing
+
+
+def _coordinate_branch(value: str) -> tuple[str, str]:
+    """Parses a coordinate branch given as SYSTEM=BRANCH, e.g. XYZ=isXYZ."""
+    coordinate_system, _, branch_name = value.partition("=")
+    if coordinate_system not in allowed_coordinate_systems or not branch_name:
+        raise argparse.ArgumentTypeError(
+            f"Invalid coordinate branch {value}. Expected SYSTEM=BRANCH with SYSTEM one of {allowed_coordinate_systems}"
+        )
+    return coordinate_system, branch_name
+
+
+def _get_config(args: argparse.Namespace) -> GeometryConfig:
+    return GeometryConfig.from_dict(dict(args.coordinate_branch))
+
+
+def _get_branches(args: argparse.Namespace) -> Optional[list[str]]:
+    return None if args.branches is None else list(args.branches)
+
+
+def _load(args: argparse.Namespace, file_path: str) -> pd.DataFrame:
+    """Loads the geometry of a file, from the cache directory if requested."""
+    if args.cache_dir is not None:
+        return load_geometry_cached(
+            file_path, args.tree, args.cache_dir, _get_config(args), _get_branches(args), args.compact, memory_map=True
+        )
+    return load_geometry(
+        file_path, args.tree, config=_get_config(args), branches=_get_branches(args), compact=args.compact
+    )
+
+
+def _get_settings(args: argparse.Namespace) -> SimplificationSettings:
+    return SimplificationSettings(
+        config=_get_config(args),
+        layer_list=None if args.layers is None else tuple(args.layers),
+        min_layer_dist=args.min_layer_dist,
+        envelope_width=args.envelope_width,
+        thinned_layer_width=args.thinned_layer_width,
+        overlap_solver=args.overlap_solver,
+        cache_dir=args.cache_dir,
+        branches=None if args.branches is None else tuple(args.branches),
+        compact=args.compact,
+        streaming=args.streaming,
+    )
+
+
+def _simplify(args: argparse.Namespace) -> int:
+    settings = _get_settings(args)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    jobs = [
+        SimplificationJob(
+            file_path,
+            args.tree,
+            os.path.join(args.output_dir, f"{os.path.splitext(os.path.basename(file_path))[0]}.gdml"),
+            settings,
+        )
+        for file_path in args.files
+    ]
+    summaries = run_batch(jobs, workers=args.workers, retries=args.retries, summary_path=args.summary)
+
+    for summary in summaries:
+        if summary["status"] == "success":
+            print(f"{summary['file_path']} -> {summary['output_path']} ({summary['timings']['total']:.2f} s)")
+        else:
+            print(f"{mt.FAIL} {summary['file_path']}: {summary['error']}")
+
+    return 0 if all(summary["status"] == "success" for summary in summaries) else 1
+
+
+def _check_overlaps(args: argparse.Namespace) -> int:
+    settings = _get_settings(args)
+    process_cache = None if args.cache_dir is None else ProcessCache(cache_dir=os.path.join(args.cache_dir, "process"))
+    detector = SimplifiedDetector(
+        min_layer_dist=settings.min_layer_dist,
+        envelope_width=settings.envelope_width,
+        process_cache=process_cache,
+        overlap_solver=settings.overlap_solver,
+    )
+
+    if settings.streaming:
+        if args.cache_dir is not None:
+            print(f"{mt.WARNING} {STREAMING_CACHE_WARNING}")
+        analyses = stream_layer_analyses(args.file, args.tree, settings.config, settings.thinned_layer_width)
+        for layer_idx in settings.layer_list if settings.layer_list is not None else analyses:
+            detector.add_layer(analyses[layer_idx])
+        return _report_overlaps(args, detector)
+
+    index = GeometryIndex(_load(args, args.file))
+    layer_list = settings.layer_list if settings.layer_list is not None else [int(idx) for idx in index.layers]
+
+    layer_cache = None if args.cache_dir is None else LayerCache(os.path.join(args.cache_dir, "layers"))
+    for layer_idx in layer_list:
+        if layer_cache is not None:
+            detector.add_layer(
+                layer_cache.get_analysis(index, layer_idx, settings.thinned_layer_width, config=settings.config)
+            )
+        else:
+            detector.add_layer(GeoLayer(index, layer_idx, settings.thinned_layer_width, config=settings.config))
+
+    return _report_overlaps(args, detector)
+
+
+def _report_overlaps(args: argparse.Namespace, detector: SimplifiedDetector) -> int:
+    """Processes the detector if requested and prints the overlaps between its cylinders."""
+    if args.cyl_type == "processed":
+        detector.process()
+
+    n_overlaps, _ = detector.check_overlaps(cyl_type=args.cyl_type, print_output=True)
+
+    return 0 if n_overlaps == 0 else 1
+
+
+def _plot(args: argparse.Namespace) -> int:
+    # Import plotting functions only when needed and render without a display
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    from pygeosimplify.vis.geo import plot_geometry
+
+    df = _load(args, args.file)
+    ax = plot_geometry(
+        GeometryIndex(df),
+        layer_list=args.layers,
+        eta_range=args.eta_range,
+        phi_range=args.phi_range,
+        unit_scale=args.unit_scale,
+        cell_energy_col=args.energy_col,
+        energy_threshold=args.energy_threshold,
+        config=_get_config(args),
+    )
+    ax.get_figure().savefig(args.output, dpi=args.dpi)
+    plt.close("all")
+    print(f"Geometry plot saved to {args.output}")
+
+    return 0
+
+
+def _bench(args: argparse.Namespace) -> int:
+    settings = _get_settings(args)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        jobs = [
+            SimplificationJob(args.file, args.tree, os.path.join(output_dir, f"bench_{repeat}.gdml"), settings)
+            for repeat in range(args.repeat)
+        ]
+        summaries = run_batch(jobs, workers=args.workers, retries=0, summary_path=args.summary)
+
+    failed = [summary for summary in summaries if summary["status"] == "failed"]
+    if failed:
+        print(f"{mt.FAIL} {failed[0]['error']}")
+        return 1
+
+    print(f"{'stage':<10}{'min [s]':>12}{'mean [s]':>12}{'max [s]':>12}")
+    for stage in summaries[0]["timings"]:
+        timings = [summary["timings"][stage] for summary in summaries]
+        print(f"{stage:<10}{min(timings):>12.3f}{statistics.mean(timings):>12.3f}{max(timings):>12.3f}")
+
+    return 0
+
+
+def _add_common_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--tree", required=True, help="Name of the geometry tree.")
+    parser.add_argument(
+        "-c",
+        "--coordinate-branch",
+        type=_coordinate_branch,
+        action="append",
+        required=True,
+        metavar="SYSTEM=BRANCH",
+        help="Coordinate branch of a coordinate system, e.g. XYZ=isXYZ. Can be given multiple times.",
+    )
+    parser.add_argument("--layers", type=int, nargs="+", help="Layers to consider. Defaults to all layers.")
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory in which loaded geometries, layer analyses and processing results are cached between runs.",
+    )
+    parser.add_argument(
+        "--branches",
+        nargs="*",
+        help="Only read the required branches and the given additional branches instead of all branches.",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Store the geometry with float32 positions and sizes and boolean flags, roughly halving its memory.",
+    )
+    parser.add_argument("--profile", metavar="PATH", help="Profile the command and write the statistics to PATH.")
+    parser.add_argument(
+        "--trace", metavar="PATH", help="Trace the pipeline stages and write a Chrome trace-event JSON to PATH."
+    )
+
+
+def _add_simplification_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--min-layer-dist", type=float, default=1, help="Minimum distance between layers.")
+    parser.add_argument("--envelope-width", type=float, default=100, help="Width of the detector envelope.")
+    parser.add_argument("--thinned-layer-width", type=float, default=10, help="Width of the thinned cylinders.")
+    parser.add_argument(
+        "--overlap-solver",
+        choices=OVERLAP_SOLVERS,
+        default="greedy",
+        help="Resolve the overlaps of the thinned cylinders one by one (greedy) or all at once (milp).",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Analyze the layers in chunks without loading the full geometry, for geometries that do not fit in memory.",
+    )
+
+
+def get_parser() -> argparse.ArgumentParser:
+    """
+    Returns the argument parser of the pygeosimplify command line interface.
+
+    Returns:
+        argparse.ArgumentParser: The argument parser.
+    """
+    parser = argparse.ArgumentParser(
+        prog="pygeosimplify", description="Cell-based inference of clash-free simplified detector geometry."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    simplify_parser = subparsers.add_parser("simplify", help="Simplify one or more geometry files to GDML.")
+    simplify_parser.add_argument("files", nargs="+", help="Geometry ROOT files.")
+    simplify_parser.add_argument("-o", "--output-dir", default=".", help="Directory the GDML files are written to.")
+    simplify_parser.add_argument("--workers", type=int, default=1, help="Number of worker processes.")
+    simplify_parser.add_argument("--retries", type=int, default=1, help="Number of retries of failed files.")
+    simplify_parser.add_argument("--summary", help="Path of the JSON summary of all files.")
+    _add_simplification_arguments(simplify_parser)
+    _add_common_arguments(simplify_parser)
+    simplify_parser.set_defaults(func=_simplify)
+
+    overlap_parser = subparsers.add_parser("check-overlaps", help="Check a simplified geometry for overlaps.")
+    overlap_parser.add_argument("file", help="Geometry ROOT file.")
+    overlap_parser.add_argument(
+        "--cyl-type", choices=["thinned", "processed"], default="processed", help="Cylinder type to check."
+    )
+    _add_simplification_arguments(overlap_parser)
+    _add_common_arguments(overlap_parser)
+    overlap_parser.set_defaults(func=_check_overlaps)
+
+    plot_parser = subparsers.add_parser("plot", help="Plot the cells of a geometry.")
+    plot_parser.add_argument("file", help="Geometry ROOT file.")
+    plot_parser.add_argument("-o", "--output", required=True, help="Path of the output image.")
+    plot_parser.add_argument("--eta-range", type=float, nargs=2, help="Minimum and maximum eta.")
+    plot_parser.add_argument("--phi-range", type=float, nargs=2, help="Minimum and maximum phi.")
+    plot_parser.add_argument("--unit-scale", type=float, default=1, help="Scale factor of the unit of measurement.")
+    plot_parser.add_argument("--energy-col", help="Column holding the cell energies to color the cells by.")
+    plot_parser.add_argument("--energy-threshold", type=float, help="Only draw cells with energy above threshold.")
+    plot_parser.add_argument("--dpi", type=int, default=100, help="Resolution of the output image.")
+    _add_common_arguments(plot_parser)
+    plot_parser.set_defaults(func=_plot)
+
+    bench_parser = subparsers.add_parser("bench", help="Benchmark the stages of the simplification of a geometry.")
+    bench_parser.add_argument("file", help="Geometry ROOT file.")
+    bench_parser.add_argument("--repeat", type=int, default=3, help="Number of repetitions.")
+    bench_parser.add_argument("--workers", type=int, default=1, help="Number of worker processes.")
+    bench_parser.add_argument("--summary", help="Path of the JSON summary of all repetitions.")
+    _add_simplification_arguments(bench_parser)
+    _add_common_arguments(bench_parser)
+    bench_parser.set_defaults(func=_bench)
+
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Entry point of the pygeosimplify command line interface.
+
+    Args:
+        argv (list[str], optional): The command line arguments. Defaults to the arguments of the current process.
+
+    Returns:
+        int: The exit code.
+    """
+    args = get_parser().parse_args(argv)
+
+    if args.trace is not None:
+        with tracing(args.trace):
+            return _run_command(args)
+
+    return _run_command(args)
+
+
+def _run_command(args: argparse.Namespace) -> int:
+    """Run the command, under the profiler if requested."""
+    if args.profile is None:
+        exit_code: int = args.func(args)
+        return exit_code
+
+    profiler = cProfile.Profile()
+    exit_code = profiler.runcall(args.func, args)
+    profiler.dump_stats(args.profile)
+    pstats.Stats(args.profile).sort_stats("cumulative").print_stats(20)
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+from typing import Any, Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from pygeosimplify.geo.vertices import COORDINATE_COLUMNS, cell_vertices_rz
+
+try:
+    import numba
+except ImportError:  # pragma: no cover - depends on the environment
+    numba = None
+
+# True if the compiled kernels are available, otherwise the NumPy implementations are used
+HAS_NUMBA = numba is not None
+
+# Integer codes of the coordinate systems, as strings cannot be dispatched on cheaply in compiled code
+_COORDINATE_SYSTEM_CODES = {"XYZ": 0, "EtaPhiR": 1, "EtaPhiZ": 2, "RPhiZ": 3}
+
+# Relative tolerance within which vertices are considered at the extremes, far above the differences between the
+# transcendental functions of NumPy and Numba, which are of the order of the machine precision
+_EXTREME_RTOL = 1e-9
+
+
+def _vertex_rz(i: float, j: float, k: float, coordinate_system_code: int) -> tuple[float, float]:
+    """Returns r and z of a vertex, with the same operations as cell_vertices_rz."""
+    if coordinate_system_code == 0:
+        return np.sqrt(i**2 + j**2), k
+    if coordinate_system_code == 1:
+        return k, k * np.sinh(i)
+    if coordinate_system_code == 2:
+        return k / np.sinh(i), k
+    return i, k
+
+
+def _rz_extent_kernel(
+    pos_i: np.ndarray,
+    pos_j: np.ndarray,
+    pos_k: np.ndarray,
+    size_i: np.ndarray,
+    size_j: np.ndarray,
+    size_k: np.ndarray,
+    coordinate_system_code: int,
+) -> tuple[float, float, float, float]:
+    """
+    Reduces the cell centres and sizes to the minimum and maximum r and z of the cell vertices in a single pass,
+    without creating the vertices. As for np.min and np.max, a NaN value results in a NaN extent.
+    """
+    r_min, r_max, z_min, z_max = np.inf, -np.inf, np.inf, -np.inf
+    r_is_nan, z_is_nan = False, False
+
+    for cell_idx in range(pos_i.shape[0]):
+        half_i, half_j, half_k = size_i[cell_idx] / 2, size_j[cell_idx] / 2, size_k[cell_idx] / 2
+        for sign_i in (-1.0, 1.0):
+            for sign_j in (-1.0, 1.0):
+                for sign_k in (-1.0, 1.0):
+                    r, z = _vertex_rz(
+                        pos_i[cell_idx] + sign_i * half_i,
+                        pos_j[cell_idx] + sign_j * half_j,
+                        pos_k[cell_idx] + sign_k * half_k,
+                        coordinate_system_code,
+                    )
+                    if np.isnan(r):
+                        r_is_nan = True
+                    else:
+                        r_min, r_max = min(r_min, r), max(r_max, r)
+                    if np.isnan(z):
+                        z_is_nan = True
+                    else:
+                        z_min, z_max = min(z_min, z), max(z_max, z)
+
+    if r_is_nan:
+        r_min, r_max = np.nan, np.nan
+    if z_is_nan:
+        z_min, z_max = np.nan, np.nan
+
+    return r_min, r_max, z_min, z_max
+
+
+def _extreme_cells_kernel(
+    pos_i: np.ndarray,
+    pos_j: np.ndarray,
+    pos_k: np.ndarray,
+    size_i: np.ndarray,
+    size_j: np.ndarray,
+    size_k: np.ndarray,
+    coordinate_system_code: int,
+    extent: np.ndarray,
+    rtol: float,
+) -> np.ndarray:
+    """Marks the cells with a vertex within a relative tolerance of any of the extremes of the extent."""
+    tolerance = rtol * np.abs(extent)
+    is_extreme = np.zeros(pos_i.shape[0], dtype=np.bool_)
+
+    for cell_idx in range(pos_i.shape[0]):
+        half_i, half_j, half_k = size_i[cell_idx] / 2, size_j[cell_idx] / 2, size_k[cell_idx] / 2
+        for sign_i in (-1.0, 1.0):
+            for sign_j in (-1.0, 1.0):
+                for sign_k in (-1.0, 1.0):
+                    r, z = _vertex_rz(
+                        pos_i[cell_idx] + sign_i * half_i,
+                        pos_j[cell_idx] + sign_j * half_j,
+                        pos_k[cell_idx] + sign_k * half_k,
+                        coordinate_system_code,
+                    )
+                    if (
+                        abs(r - extent[0]) <= tolerance[0]
+                        or abs(r - extent[1]) <= tolerance[1]
+                        or abs(z - extent[2]) <= tolerance[2]
+                        or abs(z - extent[3]) <= tolerance[3]
+                    ):
+                        is_extreme[cell_idx] = True
+
+    return is_extreme
+
+
+if numba is not None:
+    # Compiled functions can only call compiled functions, so the vertex transformation is compiled first
+    # Division by zero at eta = 0 yields an infinite or NaN radius as in NumPy, instead of raising an error
+    _vertex_rz = numba.njit(nogil=True, error_model="numpy")(_vertex_rz)
+    _compiled_rz_extent_kernel: Callable[..., tuple[float, float, float, float]] = numba.njit(
+        cache=True, nogil=True, error_model="numpy"
+    )(_rz_extent_kernel)
+    _compiled_extreme_cells_kernel: Callable[..., np.ndarray] = numba.njit(cache=True, nogil=True, error_model="numpy")(
+        _extreme_cells_kernel
+    )
+
+
+def _get_columns(df: pd.DataFrame, coordinate_system: str) -> list[np.ndarray]:
+    if coordinate_system not in COORDINATE_COLUMNS:
+        raise Exception(f"Invalid coordinate system {coordinate_system}.")
+
+    pos_columns, size_columns = COORDINATE_COLUMNS[coordinate_system]
+
+    return [np.ascontiguousarray(df[column].to_numpy(dtype=np.float64)) for column in (*pos_columns, *size_columns)]
+
+
+def rz_extent(df: pd.DataFrame, coordinate_system: str, use_numba: Optional[bool] = None) -> dict[str, Any]:
+    """
+    Returns the minimum and maximum r and z of the vertices of all cells in the DataFrame.
+    With Numba, compiled kernels find the cells at the extremes in passes over the cell centres and sizes without
+    creating the vertices, and only the vertices of these cells are computed with NumPy. Otherwise, the vertices of all
+    cells are computed with NumPy. As the final values are always computed by NumPy, both give identical results.
+
+    Args:
+        df (pd.DataFrame): The DataFrame containing the cell positions and sizes.
+        coordinate_system (str): The coordinate system in which the cells are defined.
+        use_numba (bool, optional): Whether to use the compiled kernels. Defaults to True if Numba is installed.
+
+    Returns:
+        dict[str, Any]: The extent, with keys rmin, rmax, zmin and zmax.
+    """
+    if use_numba is None:
+        use_numba = HAS_NUMBA
+    if use_numba and not HAS_NUMBA:
+        raise ImportError("Numba is required for the compiled kernels. Install it with pip install pygeosimplify[jit]")
+
+    columns = _get_columns(df, coordinate_system)
+    if len(columns[0]) == 0:
+        raise ValueError(f"Cannot compute the extent of zero cells in {coordinate_system} coordinates.")
+
+    if use_numba:
+        coordinate_system_code = _COORDINATE_SYSTEM_CODES[coordinate_system]
+        extent = np.array(_compiled_rz_extent_kernel(*columns, coordinate_system_code))
+        # A NaN extent requires the vertices of all cells
+        if not np.isnan(extent).any():
+            df = df[_compiled_extreme_cells_kernel(*columns, coordinate_system_code, extent, _EXTREME_RTOL)]
+
+    r_values, z_values = cell_vertices_rz(df, coordinate_system)
+
+    return {"rmin": r_values.min(), "rmax": r_values.max(), "zmin": z_values.min(), "zmax": z_values.max()}
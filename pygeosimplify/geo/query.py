@@ -0,0 +1,213 @@
+from typing import Optional, Protocol, runtime_checkable
+
+import numpy as np
+import pandas as pd
+
+
+@runtime_checkable
+class PartitionedGeometry(Protocol):
+    """
+    A geometry partitioned by layer, which GeoLayer, LayerCache and plot_geometry consume one layer at a time instead
+    of masking a full DataFrame. A GeometryIndex partitions a geometry in memory, while a BinaryGeometry maps its
+    layers from disk, such that only the requested layers are ever read.
+
+    Attributes:
+    -----------
+    layers : np.ndarray
+        The sorted unique layer indices of the geometry.
+
+    Methods:
+    --------
+    layer_df(layer_idx: int) -> pd.DataFrame
+        Returns the cells of a single layer.
+    select(layer_list: list[int] = None, eta_range: list = None, phi_range: list = None, r_range: list = None, z_range: list = None) -> pd.DataFrame
+        Returns the cells within the requested layers and exclusive ranges.
+    """
+
+    layers: np.ndarray
+
+    def layer_df(self, layer_idx: int) -> pd.DataFrame: ...
+
+    def select(
+        self,
+        layer_list: Optional[list[int]] = None,
+        eta_range: Optional[list] = None,
+        phi_range: Optional[list] = None,
+        r_range: Optional[list] = None,
+        z_range: Optional[list] = None,
+    ) -> pd.DataFrame: ...
+
+
+class GeometryIndex:
+    """
+    An index for fast range selections on a geometry DataFrame.
+    The cells are sorted once by layer and by each of eta, phi, r and z, such that range selections within a layer
+    reduce to binary searches on the sorted values instead of boolean masks over the full DataFrame.
+
+    Attributes:
+    -----------
+    df : pd.DataFrame
+        The indexed geometry DataFrame.
+    layers : np.ndarray
+        The sorted unique layer indices of the geometry.
+
+    Methods:
+    --------
+    layer_df(layer_idx: int) -> pd.DataFrame
+        Returns the cells of a single layer.
+    query(layer_list: list[int] = None, eta_range: list = None, phi_range: list = None, r_range: list = None, z_range: list = None) -> np.ndarray
+        Returns the positions of the cells within the requested ranges.
+    select(layer_list: list[int] = None, eta_range: list = None, phi_range: list = None, r_range: list = None, z_range: list = None) -> pd.DataFrame
+        Returns the cells within the requested ranges.
+    """
+
+    sort_keys = ("eta", "phi", "r", "z")
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.df = df
+
+        layer_values = df["layer"].to_numpy()
+
+        # For each key, the order of the cells sorted by layer and then by the key, and the correspondingly sorted values
+        self._order: dict[str, np.ndarray] = {}
+        self._sorted_values: dict[str, np.ndarray] = {}
+        for key in self.sort_keys:
+            values = df[key].to_numpy()
+            order = np.lexsort((values, layer_values))
+            self._order[key] = order
+            self._sorted_values[key] = values[order]
+
+        # As the primary sort key is the layer, the layer offsets are identical for all keys
+        sorted_layers = layer_values[self._order[self.sort_keys[0]]]
+        self.layers, layer_starts = np.unique(sorted_layers, return_index=True)
+        layer_stops = [*layer_starts[1:], len(sorted_layers)]
+        self._layer_offsets = {
+            int(layer_idx): (int(start), int(stop))
+            for layer_idx, start, stop in zip(self.layers, layer_starts, layer_stops)
+        }
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def _range_slice(self, key: str, layer_idx: int, value_range: list) -> slice:
+        """
+        Returns the slice of the cells of a layer, sorted by key, with values strictly within the given range.
+
+        Args:
+            key (str): The key to select on, one of eta, phi, r or z.
+            layer_idx (int): The index of the layer.
+            value_range (list): The minimum and maximum value of the key.
+
+        Returns:
+            slice: The slice into the order of the cells sorted by key.
+        """
+        start, stop = self._layer_offsets[layer_idx]
+        layer_values = self._sorted_values[key][start:stop]
+
+        range_start = start + np.searchsorted(layer_values, value_range[0], side="right")
+        range_stop = start + np.searchsorted(layer_values, value_range[1], side="left")
+
+        return slice(int(range_start), int(max(range_start, range_stop)))
+
+    def layer_df(self, layer_idx: int) -> pd.DataFrame:
+        """
+        Returns the cells of a single layer in their original order.
+
+        Args:
+            layer_idx (int): The index of the layer.
+
+        Returns:
+            pd.DataFrame: The cells of the layer.
+        """
+        if layer_idx not in self._layer_offsets:
+            raise ValueError(f"Layer {layer_idx} not found in geometry.")
+
+        start, stop = self._layer_offsets[layer_idx]
+        positions = np.sort(self._order[self.sort_keys[0]][start:stop])
+
+        return self.df.iloc[positions]
+
+    def query(
+        self,
+        layer_list: Optional[list[int]] = None,
+        eta_range: Optional[list] = None,
+        phi_range: Optional[list] = None,
+        r_range: Optional[list] = None,
+        z_range: Optional[list] = None,
+    ) -> np.ndarray:
+        """
+        Returns the positions of the cells within the requested layers and ranges. All ranges are exclusive.
+        Within each layer, the most selective range is resolved with a binary search and only the cells within
+        it are checked against the remaining ranges.
+
+        Args:
+            layer_list (list[int], optional): The layers to select. If not provided, all layers are selected.
+            eta_range (list, optional): The minimum and maximum eta values.
+            phi_range (list, optional): The minimum and maximum phi values.
+            r_range (list, optional): The minimum and maximum r values.
+            z_range (list, optional): The minimum and maximum z values.
+
+        Returns:
+            np.ndarray: The sorted positions of the selected cells in the indexed DataFrame.
+        """
+        if layer_list is None:
+            layer_list = [int(layer_idx) for layer_idx in self.layers]
+
+        ranges = {
+            key: value_range
+            for key, value_range in zip(self.sort_keys, [eta_range, phi_range, r_range, z_range])
+            if value_range is not None
+        }
+
+        positions = []
+        for layer_idx in layer_list:
+            if layer_idx not in self._layer_offsets:
+                continue
+
+            if not ranges:
+                start, stop = self._layer_offsets[layer_idx]
+                positions.append(self._order[self.sort_keys[0]][start:stop])
+                continue
+
+            slices = {key: self._range_slice(key, layer_idx, value_range) for key, value_range in ranges.items()}
+            # Resolve the most selective range first
+            best_key = min(slices, key=lambda key: slices[key].stop - slices[key].start)
+            candidates = self._order[best_key][slices[best_key]]
+
+            for key, value_range in ranges.items():
+                if key == best_key:
+                    continue
+                values = self.df[key].to_numpy()[candidates]
+                candidates = candidates[(values > value_range[0]) & (values < value_range[1])]
+
+            positions.append(candidates)
+
+        if not positions:
+            return np.array([], dtype=np.int64)
+
+        return np.sort(np.concatenate(positions))
+
+    def select(
+        self,
+        layer_list: Optional[list[int]] = None,
+        eta_range: Optional[list] = None,
+        phi_range: Optional[list] = None,
+        r_range: Optional[list] = None,
+        z_range: Optional[list] = None,
+    ) -> pd.DataFrame:
+        """
+        Returns the cells within the requested layers and ranges, in their original order. All ranges are exclusive.
+
+        Args:
+            layer_list (list[int], optional): The layers to select. If not provided, all layers are selected.
+            eta_range (list, optional): The minimum and maximum eta values.
+            phi_range (list, optional): The minimum and maximum phi values.
+            r_range (list, optional): The minimum and maximum r values.
+            z_range (list, optional): The minimum and maximum z values.
+
+        Returns:
+            pd.DataFrame: The selected cells.
+        """
+        positions = self.query(layer_list, eta_range, phi_range, r_range, z_range)
+
+        return self.df.iloc[positions]
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+# Position and size columns of the cells for each supported coordinate system, ordered as (i, j, k)
+COORDINATE_COLUMNS = {
+    "XYZ": (("x", "y", "z"), ("dx", "dy", "dz")),
+    "EtaPhiR": (("eta", "phi", "r"), ("deta", "dphi", "dr")),
+    "EtaPhiZ": (("eta", "phi", "z"), ("deta", "dphi", "dz")),
+    "RPhiZ": (("r", "phi", "z"), ("dr", "dphi", "dz")),
+}
+
+# Signs of the half dimensions of the eight cell vertices, same ordering as in RectangularCell.set_vertices
+_VERTEX_SIGNS = np.array(
+    [
+        [-1, -1, -1],
+        [1, -1, -1],
+        [1, 1, -1],
+        [-1, 1, -1],
+        [-1, -1, 1],
+        [1, -1, 1],
+        [1, 1, 1],
+        [-1, 1, 1],
+    ],
+    dtype=np.float64,
+)
+
+
+def cell_vertices(df: pd.DataFrame, coordinate_system: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the vertices of all cells in the DataFrame without constructing cell objects.
+
+    Args:
+        df (pd.DataFrame): The DataFrame containing the cell positions and sizes.
+        coordinate_system (str): The coordinate system in which the cells are defined.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: The (i, j, k) coordinates of the vertices, each of shape (n_cells, 8).
+    """
+    if coordinate_system not in COORDINATE_COLUMNS:
+        raise Exception(f"Invalid coordinate system {coordinate_system}.")
+
+    pos_columns, size_columns = COORDINATE_COLUMNS[coordinate_system]
+
+    vertices = []
+    for dim_idx, (pos_column, size_column) in enumerate(zip(pos_columns, size_columns)):
+        pos = df[pos_column].to_numpy(dtype=np.float64)[:, np.newaxis]
+        half_size = df[size_column].to_numpy(dtype=np.float64)[:, np.newaxis] / 2
+        vertices.append(pos + _VERTEX_SIGNS[:, dim_idx] * half_size)
+
+    return vertices[0], vertices[1], vertices[2]
+
+
+def cell_vertices_rz(df: pd.DataFrame, coordinate_system: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the r and z values of the vertices of all cells in the DataFrame.
+    The transformations are identical to the ones of the coordinate definitions, but applied to whole columns at once.
+
+    Args:
+        df (pd.DataFrame): The DataFrame containing the cell positions and sizes.
+        coordinate_system (str): The coordinate system in which the cells are defined.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The r and z values of the vertices, each of shape (n_cells, 8).
+    """
+    i, j, k = cell_vertices(df, coordinate_system)
+
+    if coordinate_system == "XYZ":
+        r_values = np.sqrt(i**2 + j**2)
+        z_values = k
+    elif coordinate_system == "EtaPhiR":
+        r_values = k
+        z_values = k * np.sinh(i)
+    elif coordinate_system == "EtaPhiZ":
+        r_values = k / np.sinh(i)
+        z_values = k
+    elif coordinate_system == "RPhiZ":
+        r_values = i
+        z_values = k
+
+    return r_values, z_values
+
+
+def cell_footprints_rz(df: pd.DataFrame, coordinate_system: str) -> np.ndarray:
+    """
+    Returns the footprints of all cells in the DataFrame in the r-z plane.
+    For cells defined in EtaPhiR, EtaPhiZ or RPhiZ the footprint is exact, as phi does not enter r and z.
+    For cells defined in XYZ the footprint is approximated by the bounding rectangle of the cell vertices in r and z.
+
+    Args:
+        df (pd.DataFrame): The DataFrame containing the cell positions and sizes.
+        coordinate_system (str): The coordinate system in which the cells are defined.
+
+    Returns:
+        np.ndarray: The (z, r) corners of the footprint polygons, of shape (n_cells, 4, 2).
+    """
+    r_values, z_values = cell_vertices_rz(df, coordinate_system)
+
+    if coordinate_system == "XYZ":
+        r_min, r_max = r_values.min(axis=1), r_values.max(axis=1)
+        z_min, z_max = z_values.min(axis=1), z_values.max(axis=1)
+        z_corners = np.stack([z_min, z_max, z_max, z_min], axis=1)
+        r_corners = np.stack([r_min, r_min, r_max, r_max], axis=1)
+    else:
+        # Vertices spanning the (i, k) plane at the lower j edge of the cell
+        z_corners = z_values[:, [0, 1, 5, 4]]
+        r_corners = r_values[:, [0, 1, 5, 4]]
+
+    return np.stack([z_corners, r_corners], axis=2)
@@ -0,0 +1,403 @@
+import json
+from typing import Any, Optional, Union
+
+import numpy as np
+import pandas as pd
+import uproot
+
+from pygeosimplify.cfg.config import GeometryConfig, get_config
+from pygeosimplify.geo.query import GeometryIndex
+from pygeosimplify.io.geo_handler import (
+    GeometrySource,
+    check_geo_consistency,
+    get_geometry_sources,
+    get_layer_coordinate_system,
+    get_loading_config,
+)
+from pygeosimplify.utils.files import atomic_write
+from pygeosimplify.utils.tracing import span, traced
+
+# Identifies geometry files in the binary format and their version
+BINARY_GEOMETRY_MAGIC = b"PGSGEO\x00\x01"
+
+# Alignment of the columns in bytes, such that each column can be viewed as an array of its type and is cache aligned
+_COLUMN_ALIGNMENT = 64
+
+# Name under which the index of the geometry is stored, as it is stored like the columns
+_INDEX_NAME = "__index__"
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _COLUMN_ALIGNMENT) * _COLUMN_ALIGNMENT
+
+
+def _serialize_header(header: dict[str, Any], columns: list[tuple[str, np.dtype]]) -> tuple[bytes, int]:
+    """
+    Adds the type and offset of each column to the header and returns the serialized header and the size of the file.
+    The offsets of the columns depend on the length of the header, so the header is serialized until it fits.
+    """
+    data_offset = 0
+    while True:
+        offset = data_offset
+        header["columns"] = []
+        for column, dtype in columns:
+            header["columns"].append({"name": column, "dtype": dtype.str, "offset": offset})
+            file_size = offset + header["n_cells"] * dtype.itemsize
+            offset = _align(file_size)
+        header_bytes = json.dumps(header).encode()
+        required_offset = _align(len(BINARY_GEOMETRY_MAGIC) + 8 + len(header_bytes))
+        if required_offset <= data_offset:
+            return header_bytes, file_size
+        data_offset = required_offset
+
+
+def _get_column_array(df: pd.DataFrame, column: str) -> np.ndarray:
+    """Returns the values of a column as a contiguous array, raising if they cannot be stored in the binary format."""
+    values = df.index.to_numpy() if column == _INDEX_NAME else df[column].to_numpy()
+    if values.dtype.kind not in "biuf":
+        raise ValueError(
+            f"Column {column} of type {values.dtype} cannot be stored, only numeric and boolean columns can."
+        )
+
+    return np.ascontiguousarray(values)
+
+
+@traced()
+def save_geometry_binary(df: pd.DataFrame, file_path: str, config: Optional[GeometryConfig] = None) -> None:
+    """
+    Saves a geometry in the binary geometry format, which load_geometry_binary maps into memory without decompression.
+    The file starts with the magic bytes, the length of the header as unsigned 64-bit little-endian integer and a JSON
+    header with the number of cells, the type and offset of each column and the cell offsets and coordinate system of
+    each layer. The columns follow uncompressed and contiguous, each aligned to 64 bytes. The cells are grouped by
+    layer, keeping their order and index within each layer, such that each layer is a contiguous slice of the columns.
+
+    Args:
+        df (pd.DataFrame): The geometry. All columns and the index must be numeric or boolean.
+        file_path (str): The path of the file. It is replaced atomically if it exists.
+        config (GeometryConfig, optional): The coordinate branch configuration used to tag the layers with their
+            coordinate systems. If not provided, the configuration installed with use_config or else the module level
+            coordinate branches are used.
+
+    Raises:
+        ValueError: If a column or the index is neither numeric nor boolean.
+    """
+    config = get_config(config)
+    # A stable sort keeps the order of the cells within each layer
+    df = df.iloc[np.argsort(df["layer"].to_numpy(), kind="stable")]
+
+    layer_values = df["layer"].to_numpy()
+    layers, layer_starts = np.unique(layer_values, return_index=True)
+    layer_stops = [*layer_starts[1:], len(df)]
+
+    columns = [_INDEX_NAME, *df.columns]
+    arrays = [_get_column_array(df, column) for column in columns]
+
+    header: dict[str, Any] = {
+        "n_cells": len(df),
+        "coordinate_branches": config.coordinate_branch_names,
+        "layers": [
+            [int(layer_idx), int(start), int(stop), get_layer_coordinate_system(df.iloc[start:stop], config)]
+            for layer_idx, start, stop in zip(layers, layer_starts, layer_stops)
+        ],
+    }
+    header_bytes, _ = _serialize_header(
+        header, [(str(column), values.dtype) for column, values in zip(columns, arrays)]
+    )
+
+    with atomic_write(file_path) as tmp_path, open(tmp_path, "wb") as binary_file:
+        binary_file.write(BINARY_GEOMETRY_MAGIC)
+        binary_file.write(len(header_bytes).to_bytes(8, "little"))
+        binary_file.write(header_bytes)
+        for column_header, values in zip(header["columns"], arrays):
+            binary_file.write(b"\x00" * (column_header["offset"] - binary_file.tell()))
+            binary_file.write(values.data.cast("B"))
+
+
+class BinaryGeometry:
+    """
+    A geometry mapped into memory from a file in the binary geometry format, see save_geometry_binary.
+    The columns are read-only views of the mapped file, so the file is only read as the cells are accessed, and
+    processes mapping the same file share its pages in the page cache.
+
+    Attributes:
+        file_path (str): The path of the file.
+        df (pd.DataFrame): The geometry, with the cells grouped by layer.
+        layers (np.ndarray): The sorted unique layer indices of the geometry.
+        coordinate_systems (dict[int, str]): The coordinate system of each layer.
+        coordinate_branches (dict[str, str]): The coordinate branch of each coordinate system the file was saved with.
+    """
+
+    def __init__(self, file_path: str) -> None:
+        self.file_path = file_path
+
+        with open(file_path, "rb") as binary_file:
+            magic = binary_file.read(len(BINARY_GEOMETRY_MAGIC))
+            if magic != BINARY_GEOMETRY_MAGIC:
+                raise ValueError(f"{file_path} is not a geometry file in the binary format.")
+            header_length = int.from_bytes(binary_file.read(8), "little")
+            header = json.loads(binary_file.read(header_length))
+
+        n_cells = header["n_cells"]
+        # A single read-only mapping of the file, of which each column is a view
+        buffer = np.memmap(file_path, dtype=np.uint8, mode="r")
+        arrays = {}
+        for column_header in header["columns"]:
+            dtype = np.dtype(column_header["dtype"])
+            start = column_header["offset"]
+            arrays[column_header["name"]] = buffer[start : start + n_cells * dtype.itemsize].view(dtype)
+
+        index = pd.Index(arrays.pop(_INDEX_NAME), copy=False)
+        # Without copying, each column remains a view of the mapped file
+        self.df = pd.DataFrame(arrays, index=index, copy=False)
+
+        self.layers = np.array([layer[0] for layer in header["layers"]], dtype=np.int64)
+        self.coordinate_systems = {
+            layer_idx: coordinate_system for layer_idx, _, _, coordinate_system in header["layers"]
+        }
+        self.coordinate_branches: dict[str, str] = header["coordinate_branches"]
+        self._layer_offsets = {layer_idx: (start, stop) for layer_idx, start, stop, _ in header["layers"]}
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def layer_df(self, layer_idx: int) -> pd.DataFrame:
+        """
+        Returns the cells of a single layer as a slice of the mapped columns, without copying.
+
+        Args:
+            layer_idx (int): The index of the layer.
+
+        Returns:
+            pd.DataFrame: The cells of the layer.
+        """
+        if layer_idx not in self._layer_offsets:
+            raise ValueError(f"Layer {layer_idx} not found in geometry.")
+
+        start, stop = self._layer_offsets[layer_idx]
+
+        return self.df.iloc[start:stop]
+
+    def select(
+        self,
+        layer_list: Optional[list[int]] = None,
+        eta_range: Optional[list] = None,
+        phi_range: Optional[list] = None,
+        r_range: Optional[list] = None,
+        z_range: Optional[list] = None,
+    ) -> pd.DataFrame:
+        """
+        Returns the cells within the requested layers and ranges, grouped by layer. All ranges are exclusive, as for
+        GeometryIndex.select. The ranges are checked one layer at a time, such that only the pages of the requested
+        layers are read from the file.
+
+        Args:
+            layer_list (list[int], optional): The layers to select. If not provided, all layers are selected.
+            eta_range (list, optional): The minimum and maximum eta values.
+            phi_range (list, optional): The minimum and maximum phi values.
+            r_range (list, optional): The minimum and maximum r values.
+            z_range (list, optional): The minimum and maximum z values.
+
+        Returns:
+            pd.DataFrame: The selected cells.
+        """
+        selected_layers = self._layer_offsets.keys() if layer_list is None else set(layer_list)
+        ranges = {
+            key: value_range
+            for key, value_range in zip(GeometryIndex.sort_keys, [eta_range, phi_range, r_range, z_range])
+            if value_range is not None
+        }
+
+        selections = []
+        for layer_idx in self._layer_offsets:
+            if layer_idx not in selected_layers:
+                continue
+            layer_df = self.layer_df(layer_idx)
+            is_selected = np.ones(len(layer_df), dtype=bool)
+            for key, value_range in ranges.items():
+                values = layer_df[key].to_numpy()
+                is_selected &= (values > value_range[0]) & (values < value_range[1])
+            selections.append(layer_df[is_selected])
+
+        if not selections:
+            return self.df.iloc[:0]
+
+        return pd.concat(selections)
+
+
+@traced()
+def load_geometry_binary(file_path: str) -> BinaryGeometry:
+    """
+    Maps a geometry saved with save_geometry_binary into memory.
+
+    Args:
+        file_path (str): The path of the file.
+
+    Returns:
+        BinaryGeometry: The mapped geometry. Its df can be used wherever a loaded geometry is expected, and its
+            layer_df returns the cells of a layer without copying.
+
+    Raises:
+        ValueError: If the file is not in the binary geometry format.
+    """
+    return BinaryGeometry(file_path)
+
+
+@traced()
+def convert_geometry_binary(
+    file_path: Union[GeometrySource, list[GeometrySource]],
+    output_path: str,
+    tree_name: Optional[str] = None,
+    config: Optional[GeometryConfig] = None,
+    branches: Optional[list[str]] = None,
+    step_size: Union[int, str] = "100 MB",
+) -> BinaryGeometry:
+    """
+    Converts a geometry from ROOT files into the binary geometry format without ever holding all cells, such that
+    geometries larger than the memory can be converted and then mapped one layer at a time.
+    A first pass over the layer and coordinate branches counts the cells of each layer, from which the file is laid
+    out. A second pass iterates over all branches in chunks, checks each chunk for consistency and writes the cells
+    of each layer of the chunk to the next free rows of the layer in the mapped file. The file is identical to the one
+    save_geometry_binary writes for the loaded geometry.
+
+    Args:
+        file_path (Union[GeometrySource, list[GeometrySource]]): The path to the ROOT file, or a list of sources, see
+            load_geometry.
+        output_path (str): The path of the binary file. It is replaced atomically if it exists.
+        tree_name (str, optional): The name of the tree to load from the sources given as paths.
+        config (GeometryConfig, optional): The coordinate branch configuration. If not provided, the configuration
+            installed with use_config or else the module level coordinate branches are used.
+        branches (list[str], optional): Additional branches to convert. If provided, only the required branches and
+            these branches are converted, else all branches are converted.
+        step_size (Union[int, str], optional): The number of cells, or the memory size, of each chunk, see
+            uproot.TTree.iterate. Defaults to "100 MB".
+
+    Returns:
+        BinaryGeometry: The converted geometry, mapped into memory.
+
+    Raises:
+        Exception: If coordinate branches have not been set.
+        Exception: If any of the required branches are missing, see check_geo_consistency.
+        Exception: If the sources do not contain the same branches.
+        Exception: If not all cells in a layer have the same coordinate system assigned.
+    """
+    config = get_loading_config(config)
+
+    sources = get_geometry_sources(file_path, tree_name)
+    trees = [uproot.open(f"{source_path}:{source_tree_name}") for source_path, source_tree_name in sources]
+    keys = trees[0].keys() if branches is None else list(dict.fromkeys([*config.required_branches, *branches]))
+    # Reading no cells yields the types of the columns and checks that the required branches exist
+    empty_df = trees[0].arrays(keys, entry_stop=0, library="pd")
+    check_geo_consistency(empty_df, config)
+    for source, tree in zip(sources[1:], trees[1:]):
+        tree_branches = tree.keys()
+        source_keys = tree_branches if branches is None else [key for key in keys if key in tree_branches]
+        if set(source_keys) != set(keys):
+            raise Exception(
+                f"Branches of source {source} differ from those of source {sources[0]}:"
+                f" {sorted(set(source_keys) ^ set(keys))}"
+            )
+
+    # First pass: the number of cells and the coordinate system of each layer
+    layer_counts, coordinate_systems = _count_layer_cells(trees, config, step_size)
+    layers = sorted(layer_counts)
+    layer_starts = dict(zip(layers, np.cumsum([0, *[layer_counts[layer_idx] for layer_idx in layers]]).tolist()))
+    header: dict[str, Any] = {
+        "n_cells": sum(layer_counts.values()),
+        "coordinate_branches": config.coordinate_branch_names,
+        "layers": [
+            [
+                layer_idx,
+                layer_starts[layer_idx],
+                layer_starts[layer_idx] + layer_counts[layer_idx],
+                coordinate_systems[layer_idx],
+            ]
+            for layer_idx in layers
+        ],
+    }
+    # The index of the loaded geometry numbers the cells of all sources consecutively
+    columns = [(_INDEX_NAME, np.dtype(np.int64)), *((str(column), dtype) for column, dtype in empty_df.dtypes.items())]
+    header_bytes, file_size = _serialize_header(header, columns)
+
+    with atomic_write(output_path) as tmp_path:
+        with open(tmp_path, "wb") as binary_file:
+            binary_file.write(BINARY_GEOMETRY_MAGIC)
+            binary_file.write(len(header_bytes).to_bytes(8, "little"))
+            binary_file.write(header_bytes)
+            binary_file.truncate(file_size)
+
+        # Second pass: the cells of each chunk are written through a writable mapping of the file, of which the
+        # operating system writes back and evicts the pages as needed
+        buffer = np.memmap(tmp_path, dtype=np.uint8, mode="r+")
+        try:
+            _write_cells(buffer, header, trees, keys, config, layer_starts, step_size)
+            buffer.flush()
+        finally:
+            # The mapping is dropped before the file is replaced or removed
+            del buffer
+
+    return BinaryGeometry(output_path)
+
+
+def _write_cells(
+    buffer: np.memmap,
+    header: dict[str, Any],
+    trees: list[Any],
+    keys: list[str],
+    config: GeometryConfig,
+    layer_starts: dict[int, int],
+    step_size: Union[int, str],
+) -> None:
+    """Writes the cells of the trees chunk by chunk to the mapped file, each layer to its contiguous slice."""
+    arrays = {}
+    for column_header in header["columns"]:
+        dtype = np.dtype(column_header["dtype"])
+        offset = column_header["offset"]
+        arrays[column_header["name"]] = buffer[offset : offset + header["n_cells"] * dtype.itemsize].view(dtype)
+    # The number of cells of each layer written so far
+    n_written = dict.fromkeys(layer_starts, 0)
+    n_cells = 0
+    for tree in trees:
+        for chunk_df in tree.iterate(keys, step_size=step_size, library="pd"):
+            with span("convert_chunk", n_cells=len(chunk_df)):
+                check_geo_consistency(chunk_df, config)
+                rows = _get_chunk_rows(chunk_df["layer"].to_numpy(), layer_starts, n_written)
+                arrays[_INDEX_NAME][rows] = np.arange(n_cells, n_cells + len(chunk_df))
+                for column in chunk_df.columns:
+                    arrays[str(column)][rows] = chunk_df[column].to_numpy()
+                n_cells += len(chunk_df)
+
+
+def _count_layer_cells(
+    trees: list[Any], config: GeometryConfig, step_size: Union[int, str]
+) -> tuple[dict[int, int], dict[int, str]]:
+    """Returns the number of cells and the coordinate system of each layer, reading only the layer and flag branches."""
+    layer_counts: dict[int, int] = {}
+    coordinate_systems: dict[int, str] = {}
+    flag_branches = list(config.coordinate_branch_names.values())
+    for tree in trees:
+        for chunk_df in tree.iterate(["layer", *flag_branches], step_size=step_size, library="pd"):
+            for layer_idx, layer_df in chunk_df.groupby("layer", sort=False):
+                coordinate_system = get_layer_coordinate_system(layer_df, config)
+                if coordinate_systems.setdefault(int(layer_idx), coordinate_system) != coordinate_system:
+                    raise Exception(f"Not all cells in layer {layer_idx} have the same coordinate system assigned.")
+                layer_counts[int(layer_idx)] = layer_counts.get(int(layer_idx), 0) + len(layer_df)
+
+    return layer_counts, coordinate_systems
+
+
+def _get_chunk_rows(layer_values: np.ndarray, layer_starts: dict[int, int], n_written: dict[int, int]) -> np.ndarray:
+    """
+    Returns the rows of the file to which the cells of a chunk are written, following the cells of each layer written
+    so far in their order, and updates the number of cells written of each layer.
+    """
+    # A stable sort keeps the order of the cells within each layer
+    order = np.argsort(layer_values, kind="stable")
+    chunk_layers, chunk_starts, chunk_counts = np.unique(layer_values[order], return_index=True, return_counts=True)
+
+    rows = np.empty(len(layer_values), dtype=np.int64)
+    for layer_idx, start, count in zip(chunk_layers.tolist(), chunk_starts, chunk_counts):
+        row = layer_starts[layer_idx] + n_written[layer_idx]
+        rows[order[start : start + count]] = np.arange(row, row + count)
+        n_written[layer_idx] += int(count)
+
+    return rows
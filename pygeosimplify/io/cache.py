@@ -0,0 +1,142 @@
+import contextlib
+import hashlib
+import json
+import os
+from typing import Any, Optional
+
+import pandas as pd
+
+from pygeosimplify.cfg.config import GeometryConfig, get_config
+from pygeosimplify.io.binary import load_geometry_binary, save_geometry_binary
+from pygeosimplify.io.geo_handler import load_geometry
+from pygeosimplify.utils.files import atomic_write
+
+
+def geometry_cache_key(
+    file_path: str,
+    tree_name: str,
+    config: GeometryConfig,
+    branches: Optional[list[str]] = None,
+    compact: bool = False,
+) -> str:
+    """
+    Returns the cache key of a loaded geometry.
+    The key changes whenever the file is modified or a different tree, configuration, branch projection or column
+    layout is requested.
+
+    Args:
+        file_path (str): The path to the ROOT file.
+        tree_name (str): The name of the tree.
+        config (GeometryConfig): The coordinate branch configuration.
+        branches (list[str], optional): The additional branches to load.
+        compact (bool, optional): Whether the geometry is stored with compact column types. Defaults to False.
+
+    Returns:
+        str: The cache key.
+    """
+    stat = os.stat(file_path)
+    key = (
+        os.path.abspath(file_path),
+        stat.st_mtime_ns,
+        stat.st_size,
+        tree_name,
+        config.coordinate_branches,
+        None if branches is None else tuple(branches),
+        compact,
+    )
+
+    return hashlib.sha256(repr(key).encode()).hexdigest()
+
+
+def load_geometry_cached(
+    file_path: str,
+    tree_name: str,
+    cache_dir: str,
+    config: Optional[GeometryConfig] = None,
+    branches: Optional[list[str]] = None,
+    compact: bool = False,
+    workers: Optional[int] = None,
+    memory_map: bool = False,
+) -> pd.DataFrame:
+    """
+    Load geometry from a ROOT file, reusing a previously loaded and checked copy from the cache directory if available.
+    The copies are stored in the binary geometry format and mapped into memory, such that loading a cached geometry
+    requires no decompression. By default, an ordinary copy of the geometry is returned, with the cells in their
+    original order. With memory_map, the mapped geometry is returned without copying it, such that processes loading
+    the same geometry share its pages, but its cells are grouped by layer and its columns are read-only, see
+    save_geometry_binary.
+
+    Args:
+        file_path (str): The path to the ROOT file.
+        tree_name (str): The name of the tree to load.
+        cache_dir (str): The directory holding the cached geometries. It is created if it does not exist.
+        config (GeometryConfig, optional): The coordinate branch configuration. If not provided, the configuration
+            installed with use_config or else the module level coordinate branches are used.
+        branches (list[str], optional): Additional branches to load, see load_geometry.
+        compact (bool, optional): Whether to store the geometry with compact column types, see compact_geometry.
+            Defaults to False.
+        workers (int, optional): The number of threads reading the geometry if it is not cached, see load_geometry.
+            Defaults to the number of CPUs.
+        memory_map (bool, optional): Whether to return the read-only geometry mapped into memory instead of a
+            copy. Defaults to False.
+
+    Returns:
+        pd.DataFrame: A pandas DataFrame containing the loaded geometry.
+    """
+    config = get_config(config)
+    cache_path = os.path.join(
+        cache_dir, f"{geometry_cache_key(file_path, tree_name, config, branches, compact)}.pgsgeo"
+    )
+
+    if not os.path.exists(cache_path):
+        df = load_geometry(file_path, tree_name, config=config, branches=branches, compact=compact, workers=workers)
+        os.makedirs(cache_dir, exist_ok=True)
+        save_geometry_binary(df, cache_path, config)
+
+    # The cached copy is returned after a miss as well, such that the geometry is identical for hits and misses
+    df = load_geometry_binary(cache_path).df
+    if memory_map:
+        return df
+
+    # The index numbers the cells in their original order
+    return df.sort_index()
+
+
+def write_json_atomic(file_path: str, data: Any) -> None:
+    """
+    Writes JSON serializable data to a file, see atomic_write.
+
+    Args:
+        file_path (str): The path of the file. It is replaced atomically if it exists.
+        data (Any): The JSON serializable data.
+    """
+    with atomic_write(file_path) as tmp_path, open(tmp_path, "w") as json_file:
+        json.dump(data, json_file)
+
+
+def evict_least_recently_used(cache_dir: str, max_size: Optional[int], suffix: str) -> None:
+    """
+    Removes the least recently modified entries of a cache directory until its entries fit the maximum size.
+
+    Args:
+        cache_dir (str): The cache directory.
+        max_size (int, optional): The maximum size of the entries in bytes. Nothing is removed if None.
+        suffix (str): The file name suffix of the entries.
+    """
+    if max_size is None:
+        return
+
+    entries = []
+    for file_name in os.listdir(cache_dir):
+        if file_name.endswith(suffix):
+            stat = os.stat(os.path.join(cache_dir, file_name))
+            entries.append((stat.st_mtime_ns, stat.st_size, file_name))
+
+    size = sum(entry[1] for entry in entries)
+    for _, file_size, file_name in sorted(entries):
+        if size <= max_size:
+            break
+        # Another process may have evicted the same entry already
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(os.path.join(cache_dir, file_name))
+        size -= file_size
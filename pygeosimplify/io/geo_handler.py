@@ -1,64 +1,360 @@
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import Optional, Union
+
+import numpy as np
 import pandas as pd
 import uproot
 
-import pygeosimplify.cfg.config as config
+from pygeosimplify.cfg.config import GeometryConfig, get_config
+from pygeosimplify.geo.kernels import rz_extent
+from pygeosimplify.geo.vertices import COORDINATE_COLUMNS
+from pygeosimplify.utils.message_type import MessageType as mt
+from pygeosimplify.utils.tracing import span, traced
+
+# Backends of the columns of loaded geometries
+GEOMETRY_BACKENDS = ("numpy", "arrow")
+
+# A geometry source, either the path to a ROOT file or a pair of the path and the name of the tree to load from it
+GeometrySource = Union[str, tuple[str, str]]
 
 
-def tree_to_df(tree: uproot.models.TTree) -> pd.DataFrame:
+def tree_to_df(
+    tree: uproot.models.TTree,
+    branches: Optional[list[str]] = None,
+    backend: str = "numpy",
+    decompression_executor: Optional[Executor] = None,
+    interpretation_executor: Optional[Executor] = None,
+) -> pd.DataFrame:
     """
     Convert a ROOT TTree to a pandas DataFrame.
 
     Parameters:
     tree (uproot.models.TTree): The ROOT TTree to convert.
+    branches (list[str], optional): The branches to read. If not provided, all branches are read.
+    backend (str, optional): The backend of the columns, either "numpy" or "arrow". With "arrow", the arrays read by
+        uproot are wrapped without copies into an Arrow table, whose columns become pandas ArrowDtype columns.
+        Defaults to "numpy".
+    decompression_executor (Executor, optional): The executor decompressing the baskets. If not provided, the
+        default executor of uproot is used.
+    interpretation_executor (Executor, optional): The executor interpreting the baskets. If not provided, the
+        default executor of uproot is used.
 
     Returns:
     pd.DataFrame: The resulting pandas DataFrame.
     """
-    df = tree.arrays(tree.keys(), library="pd")
+    if backend not in GEOMETRY_BACKENDS:
+        raise ValueError(f"Invalid backend {backend}. Allowed backends are {GEOMETRY_BACKENDS}.")
+
+    keys = tree.keys() if branches is None else branches
+
+    if backend == "arrow":
+        try:
+            import pyarrow as pa
+        except ImportError as error:
+            raise ImportError(
+                "pyarrow is required for the Arrow backend. Install it with pip install pygeosimplify[arrow]"
+            ) from error
+        # Arrow wraps the flat numeric arrays without copying them
+        table = pa.table(
+            tree.arrays(
+                keys,
+                library="np",
+                decompression_executor=decompression_executor,
+                interpretation_executor=interpretation_executor,
+            )
+        )
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+    df = tree.arrays(
+        keys,
+        library="pd",
+        decompression_executor=decompression_executor,
+        interpretation_executor=interpretation_executor,
+    )
 
     return df
 
 
-def load_geometry(file_path: str, tree_name: str) -> pd.DataFrame:
+@traced()
+def load_geometry(
+    file_path: Union[GeometrySource, list[GeometrySource]],
+    tree_name: Optional[str] = None,
+    config: Optional[GeometryConfig] = None,
+    branches: Optional[list[str]] = None,
+    compact: bool = False,
+    envelope_tolerance: float = 1e-2,
+    backend: str = "numpy",
+    workers: Optional[int] = None,
+) -> pd.DataFrame:
     """
-    Load geometry from a ROOT file into a pandas DataFrame.
+    Load geometry from one or several ROOT files into a pandas DataFrame.
+    Several sources, e.g. one per subsystem of a detector, are read concurrently and concatenated in the given order.
+    The baskets of all sources are decompressed and interpreted by shared thread pools, as the decompression releases
+    the GIL.
 
     Args:
-        file_path (str): The path to the ROOT file.
-        tree_name (str): The name of the tree to load.
+        file_path (Union[GeometrySource, list[GeometrySource]]): The path to the ROOT file, or a list of sources. Each
+            source is either the path to a ROOT file or a pair of the path and the name of the tree to load from it.
+        tree_name (str, optional): The name of the tree to load from the sources given as paths.
+        config (GeometryConfig, optional): The coordinate branch configuration. If not provided, the configuration
+            installed with use_config or else the module level coordinate branches are used.
+        branches (list[str], optional): Additional branches to load. If provided, only the required branches and
+            these branches are read from the tree, else all branches are read.
+        compact (bool, optional): Whether to store the geometry with compact column types, see compact_geometry.
+            Defaults to False.
+        envelope_tolerance (float, optional): The maximum deviation of the cell envelopes of the compact geometry,
+            see compact_geometry. Defaults to 1e-2.
+        backend (str, optional): The backend of the columns, "numpy" or "arrow", see tree_to_df. Defaults to "numpy".
+        workers (int, optional): The number of threads of each thread pool. Defaults to the number of CPUs. With a
+            single worker, the sources are read one after the other without thread pools.
 
     Returns:
         pd.DataFrame: A pandas DataFrame containing the loaded geometry.
 
     Raises:
         Exception: If coordinate branches have not been set before loading geometry.
+        Exception: If the sources do not contain the same branches.
+        ValueError: If a source is given as path without a tree name.
+    """
+    config = get_loading_config(config)
+
+    sources = get_geometry_sources(file_path, tree_name)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers == 1:
+        pieces = [_read_source(*source, config, branches, backend) for source in sources]
+    else:
+        with ExitStack() as stack:
+            decompression_executor = stack.enter_context(ThreadPoolExecutor(workers))
+            interpretation_executor = stack.enter_context(ThreadPoolExecutor(workers))
+            source_executor = stack.enter_context(ThreadPoolExecutor(min(workers, len(sources))))
+            futures = [
+                source_executor.submit(
+                    _read_source, *source, config, branches, backend, decompression_executor, interpretation_executor
+                )
+                for source in sources
+            ]
+            pieces = [future.result() for future in futures]
+
+    df = _concat_sources(sources, pieces)
+
+    # Check whether the tree contains all required branches
+    check_geo_consistency(df, config)
+
+    if compact:
+        df = compact_geometry(df, config, envelope_tolerance)
+
+    return df
+
+
+def get_loading_config(config: Optional[GeometryConfig] = None) -> GeometryConfig:
+    """
+    Resolves the configuration to load a geometry with, see get_config, which needs coordinate branches to be set.
+
+    Args:
+        config (GeometryConfig, optional): An explicitly passed configuration, which takes precedence.
+
+    Returns:
+        GeometryConfig: The resolved configuration.
+
+    Raises:
+        Exception: If coordinate branches have not been set.
     """
+    config = get_config(config)
     if config.coordinate_branch_names == {}:
         raise Exception(
             "Coordinate branches have not been set. Please set coordinate branches before loading geometry."
         )
-    # Open root tree with uprot
-    tree = uproot.open(f"{file_path}:{tree_name}")
-    # Convert the tree to a pandas dataframe
-    df = tree_to_df(tree)
-    # Check whether the tree contains all required branches
-    check_geo_consistency(df)
 
-    return df
+    return config
+
+
+def get_geometry_sources(
+    file_path: Union[GeometrySource, list[GeometrySource]], tree_name: Optional[str]
+) -> list[tuple[str, str]]:
+    """
+    Returns the path and tree name of each geometry source.
+
+    Args:
+        file_path (Union[GeometrySource, list[GeometrySource]]): The path to the ROOT file, or a list of sources, see
+            load_geometry.
+        tree_name (str, optional): The name of the tree to load from the sources given as paths.
+
+    Returns:
+        list[tuple[str, str]]: The path and tree name of each source.
+
+    Raises:
+        ValueError: If a source is given as path without a tree name.
+    """
+    sources = []
+    for source in [file_path] if isinstance(file_path, (str, tuple)) else file_path:
+        if isinstance(source, str):
+            if tree_name is None:
+                raise ValueError(f"No tree name given for the source {source}.")
+            source = (source, tree_name)
+        sources.append(source)
+
+    return sources
+
 
+def _concat_sources(sources: list[tuple[str, str]], pieces: list[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenates the cells read from the sources in order, which must contain the same branches."""
+    if len(pieces) == 1:
+        return pieces[0]
 
-def check_geo_consistency(df: pd.DataFrame) -> None:
+    for source, piece in zip(sources[1:], pieces[1:]):
+        if set(piece.columns) != set(pieces[0].columns):
+            raise Exception(
+                f"Branches of source {source} differ from those of source {sources[0]}:"
+                f" {sorted(set(piece.columns) ^ set(pieces[0].columns))}"
+            )
+
+    return pd.concat([piece[pieces[0].columns] for piece in pieces], ignore_index=True)
+
+
+def _read_source(
+    file_path: str,
+    tree_name: str,
+    config: GeometryConfig,
+    branches: Optional[list[str]],
+    backend: str,
+    decompression_executor: Optional[Executor] = None,
+    interpretation_executor: Optional[Executor] = None,
+) -> pd.DataFrame:
+    """Reads the branches of a single source into a pandas DataFrame, see load_geometry."""
+    with span("read_source", file_path=file_path, tree_name=tree_name):
+        # Open root tree with uprot
+        tree = uproot.open(f"{file_path}:{tree_name}")
+        if branches is not None:
+            # Only read the required and requested branches. Missing required branches are reported by the consistency
+            # check
+            tree_branches = tree.keys()
+            required_branches = [branch for branch in config.required_branches if branch in tree_branches]
+            branches = list(dict.fromkeys([*required_branches, *branches]))
+        # Convert the tree to a pandas dataframe
+        return tree_to_df(tree, branches, backend, decompression_executor, interpretation_executor)
+
+
+@traced()
+def compact_geometry(
+    df: pd.DataFrame, config: Optional[GeometryConfig] = None, envelope_tolerance: float = 1e-2
+) -> pd.DataFrame:
+    """
+    Returns a copy of the geometry with compact column types, which roughly halves its memory usage.
+    The coordinate flags and isBarrel are stored as booleans, the layer index as the smallest integer type holding all
+    layers and the cell positions and sizes as float32. The position and size columns of a coordinate system are kept
+    in their original type if the cell envelope of any layer in that coordinate system deviates by more than the
+    tolerance from the one computed from the original columns.
+
+    Args:
+        df (pd.DataFrame): The geometry.
+        config (GeometryConfig, optional): The coordinate branch configuration. If not provided, the configuration
+            installed with use_config or else the module level coordinate branches are used.
+        envelope_tolerance (float, optional): The maximum absolute deviation of the cell envelopes, in the unit of the
+            geometry. Defaults to 1e-2.
+
+    Returns:
+        pd.DataFrame: The compact geometry.
+    """
+    config = get_config(config)
+    compact_df = df.copy()
+
+    for column in ["isBarrel", *config.coordinate_branch_names.values()]:
+        if compact_df[column].isin([0, 1]).all():
+            compact_df[column] = compact_df[column].astype(bool)
+    compact_df["layer"] = pd.to_numeric(compact_df["layer"], downcast="integer")
+
+    geometry_columns = {
+        column for columns in COORDINATE_COLUMNS.values() for column_group in columns for column in column_group
+    }
+    for column in sorted(geometry_columns & set(df.columns)):
+        if pd.api.types.is_float_dtype(df[column]) and df[column].dtype.itemsize > 4:
+            compact_df[column] = df[column].astype(np.float32)
+
+    reference_envelopes = _get_layer_envelopes(df, config)
+    while True:
+        exceeding_coordinate_systems = set()
+        for layer_idx, (coordinate_system, envelope) in _get_layer_envelopes(compact_df, config).items():
+            reference_envelope = reference_envelopes[layer_idx][1]
+            if not np.allclose(envelope, reference_envelope, rtol=0, atol=envelope_tolerance, equal_nan=True):
+                exceeding_coordinate_systems.add(coordinate_system)
+
+        restored_columns = sorted(
+            {
+                column
+                for coordinate_system in exceeding_coordinate_systems
+                for column_group in COORDINATE_COLUMNS[coordinate_system]
+                for column in column_group
+                if compact_df[column].dtype != df[column].dtype
+            }
+        )
+        if not restored_columns:
+            break
+
+        print(
+            f"{mt.WARNING} Cell envelopes deviate by more than {envelope_tolerance} in float32. Keeping the original"
+            f" type of columns {restored_columns}."
+        )
+        for column in restored_columns:
+            compact_df[column] = df[column]
+
+    return compact_df
+
+
+def get_layer_coordinate_system(layer_df: pd.DataFrame, config: Optional[GeometryConfig] = None) -> str:
+    """
+    Returns the coordinate system in which the cells of a layer are defined.
+
+    Args:
+        layer_df (pd.DataFrame): The cells of the layer.
+        config (GeometryConfig, optional): The coordinate branch configuration. If not provided, the configuration
+            installed with use_config or else the module level coordinate branches are used.
+
+    Returns:
+        str: The coordinate system of the layer.
+
+    Raises:
+        Exception: If no coordinate branch is set for all cells of the layer.
+    """
+    for coordinate_system, branch_name in get_config(config).coordinate_branches:
+        if layer_df[branch_name].all():
+            return coordinate_system
+    raise Exception(f"Could not infer set coordinate system found for layer {layer_df['layer'].iloc[0]}.")
+
+
+def _get_layer_envelopes(df: pd.DataFrame, config: GeometryConfig) -> dict[int, tuple[str, np.ndarray]]:
+    """Returns the coordinate system and the rmin, rmax, zmin and zmax of the cell envelope of each layer."""
+    layer_envelopes = {}
+    for layer_idx, layer_df in df.groupby("layer", sort=False):
+        coordinate_system = get_layer_coordinate_system(layer_df, config)
+        # The envelopes are computed in the positive z halfspace by convention, see GeoLayer.get_cell_envelope
+        half_space_df = layer_df[layer_df.z > 0]
+        if len(half_space_df) > 0:
+            extent = rz_extent(half_space_df, coordinate_system)
+            layer_envelopes[int(layer_idx)] = (coordinate_system, np.array(list(extent.values()), dtype=np.float64))
+
+    return layer_envelopes
+
+
+def check_geo_consistency(df: pd.DataFrame, config: Optional[GeometryConfig] = None) -> None:
     """
     Check the consistency of the provided geo data.
 
     Args:
         df (pd.DataFrame): A pandas DataFrame containing the geo data.
+        config (GeometryConfig, optional): The coordinate branch configuration. If not provided, the configuration
+            installed with use_config or else the module level coordinate branches are used.
 
     Raises:
         Exception: If any of the required branches are missing in the DataFrame.
         Exception: If any cell has none or multiple coordinate systems assigned.
         Exception: If not all cells in a layer have the same coordinate system assigned.
     """
+    config = get_config(config)
+
     # Check whether all required branches are available in the tree
     for required_branch in config.required_branches:
         if required_branch not in df.columns:
@@ -67,23 +363,26 @@ def check_geo_consistency(df: pd.DataFrame) -> None:
                 f" branches: {config.required_branches}"
             )
 
+    # The flags are converted once, as selections on the columns are slow for some backends, e.g. Arrow
+    branch_names = list(config.coordinate_branch_names.values())
+    is_assigned = np.column_stack([df[branch_name].to_numpy() == 1 for branch_name in branch_names])
+
     # Cross check that each cell has exactly one coordinate system assigned
-    coordinate_columns = df[config.coordinate_branch_names.values()]
-    checksum = coordinate_columns.sum(axis=1)
+    checksum = is_assigned.sum(axis=1)
     if not checksum.all() == 1:
         raise Exception(
             "Cells have none or multiple coordinate systems assigned. Coordinate branches are:"
             f" {config.coordinate_branch_names}"
         )
     # Cross check that for each layer, all cells have the same coordinate system assigned
-    for layer_idx in df["layer"].unique():
-        layer_df = df[df["layer"] == layer_idx]
-        coordinate_columns = layer_df[config.coordinate_branch_names.values()]
-
-        # get the coordinate system column
-        unique_columns_check = coordinate_columns == 1
-        layer_coordinate_system_column = coordinate_columns.columns[unique_columns_check.all()]
-
-        # exactly one column where all cells have identical layer coordinate system
-        if not len(layer_coordinate_system_column) == 1:
+    layer_codes, layer_indices = pd.factorize(df["layer"].to_numpy())
+    # For each layer and coordinate branch, the number of cells with the coordinate system assigned
+    n_assigned = np.stack(
+        [np.bincount(layer_codes, weights=column, minlength=len(layer_indices)) for column in is_assigned.T], axis=1
+    )
+    n_cells = np.bincount(layer_codes, minlength=len(layer_indices))
+    # exactly one column where all cells have identical layer coordinate system
+    n_layer_coordinate_systems = (n_assigned == n_cells[:, np.newaxis]).sum(axis=1)
+    for layer_idx, n_layer_coordinate_system in zip(layer_indices, n_layer_coordinate_systems):
+        if not n_layer_coordinate_system == 1:
             raise Exception(f"Not all cells in layer {layer_idx} have the same coordinate system assigned.")
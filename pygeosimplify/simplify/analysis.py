@@ -0,0 +1,519 @@
+import hashlib
+import json
+import os
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass, field
+from typing import Any, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from pygeosimplify.cfg.config import GeometryConfig, get_config
+from pygeosimplify.geo.query import PartitionedGeometry
+from pygeosimplify.geo.vertices import COORDINATE_COLUMNS, cell_vertices_rz
+from pygeosimplify.io.cache import evict_least_recently_used, write_json_atomic
+from pygeosimplify.simplify.cylinder import Cylinder
+from pygeosimplify.simplify.layer import GeoLayer, cells_continuous_in_z, thin_cylinder
+from pygeosimplify.utils.tracing import traced
+
+# Version of the layer analysis, which is part of the keys of stored analyses. Increase it whenever the analysis
+# changes, such that analyses stored by a previous version are not reused
+LAYER_ANALYSIS_VERSION = 1
+
+
+@dataclass(frozen=True)
+class LayerAnalysis:
+    """
+    The immutable result of the analysis of the cells of a layer, which is all a SimplifiedDetector needs from a layer.
+    Unlike a GeoLayer, it holds no cells, so it can be reused to process the detector with different parameters.
+
+    Attributes:
+        idx (str): The index of the layer.
+        is_barrel (bool): True if the layer is a barrel layer, False otherwise.
+        is_continuous_in_z (bool): True if the layer is continuous in z around z=0.
+        n_cells (int): The number of cells in the layer.
+        thinned_layer_width (float): The default width of the thinned cylinder.
+    """
+
+    idx: str
+    is_barrel: bool
+    is_continuous_in_z: bool
+    n_cells: int
+    thinned_layer_width: float
+    # The cell envelope is only handed out as a copy, see the envelope property
+    _envelope: Cylinder = field(repr=False)
+
+    @classmethod
+    def from_layer(cls, layer: GeoLayer, distance_threshold: float = 50) -> "LayerAnalysis":
+        """
+        Analyzes a layer.
+
+        Args:
+            layer (GeoLayer): The layer to analyze.
+            distance_threshold (float, optional): The continuity threshold, see GeoLayer.is_continuous_in_z. Defaults to 50.
+
+        Returns:
+            LayerAnalysis: The analysis of the layer.
+        """
+        return cls(
+            idx=layer.idx,
+            is_barrel=bool(layer.is_barrel),
+            is_continuous_in_z=bool(layer.is_continuous_in_z(distance_threshold)),
+            n_cells=len(layer.df),
+            thinned_layer_width=layer.thinned_layer_width,
+            _envelope=layer.get_cell_envelope(),
+        )
+
+    @classmethod
+    def from_dict(cls, analysis_dict: dict[str, Any]) -> "LayerAnalysis":
+        """
+        Creates an analysis from its dictionary representation, see to_dict.
+
+        Args:
+            analysis_dict (dict[str, Any]): The dictionary representation of the analysis.
+
+        Returns:
+            LayerAnalysis: The analysis.
+        """
+        return cls(
+            idx=analysis_dict["idx"],
+            is_barrel=analysis_dict["is_barrel"],
+            is_continuous_in_z=analysis_dict["is_continuous_in_z"],
+            n_cells=analysis_dict["n_cells"],
+            thinned_layer_width=analysis_dict["thinned_layer_width"],
+            _envelope=Cylinder(**analysis_dict["envelope"]),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Returns a JSON serializable dictionary representation of the analysis.
+
+        Returns:
+            dict[str, Any]: The dictionary representation of the analysis.
+        """
+        return {
+            "idx": self.idx,
+            "is_barrel": self.is_barrel,
+            "is_continuous_in_z": self.is_continuous_in_z,
+            "n_cells": self.n_cells,
+            "thinned_layer_width": self.thinned_layer_width,
+            "envelope": {
+                key: value.item() if hasattr(value, "item") else value for key, value in asdict(self._envelope).items()
+            },
+        }
+
+    @property
+    def envelope(self) -> Cylinder:
+        """A copy of the minimal cylinder envelope of the cells in the positive z halfspace."""
+        return self._envelope.copy()
+
+    def thinned_cylinder(self, layer_width: float) -> Cylinder:
+        """
+        Returns the thinned cylinder of the layer.
+
+        Args:
+            layer_width (float): The width of the thinned cylinder.
+
+        Returns:
+            Cylinder: A new thinned cylinder.
+        """
+        return thin_cylinder(self._envelope, layer_width)
+
+
+class LayerCache:
+    """
+    A content-addressed on-disk store of layer analyses.
+    The analysis of a layer is stored under a hash of the cell columns of the layer and the analysis settings, such
+    that analyses are reused across geometry files for all layers whose cells did not change. The least recently used
+    analyses are evicted once the store exceeds its maximum size.
+
+    Attributes:
+        cache_dir (str): The directory holding the stored analyses.
+        max_size (int, optional): The maximum size of the store in bytes. None for an unbounded store.
+        hits (int): The number of analyses read from the store.
+        misses (int): The number of analyses computed and added to the store.
+    """
+
+    def __init__(self, cache_dir: str, max_size: Optional[int] = 64 * 1024**2) -> None:
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+    def key(
+        self,
+        layer_df: pd.DataFrame,
+        layer_idx: int,
+        thinned_layer_width: float = 10,
+        config: Optional[GeometryConfig] = None,
+        distance_threshold: float = 50,
+    ) -> str:
+        """
+        Returns the key of the analysis of a layer.
+
+        Args:
+            layer_df (pd.DataFrame): The cells of the layer.
+            layer_idx (int): The index of the layer.
+            thinned_layer_width (float, optional): The width of the thinned cylinder. Defaults to 10.
+            config (GeometryConfig, optional): The coordinate branch configuration. If not provided, the configuration
+                installed with use_config or else the module level coordinate branches are used.
+            distance_threshold (float, optional): The continuity threshold of the layer. Defaults to 50.
+
+        Returns:
+            str: The key of the analysis.
+        """
+        config = get_config(config)
+        # Only the columns the analysis depends on, such that added branches do not invalidate the analyses
+        cell_columns = {
+            column for columns in COORDINATE_COLUMNS.values() for column_group in columns for column in column_group
+        }
+        columns = sorted(
+            ({"isBarrel", *config.coordinate_branch_names.values()} | cell_columns) & set(layer_df.columns)
+        )
+
+        digest = hashlib.sha256()
+        digest.update(
+            repr(
+                (
+                    LAYER_ANALYSIS_VERSION,
+                    str(layer_idx),
+                    thinned_layer_width,
+                    distance_threshold,
+                    config.coordinate_branches,
+                    columns,
+                )
+            ).encode()
+        )
+        digest.update(pd.util.hash_pandas_object(layer_df[columns], index=False).to_numpy().tobytes())
+
+        return digest.hexdigest()
+
+    def get_analysis(
+        self,
+        df: Union[pd.DataFrame, PartitionedGeometry],
+        layer_idx: int,
+        thinned_layer_width: float = 10,
+        config: Optional[GeometryConfig] = None,
+        distance_threshold: float = 50,
+    ) -> LayerAnalysis:
+        """
+        Returns the analysis of a layer, from the store if the layer was analyzed with the same settings before.
+
+        Args:
+            df (Union[pd.DataFrame, PartitionedGeometry]): The geometry, or a partitioned geometry, see GeoLayer.
+            layer_idx (int): The index of the layer.
+            thinned_layer_width (float, optional): The width of the thinned cylinder. Defaults to 10.
+            config (GeometryConfig, optional): The coordinate branch configuration. If not provided, the configuration
+                installed with use_config or else the module level coordinate branches are used.
+            distance_threshold (float, optional): The continuity threshold of the layer. Defaults to 50.
+
+        Returns:
+            LayerAnalysis: The analysis of the layer.
+        """
+        config = get_config(config)
+        layer_df = df.layer_df(layer_idx) if isinstance(df, PartitionedGeometry) else df[df["layer"] == layer_idx]
+        cache_path = os.path.join(
+            self.cache_dir, f"{self.key(layer_df, layer_idx, thinned_layer_width, config, distance_threshold)}.json"
+        )
+
+        if os.path.exists(cache_path):
+            with open(cache_path) as cache_file:
+                analysis = LayerAnalysis.from_dict(json.load(cache_file))
+            # Mark the analysis as recently used
+            os.utime(cache_path)
+            self.hits += 1
+            return analysis
+
+        layer = GeoLayer(layer_df, layer_idx, thinned_layer_width, config=config)
+        analysis = LayerAnalysis.from_layer(layer, distance_threshold)
+        self.misses += 1
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        write_json_atomic(cache_path, analysis.to_dict())
+        evict_least_recently_used(self.cache_dir, self.max_size, suffix=".json")
+
+        return analysis
+
+
+@traced()
+def analyze_layers(
+    df: pd.DataFrame,
+    thinned_layer_width: float = 10,
+    distance_threshold: float = 50,
+    config: Optional[GeometryConfig] = None,
+) -> pd.DataFrame:
+    """
+    Analyzes all layers of a geometry at once, with a single scan over the cells instead of one GeoLayer per layer.
+    The cells are sorted by layer once, such that each layer is a contiguous segment, and all per-layer quantities are
+    segment reductions over the cell columns and the vertices of all cells of a coordinate system at once. The results
+    are identical to those of the GeoLayers of the layers.
+
+    Args:
+        df (pd.DataFrame): The geometry.
+        thinned_layer_width (float, optional): The width of the thinned cylinders. Defaults to 10.
+        distance_threshold (float, optional): The continuity threshold, see GeoLayer.is_continuous_in_z. Defaults to 50.
+        config (GeometryConfig, optional): The coordinate branch configuration. If not provided, the configuration
+            installed with use_config or else the module level coordinate branches are used.
+
+    Returns:
+        pd.DataFrame: The analysis of each layer, indexed by the sorted layer indices, with the coordinate system, the
+            barrel flag, the number of cells, the extent of all cells (rmin, rmax, zmin, zmax), the cell envelope in
+            the positive z halfspace (envelope_*), the thinned cylinder (thinned_*), the thinned layer width and the
+            continuity in z. It can be added to a SimplifiedDetector directly, see SimplifiedDetector.add_layers.
+
+    Raises:
+        Exception: If no coordinate branch is set for all cells of a layer.
+        ValueError: If a layer has no cells in one of the z halfspaces.
+    """
+    config = get_config(config)
+
+    order, layers, layer_starts, n_cells, cell_layers = _segment_layers(df)
+    coordinate_systems = _get_coordinate_systems(df, order, layers, layer_starts, config)
+
+    # The r and z extent of the vertices of each cell, computed for all cells of a coordinate system at once
+    cell_extents = np.empty((len(df), 4), dtype=np.float64)
+    for coordinate_system in set(coordinate_systems):
+        positions = np.flatnonzero(np.asarray(coordinate_systems)[cell_layers] == coordinate_system)
+        pos_columns, size_columns = COORDINATE_COLUMNS[coordinate_system]
+        r_values, z_values = cell_vertices_rz(
+            _take_cells(df, [*pos_columns, *size_columns], order[positions]), coordinate_system
+        )
+        cell_extents[positions] = np.stack(
+            [r_values.min(axis=1), r_values.max(axis=1), z_values.min(axis=1), z_values.max(axis=1)], axis=1
+        )
+
+    z_values = df["z"].to_numpy(dtype=np.float64)[order]
+    pos_positions, neg_positions = _get_cells_closest_to_z0(z_values, layers, layer_starts, cell_layers)
+
+    extent = _reduce_extents(cell_extents, np.ones(len(df), dtype=bool), layer_starts)
+    # The envelopes are computed in the positive z halfspace by convention, see GeoLayer.get_cell_envelope
+    envelope = _reduce_extents(cell_extents, z_values > 0, layer_starts)
+    is_barrel = np.logical_and.reduceat(df["isBarrel"].to_numpy()[order].astype(bool), layer_starts)
+
+    is_continuous_in_z = _are_continuous_in_z(
+        df, order[pos_positions], order[neg_positions], coordinate_systems, np.array([distance_threshold])
+    )[:, 0]
+
+    table = pd.DataFrame(
+        {
+            "coordinate_system": coordinate_systems,
+            "is_barrel": is_barrel,
+            "n_cells": n_cells,
+            **dict(zip(_EXTENT_KEYS, extent.T)),
+            **{f"envelope_{key}": values for key, values in zip(_EXTENT_KEYS, envelope.T)},
+            "thinned_layer_width": float(thinned_layer_width),
+            "is_continuous_in_z": is_continuous_in_z,
+        },
+        index=pd.Index(layers, name="layer"),
+    )
+    thinned = [
+        thin_cylinder(
+            Cylinder(**dict(zip(_EXTENT_KEYS, layer_envelope)), is_barrel=bool(layer_is_barrel)), thinned_layer_width
+        )
+        for layer_envelope, layer_is_barrel in zip(envelope, is_barrel)
+    ]
+    for key in _EXTENT_KEYS:
+        table[f"thinned_{key}"] = [getattr(cyl, key) for cyl in thinned]
+
+    return table
+
+
+@traced()
+def layers_continuous_in_z(
+    df: pd.DataFrame,
+    distance_threshold: Union[float, Sequence[float]] = 50,
+    config: Optional[GeometryConfig] = None,
+) -> Union[pd.Series, pd.DataFrame]:
+    """
+    Checks for all layers at once whether they are continuous in z around z=0, see GeoLayer.is_continuous_in_z.
+    The cells closest to z=0 in both halfspaces are found with grouped minima and maxima over the cells sorted by
+    layer, and their edge distances are computed for all layers at once, such that several thresholds cost no more
+    than one. The flags are identical to those of the GeoLayers of the layers.
+
+    Args:
+        df (pd.DataFrame): The geometry.
+        distance_threshold (Union[float, Sequence[float]], optional): The continuity threshold, or a sequence of
+            thresholds. Defaults to 50.
+        config (GeometryConfig, optional): The coordinate branch configuration. If not provided, the configuration
+            installed with use_config or else the module level coordinate branches are used.
+
+    Returns:
+        Union[pd.Series, pd.DataFrame]: The flag of each layer, indexed by the sorted layer indices. For a sequence
+            of thresholds, a DataFrame with one column of flags per threshold.
+
+    Raises:
+        Exception: If no coordinate branch is set for all cells of a layer.
+        ValueError: If a layer has no cells in one of the z halfspaces.
+    """
+    config = get_config(config)
+    order, layers, layer_starts, _, cell_layers = _segment_layers(df)
+    coordinate_systems = _get_coordinate_systems(df, order, layers, layer_starts, config)
+
+    z_values = df["z"].to_numpy(dtype=np.float64)[order]
+    pos_positions, neg_positions = _get_cells_closest_to_z0(z_values, layers, layer_starts, cell_layers)
+    distance_thresholds = np.atleast_1d(np.asarray(distance_threshold, dtype=np.float64))
+    is_continuous_in_z = _are_continuous_in_z(
+        df, order[pos_positions], order[neg_positions], coordinate_systems, distance_thresholds
+    )
+
+    index = pd.Index(layers, name="layer")
+    if np.ndim(distance_threshold) > 0:
+        return pd.DataFrame(is_continuous_in_z, index=index, columns=distance_thresholds.tolist())
+
+    return pd.Series(is_continuous_in_z[:, 0], index=index, name="is_continuous_in_z")
+
+
+# The keys of the r and z extents, in the order of the columns of the extent arrays
+_EXTENT_KEYS = ("rmin", "rmax", "zmin", "zmax")
+
+
+def _take_cells(df: pd.DataFrame, columns: list[str], positions: np.ndarray) -> pd.DataFrame:
+    """Returns the given columns of the cells at the given positions, without taking the other columns."""
+    return pd.DataFrame({column: df[column].to_numpy()[positions] for column in dict.fromkeys(columns)})
+
+
+def _segment_layers(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the order sorting the cells by layer, the sorted unique layers, the start and number of cells of each layer
+    in the sorted cells and the position of the layer of each sorted cell.
+    """
+    layer_values = df["layer"].to_numpy()
+    # A stable sort keeps the order of the cells within each layer, which decides between cells equally close to z=0
+    order = np.argsort(layer_values, kind="stable")
+    layers, layer_starts, n_cells = np.unique(layer_values[order], return_index=True, return_counts=True)
+
+    return order, layers, layer_starts, n_cells, np.repeat(np.arange(len(layers)), n_cells)
+
+
+def _get_cells_closest_to_z0(
+    z_values: np.ndarray, layers: np.ndarray, layer_starts: np.ndarray, cell_layers: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the positions of the first cells closest to z=0 of each layer in the z>0 and z<0 halfspaces, as in
+    GeoLayer.is_continuous_in_z, raising a ValueError if a layer has no cells in one of the halfspaces.
+    """
+    positions = []
+    for half_space, is_in_half_space, reduction in [
+        ("positive", z_values > 0, np.minimum),
+        ("negative", z_values < 0, np.maximum),
+    ]:
+        is_empty = np.add.reduceat(is_in_half_space, layer_starts) == 0
+        if is_empty.any():
+            raise ValueError(
+                f"Layer {layers[is_empty][0]} needs cells in both z halfspaces to be analyzed, it has none in the"
+                f" {half_space} one."
+            )
+        positions.append(_first_of_segments(z_values, is_in_half_space, reduction, cell_layers, layer_starts))
+
+    return positions[0], positions[1]
+
+
+def _are_continuous_in_z(
+    df: pd.DataFrame,
+    pos_cells: np.ndarray,
+    neg_cells: np.ndarray,
+    coordinate_systems: list[str],
+    distance_thresholds: np.ndarray,
+) -> np.ndarray:
+    """
+    Returns whether the cells closest to z=0 in the z>0 and z<0 halfspaces of each layer, given as positions in the
+    DataFrame, are continuous in z for each threshold, see cells_continuous_in_z.
+    """
+    columns = [
+        "z",
+        *(
+            column
+            for coordinate_system in dict.fromkeys(coordinate_systems)
+            for column_group in COORDINATE_COLUMNS[coordinate_system]
+            for column in column_group
+        ),
+    ]
+
+    return cells_continuous_in_z(
+        _take_cells(df, columns, pos_cells),
+        _take_cells(df, columns, neg_cells),
+        coordinate_systems,
+        distance_thresholds,
+    )
+
+
+def _get_coordinate_systems(
+    df: pd.DataFrame, order: np.ndarray, layers: np.ndarray, layer_starts: np.ndarray, config: GeometryConfig
+) -> list[str]:
+    """Returns the coordinate system of each layer, the first one of which the branch is set for all cells."""
+    is_set = {
+        coordinate_system: np.logical_and.reduceat(df[branch_name].to_numpy()[order].astype(bool), layer_starts)
+        for coordinate_system, branch_name in config.coordinate_branches
+    }
+
+    coordinate_systems = []
+    for layer_pos, layer_idx in enumerate(layers):
+        layer_coordinate_systems = [
+            coordinate_system for coordinate_system in is_set if is_set[coordinate_system][layer_pos]
+        ]
+        if not layer_coordinate_systems:
+            raise Exception(f"Could not infer set coordinate system found for layer {layer_idx}.")
+        coordinate_systems.append(layer_coordinate_systems[0])
+
+    return coordinate_systems
+
+
+def _reduce_extents(cell_extents: np.ndarray, is_selected: np.ndarray, layer_starts: np.ndarray) -> np.ndarray:
+    """
+    Returns the extent of the selected cells of each layer from the extents of the cells. The cells that are not
+    selected are replaced by the identity of each reduction, while NaN values propagate as in np.min and np.max.
+    """
+    extent = np.empty((len(layer_starts), 4), dtype=np.float64)
+    for column, (reduction, identity) in enumerate(
+        [(np.minimum, np.inf), (np.maximum, -np.inf), (np.minimum, np.inf), (np.maximum, -np.inf)]
+    ):
+        values = np.where(is_selected, cell_extents[:, column], identity)
+        extent[:, column] = reduction.reduceat(values, layer_starts)
+
+    return extent
+
+
+def _first_of_segments(
+    values: np.ndarray,
+    is_selected: np.ndarray,
+    reduction: np.ufunc,
+    cell_layers: np.ndarray,
+    layer_starts: np.ndarray,
+) -> np.ndarray:
+    """Returns the position of the first selected cell of each layer with the minimum or maximum value."""
+    identity = np.inf if reduction is np.minimum else -np.inf
+    extreme_values = reduction.reduceat(np.where(is_selected, values, identity), layer_starts)
+    candidates = np.flatnonzero(is_selected & (values == extreme_values[cell_layers]))
+    # The candidates are sorted, so the first candidate of each layer is found at the first occurrence of the layer
+    _, first = np.unique(cell_layers[candidates], return_index=True)
+
+    return candidates[first]
+
+
+def table_to_analyses(table: pd.DataFrame) -> list[LayerAnalysis]:
+    """
+    Returns the analyses of the layers in a table of layer analyses, see analyze_layers.
+
+    Args:
+        table (pd.DataFrame): The analysis of each layer, indexed by layer index.
+
+    Returns:
+        list[LayerAnalysis]: The analysis of each layer, in the order of the table.
+    """
+    return [
+        LayerAnalysis(
+            idx=str(layer_idx),
+            is_barrel=bool(row.is_barrel),
+            is_continuous_in_z=bool(row.is_continuous_in_z),
+            n_cells=int(row.n_cells),
+            thinned_layer_width=float(row.thinned_layer_width),
+            _envelope=Cylinder(
+                rmin=row.envelope_rmin,
+                rmax=row.envelope_rmax,
+                zmin=row.envelope_zmin,
+                zmax=row.envelope_zmax,
+                is_barrel=bool(row.is_barrel),
+            ),
+        )
+        for layer_idx, row in zip(table.index, table.itertuples(index=False))
+    ]
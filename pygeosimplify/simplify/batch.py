@@ -0,0 +1,342 @@
+import json
+import multiprocessing
+import os
+import time
+import traceback
+from dataclasses import dataclass, field, fields, replace
+from typing import Any, Optional, Union
+
+from pygeosimplify.cfg.config import GeometryConfig, get_config
+from pygeosimplify.geo.query import GeometryIndex
+from pygeosimplify.io.cache import load_geometry_cached
+from pygeosimplify.io.geo_handler import load_geometry
+from pygeosimplify.simplify.analysis import LayerAnalysis, LayerCache
+from pygeosimplify.simplify.detector import SimplifiedDetector
+from pygeosimplify.simplify.layer import GeoLayer
+from pygeosimplify.simplify.process_cache import ProcessCache
+from pygeosimplify.simplify.streaming import stream_layer_analyses
+from pygeosimplify.utils.message_type import MessageType as mt
+from pygeosimplify.utils.tracing import get_tracer, traced, tracing
+
+# Streamed geometries have no cells to key the layer analyses with, so only the processing results are cached
+STREAMING_CACHE_WARNING = (
+    "Streamed geometries and their layer analyses are not cached, only the processing results are stored in the cache"
+    " directory."
+)
+
+
+@dataclass(frozen=True)
+class SimplificationSettings:
+    """Settings shared by the simplification jobs of a batch."""
+
+    config: Optional[GeometryConfig] = None
+    layer_list: Optional[tuple[int, ...]] = None
+    min_layer_dist: float = 1
+    envelope_width: float = 100
+    thinned_layer_width: float = 10
+    overlap_solver: str = "greedy"
+    cyl_type: str = "processed"
+    cache_dir: Optional[str] = None
+    branches: Optional[tuple[str, ...]] = None
+    compact: bool = False
+    streaming: bool = False
+
+    @classmethod
+    def from_dict(cls, settings_dict: dict[str, Any]) -> "SimplificationSettings":
+        """
+        Creates the settings from a dictionary, e.g. the settings section of a manifest.
+
+        Args:
+            settings_dict (dict[str, Any]): The settings. The coordinate branches are given as a dictionary mapping
+                coordinate system to coordinate branch name under the key "coordinate_branches". If they are not
+                given, the configuration is resolved with get_config when the jobs are run.
+
+        Returns:
+            SimplificationSettings: The corresponding settings.
+        """
+        settings_dict = dict(settings_dict)
+        coordinate_branches = settings_dict.pop("coordinate_branches", None)
+        config = None if coordinate_branches is None else GeometryConfig.from_dict(coordinate_branches)
+        for key in ["layer_list", "branches"]:
+            if settings_dict.get(key) is not None:
+                settings_dict[key] = tuple(settings_dict[key])
+
+        return cls(config=config, **settings_dict)
+
+
+@dataclass(frozen=True)
+class SimplificationJob:
+    """A single geometry file to be simplified and written to GDML."""
+
+    file_path: str
+    tree_name: str
+    output_path: str
+    settings: SimplificationSettings = field(default_factory=SimplificationSettings)
+
+
+def load_manifest(manifest_path: str) -> list[SimplificationJob]:
+    """
+    Loads the simplification jobs from a JSON manifest of the form
+    {"settings": {...}, "jobs": [{"file_path": ..., "tree_name": ..., "output_path": ..., "settings": {...}}, ...]}.
+    The settings of a job, if given, override the shared settings of the manifest.
+
+    Args:
+        manifest_path (str): The path to the manifest.
+
+    Returns:
+        list[SimplificationJob]: The simplification jobs in manifest order.
+    """
+    with open(manifest_path) as manifest_file:
+        manifest = json.load(manifest_file)
+
+    shared_settings = manifest.get("settings", {})
+
+    jobs = []
+    for job in manifest["jobs"]:
+        settings = SimplificationSettings.from_dict({**shared_settings, **job.get("settings", {})})
+        jobs.append(SimplificationJob(job["file_path"], job["tree_name"], job["output_path"], settings))
+
+    return jobs
+
+
+@traced()
+def run_job(job: SimplificationJob) -> dict[str, Any]:
+    """
+    Runs a single simplification job, from loading the geometry to writing the GDML file.
+    Failures are caught and reported in the returned summary, such that a failing job does not affect other jobs.
+
+    Args:
+        job (SimplificationJob): The job to run.
+
+    Returns:
+        dict[str, Any]: The summary of the job, with its status, the error if it failed and the timings of each stage in seconds.
+    """
+    job = _resolve_config(job)
+    settings = job.settings
+    summary: dict[str, Any] = {
+        "file_path": job.file_path,
+        "tree_name": job.tree_name,
+        "output_path": job.output_path,
+        "status": "success",
+        "error": None,
+        "pid": os.getpid(),
+        "settings": _settings_to_dict(settings),
+        "timings": {},
+    }
+    timings = summary["timings"]
+
+    start = time.perf_counter()
+    try:
+        if settings.streaming:
+            layers, n_cells = _stream_layers(job, timings)
+        else:
+            layers, n_cells = _load_layers(job, summary, timings)
+
+        # Unchanged geometries are not processed again, e.g. when the same GDML is regenerated in CI
+        process_cache = (
+            None if settings.cache_dir is None else ProcessCache(cache_dir=os.path.join(settings.cache_dir, "process"))
+        )
+        detector = SimplifiedDetector(
+            min_layer_dist=settings.min_layer_dist,
+            envelope_width=settings.envelope_width,
+            process_cache=process_cache,
+            overlap_solver=settings.overlap_solver,
+        )
+        for layer in layers:
+            detector.add_layer(layer)
+
+        stage_start = time.perf_counter()
+        detector.process()
+        timings["process"] = time.perf_counter() - stage_start
+
+        stage_start = time.perf_counter()
+        detector.save_to_gdml(cyl_type=settings.cyl_type, output_path=job.output_path)
+        timings["save"] = time.perf_counter() - stage_start
+
+        summary["n_cells"] = n_cells
+        summary["n_layers"] = len(layers)
+        summary["report"] = detector.report
+    except Exception as error:
+        summary["status"] = "failed"
+        summary["error"] = "".join(traceback.format_exception_only(type(error), error)).strip()
+
+    timings["total"] = time.perf_counter() - start
+
+    return summary
+
+
+def _resolve_config(job: SimplificationJob) -> SimplificationJob:
+    """Returns the job with the configuration of its settings resolved with get_config."""
+    if job.settings.config is not None:
+        return job
+
+    return replace(job, settings=replace(job.settings, config=get_config()))
+
+
+def _load_layers(
+    job: SimplificationJob, summary: dict[str, Any], timings: dict[str, float]
+) -> tuple[list[Union[GeoLayer, LayerAnalysis]], int]:
+    """Loads the geometry of a job and returns its layers to simplify and its number of cells."""
+    settings = job.settings
+
+    stage_start = time.perf_counter()
+    branches = None if settings.branches is None else list(settings.branches)
+    # Jobs run in parallel in worker processes already, so the sources are read without additional threads
+    if settings.cache_dir is not None:
+        df = load_geometry_cached(
+            job.file_path,
+            job.tree_name,
+            settings.cache_dir,
+            settings.config,
+            branches,
+            settings.compact,
+            workers=1,
+            memory_map=True,
+        )
+    else:
+        df = load_geometry(
+            job.file_path,
+            job.tree_name,
+            config=settings.config,
+            branches=branches,
+            compact=settings.compact,
+            workers=1,
+        )
+    timings["load"] = time.perf_counter() - stage_start
+
+    stage_start = time.perf_counter()
+    index = GeometryIndex(df)
+    layer_list = settings.layer_list if settings.layer_list is not None else [int(idx) for idx in index.layers]
+    layers: list[Union[GeoLayer, LayerAnalysis]] = []
+    if settings.cache_dir is not None:
+        # Layers whose cells did not change since a previous run are not analyzed again
+        layer_cache = LayerCache(os.path.join(settings.cache_dir, "layers"))
+        for layer_idx in layer_list:
+            layers.append(
+                layer_cache.get_analysis(index, layer_idx, settings.thinned_layer_width, config=settings.config)
+            )
+        summary["layer_cache"] = {"hits": layer_cache.hits, "misses": layer_cache.misses}
+    else:
+        for layer_idx in layer_list:
+            layers.append(GeoLayer(index, layer_idx, settings.thinned_layer_width, config=settings.config))
+    timings["layers"] = time.perf_counter() - stage_start
+
+    return layers, len(df)
+
+
+def _stream_layers(
+    job: SimplificationJob, timings: dict[str, float]
+) -> tuple[list[Union[GeoLayer, LayerAnalysis]], int]:
+    """Analyzes the layers of a job in chunks, without loading the geometry, see stream_layer_analyses."""
+    settings = job.settings
+    if settings.cache_dir is not None:
+        print(f"{mt.WARNING} {STREAMING_CACHE_WARNING}")
+
+    stage_start = time.perf_counter()
+    # Jobs run in parallel in worker processes already, so the baskets are read without additional threads
+    analyses = stream_layer_analyses(
+        job.file_path, job.tree_name, settings.config, settings.thinned_layer_width, workers=1
+    )
+    timings["load"] = time.perf_counter() - stage_start
+
+    stage_start = time.perf_counter()
+    layer_list = settings.layer_list if settings.layer_list is not None else list(analyses)
+    layers: list[Union[GeoLayer, LayerAnalysis]] = [analyses[layer_idx] for layer_idx in layer_list]
+    timings["layers"] = time.perf_counter() - stage_start
+
+    return layers, sum(analysis.n_cells for analysis in analyses.values())
+
+
+def _run_job_traced(job: SimplificationJob) -> dict[str, Any]:
+    """Run a job in a worker process with tracing enabled, returning the trace events with the summary."""
+    with tracing() as tracer:
+        summary = run_job(job)
+    summary["trace_events"] = tracer.events
+
+    return summary
+
+
+def _run_jobs(jobs: list[SimplificationJob], workers: int, max_tasks_per_child: Optional[int]) -> list[dict[str, Any]]:
+    """Run the jobs in the current process if workers is 1, else in a process pool, keeping the job order."""
+    if workers == 1:
+        return [run_job(job) for job in jobs]
+
+    # If tracing is enabled, the workers trace their jobs and the events are merged into the trace of this process
+    tracer = get_tracer()
+    with multiprocessing.Pool(processes=workers, maxtasksperchild=max_tasks_per_child) as pool:
+        summaries = pool.map(run_job if tracer is None else _run_job_traced, jobs, chunksize=1)
+
+    if tracer is not None:
+        for summary in summaries:
+            tracer.events.extend(summary.pop("trace_events"))
+
+    return summaries
+
+
+def run_batch(
+    jobs: list[SimplificationJob],
+    workers: int = 1,
+    max_tasks_per_child: Optional[int] = None,
+    retries: int = 1,
+    summary_path: Optional[str] = None,
+) -> list[dict[str, Any]]:
+    """
+    Simplifies many geometry files in parallel.
+    The jobs are distributed over a pool of worker processes, which import the dependencies only once. Only the job
+    summaries are sent back from the workers, such that the memory of the main process does not grow with the number
+    of jobs. Failed jobs are retried, each in a fresh worker process if more than one worker is used.
+
+    Args:
+        jobs (list[SimplificationJob]): The jobs to run, e.g. from load_manifest.
+        workers (int, optional): The number of worker processes. Defaults to 1, which runs the jobs in the current process.
+        max_tasks_per_child (int, optional): The number of jobs after which a worker process is replaced by a fresh one, bounding the memory held by each worker. Defaults to None, which keeps the workers for the whole batch.
+        retries (int, optional): The number of times a failed job is retried. Defaults to 1.
+        summary_path (str, optional): If provided, the summaries of all jobs are written to this path as JSON.
+
+    Returns:
+        list[dict[str, Any]]: The summaries of the jobs in job order, including the number of attempts of each job.
+    """
+    if workers < 1:
+        raise ValueError(f"Number of workers must be at least 1, got {workers}")
+
+    # The configuration is resolved in this process, as the workers do not share its coordinate branches
+    jobs = [_resolve_config(job) for job in jobs]
+    summaries = _run_jobs(jobs, workers, max_tasks_per_child)
+    for summary in summaries:
+        summary["attempts"] = 1
+
+    for _ in range(retries):
+        failed = [job_idx for job_idx, summary in enumerate(summaries) if summary["status"] == "failed"]
+        if not failed:
+            break
+
+        print(f"{mt.WARNING} Retrying {len(failed)} failed job(s)...")
+        # With a pool, each retried job runs in its own process, isolated from the state left behind by other jobs
+        retried = _run_jobs([jobs[job_idx] for job_idx in failed], max(1, min(workers, len(failed))), 1)
+        for job_idx, summary in zip(failed, retried):
+            summary["attempts"] = summaries[job_idx]["attempts"] + 1
+            summaries[job_idx] = summary
+
+    n_failed = sum(summary["status"] == "failed" for summary in summaries)
+    if n_failed:
+        print(f"{mt.FAIL} {n_failed} of {len(jobs)} job(s) failed.")
+    else:
+        print(f"{mt.SUCCESS} All {len(jobs)} job(s) succeeded.")
+
+    if summary_path is not None:
+        with open(summary_path, "w") as summary_file:
+            json.dump({"jobs": summaries}, summary_file, indent=2)
+
+    return summaries
+
+
+def _settings_to_dict(settings: SimplificationSettings) -> dict[str, Any]:
+    """Converts the settings into a JSON serializable dictionary, in the format accepted by from_dict."""
+    settings_dict = {settings_field.name: getattr(settings, settings_field.name) for settings_field in fields(settings)}
+    config = settings_dict.pop("config")
+    settings_dict["coordinate_branches"] = None if config is None else config.coordinate_branch_names
+    for key in ["layer_list", "branches"]:
+        if settings_dict[key] is not None:
+            settings_dict[key] = list(settings_dict[key])
+
+    return settings_dict
@@ -26,6 +26,13 @@ class Cylinder:
         else:
             raise AttributeError(f"No such attribute: {attr}")
 
+    def copy(self) -> "Cylinder":
+        """Returns an independent copy of the cylinder, including its lock status."""
+        cyl = Cylinder(self.rmin, self.rmax, self.zmin, self.zmax, self.is_barrel)
+        cyl._locks = dict(self._locks)
+
+        return cyl
+
     def is_locked(self, attr: str) -> bool:
         if attr in self._locks:
             return self._locks[attr]
@@ -1,21 +1,76 @@
+import itertools
+import multiprocessing
+import time
+from dataclasses import replace
+from typing import Any, Optional, Union
+
+import matplotlib.pyplot as plt
+import pandas as pd
 from pyg4ometry.gdml import Writer
 from pyg4ometry.geant4 import MaterialPredefined
 
+from pygeosimplify.simplify.analysis import LayerAnalysis, table_to_analyses
 from pygeosimplify.simplify.cylinder import Cylinder, CylinderGroup
-from pygeosimplify.simplify.helpers import add_cylinder_dict_to_reg, check_pairwise_overlaps, init_world
+from pygeosimplify.simplify.helpers import (
+    add_cylinder_dict_to_reg,
+    check_pairwise_overlaps,
+    find_rz_overlaps,
+    init_world,
+)
 from pygeosimplify.simplify.layer import GeoLayer
-from pygeosimplify.simplify.post_process import post_process_cylinders
+from pygeosimplify.simplify.overlap_solver import OVERLAP_SOLVERS, solve_thinned_overlaps
+from pygeosimplify.simplify.post_process import PostProcessState, post_process_cylinders
+from pygeosimplify.simplify.process_cache import ProcessCache, decode_cylinders, encode_cylinders
+from pygeosimplify.utils.instrumentation import Instrumentation, InstrumentationCallback, instrument
 from pygeosimplify.utils.message_type import MessageType as mt
+from pygeosimplify.utils.tracing import traced
+from pygeosimplify.vis.detector import plot_detector_rz
+
+# Parameters that can be varied in a sweep
+SWEEP_PARAMETERS = ("min_layer_dist", "envelope_width", "thinned_layer_width")
+
+# Layer analyses and default parameters of the current process, set by the sweep worker initializer
+_sweep_state: dict[str, Any] = {}
 
 
 class SimplifiedDetector:
-    def __init__(self, min_layer_dist: float = 1, envelope_width: float = 100) -> None:
+    def __init__(
+        self,
+        min_layer_dist: float = 1,
+        envelope_width: float = 100,
+        callback: Optional[InstrumentationCallback] = None,
+        process_cache: Optional[ProcessCache] = None,
+        overlap_solver: str = "greedy",
+    ) -> None:
+        if overlap_solver not in OVERLAP_SOLVERS:
+            raise ValueError(f"Invalid overlap solver {overlap_solver}. Must be one of: {OVERLAP_SOLVERS}")
+
         self.is_layer_continuous_in_z = {}  # type: dict[str, bool]
         self.cylinders = CylinderGroup()
         self.processed = False
         self.envelope = {}  # type: dict[str, Cylinder]
         self.min_dist = min_layer_dist
         self.envelope_width = envelope_width
+        # Immutable analyses of the added layers, shared with the variants of the detector
+        self.layers = {}  # type: dict[str, LayerAnalysis]
+        # The option chosen for each resolved overlap between thinned cylinders, in order of resolution
+        self.resolution_log = []  # type: list[dict[str, Any]]
+        # Stage timings and counters, the callback is invoked at the end of each stage
+        self.instrumentation = Instrumentation(callback)
+        # Thinned cylinders before and after the overlap resolution and the intermediate results of the post-processing,
+        # from which the detector is processed again when layers are added, updated or removed after processing
+        self._fresh_thinned = {}  # type: dict[str, Cylinder]
+        self._resolved_thinned = {}  # type: dict[str, Cylinder]
+        self._post_process_state = PostProcessState()
+        # Cache of processing results, shared with the variants of the detector
+        self.process_cache = process_cache
+        # The method resolving the overlaps between thinned cylinders, the global solver falls back to the greedy one
+        self.overlap_solver = overlap_solver
+
+    @property
+    def report(self) -> dict[str, Any]:
+        """Stage timings and counters of the layers added to and the processing of the detector."""
+        return self.instrumentation.report()
 
     def _get_cylinder_dict(self, cyl_type: str) -> dict[str, Cylinder]:
         if cyl_type not in ["thinned", "envelope", "processed"]:
@@ -25,13 +80,47 @@ class SimplifiedDetector:
 
         return cyl_dict
 
-    def _resolve_thinned_overlaps(self) -> None:
-        n_overlaps, overlapping_layers = self.check_overlaps(cyl_type="thinned", print_output=False)
+    def _check_thinned_overlaps(self, layer_idxs: Optional[list[str]] = None) -> tuple[int, list[list[str]]]:
+        if layer_idxs is None:
+            return self.check_overlaps(cyl_type="thinned", print_output=False)
+
+        with instrument(self.instrumentation):
+            return check_pairwise_overlaps({idx: self.cylinders.thinned[idx] for idx in layer_idxs}, print_output=False)
+
+    def _solve_thinned_overlaps(self, layer_idxs: Optional[list[str]] = None) -> bool:
+        """Resolves the overlaps between the thinned cylinders at once, returning False if the solver failed."""
+        layer_idxs = list(self.cylinders.thinned) if layer_idxs is None else layer_idxs
+        solution = solve_thinned_overlaps({idx: self.cylinders.thinned[idx] for idx in layer_idxs}, self.min_dist)
+        if solution is None:
+            print(f"{mt.WARNING} Global overlap resolution failed. Falling back to the greedy overlap resolution...")
+            return False
+
+        resolved, resolutions = solution
+        for resolution in resolutions:
+            print(
+                f"Choosing {resolution['option']} for barrel layer {resolution['barrel']} and endcap layer"
+                f" {resolution['endcap']} with diff {resolution['diff']}"
+            )
+        self.cylinders.thinned.update(resolved)
+        self.resolution_log.extend(resolutions)
+        self.instrumentation.count("overlap_resolution_solves")
+        if resolutions:
+            print(f"{mt.SUCCESS} Thinned cylinder overlaps resolved.")
+
+        return True
+
+    def _resolve_thinned_overlaps(self, layer_idxs: Optional[list[str]] = None) -> None:
+        if self.overlap_solver == "milp" and self._solve_thinned_overlaps(layer_idxs):
+            return
+
+        # Only the overlaps between the given layers are resolved, if provided
+        n_overlaps, overlapping_layers = self._check_thinned_overlaps(layer_idxs)
 
         if n_overlaps == 0:
             return
 
         while n_overlaps > 0:
+            self.instrumentation.count("overlap_resolution_iterations")
             # Take the first overlapping pair
             overlap_pair = overlapping_layers[0]
             # Take the cylinders from the overlapping pair
@@ -105,6 +194,14 @@ class SimplifiedDetector:
             if available_options:
                 best_option = min(available_options, key=lambda x: x["diff"])  # type: ignore[arg-type, return-value]
                 print(f"Choosing {best_option['name']} with diff {best_option['diff']}\n")
+                self.resolution_log.append(
+                    {
+                        "barrel": cyl_a_name if cyl_a.is_barrel else cyl_b_name,
+                        "endcap": cyl_b_name if cyl_a.is_barrel else cyl_a_name,
+                        "option": str(best_option["name"]).split(":")[0],
+                        "diff": best_option["diff"],
+                    }
+                )
                 # Apply the best resolution option
                 best_option["action"]()  # type: ignore[operator]
             else:
@@ -118,7 +215,7 @@ class SimplifiedDetector:
             self.cylinders.thinned[cyl_b_name] = barrel if cyl_b.is_barrel else endcap
 
             # Check again for overlapping layers
-            n_overlaps, overlapping_layers = self.check_overlaps(cyl_type="thinned", print_output=False)
+            n_overlaps, overlapping_layers = self._check_thinned_overlaps(layer_idxs)
 
         print(f"{mt.SUCCESS} Thinned cylinder overlaps resolved.")
 
@@ -130,7 +227,10 @@ class SimplifiedDetector:
         # Create the negative z cylinders from the positive halfspace
         for idx, cyl in cyl_dict_pos_z.items():
             if self.is_layer_continuous_in_z[idx]:
+                # Copy on write, such that the input cylinders are left unchanged
+                cyl = cyl.copy()
                 cyl.zmin = 0
+                cyl_dict_pos_z[idx] = cyl
 
             neg_z_cyl = Cylinder(cyl.rmin, cyl.rmax, -cyl.zmax, -cyl.zmin, cyl.is_barrel)
             cyl_dict_neg_z[idx] = neg_z_cyl
@@ -168,59 +268,411 @@ class SimplifiedDetector:
                 del self.cylinders.processed[pos_cyl_name]
                 del self.cylinders.processed[neg_cyl_name]
 
-    def add_layer(self, layer: GeoLayer) -> None:
+    def _set_layer(self, layer: Union[GeoLayer, LayerAnalysis], thinned_layer_width: Optional[float]) -> None:
+        with self.instrumentation.stage("add_layer"):
+            analysis = layer if isinstance(layer, LayerAnalysis) else LayerAnalysis.from_layer(layer)
+            if thinned_layer_width is not None:
+                analysis = replace(analysis, thinned_layer_width=thinned_layer_width)
+
+            # Add layer to the layer dictionary, an updated layer keeps its position
+            self.layers[analysis.idx] = analysis
+
+            if not self.processed:
+                # Check if layer is continuous in z
+                self.is_layer_continuous_in_z[analysis.idx] = analysis.is_continuous_in_z
+                # Set layer envelope
+                self.cylinders.envelope[analysis.idx] = analysis.envelope
+                # Get overlap-resolved thinned cylinders
+                self.cylinders.thinned[analysis.idx] = analysis.thinned_cylinder(analysis.thinned_layer_width)
+
+        self.instrumentation.count("cells_processed", analysis.n_cells)
+
+        if self.processed:
+            self._reprocess({analysis.idx})
+
+    def add_layer(self, layer: Union[GeoLayer, LayerAnalysis], thinned_layer_width: Optional[float] = None) -> None:
+        """
+        Adds a layer to the detector.
+        If the detector has already been processed, it is processed again, see update_layer.
+
+        Args:
+            layer (Union[GeoLayer, LayerAnalysis]): The layer or the analysis of a layer.
+            thinned_layer_width (float, optional): The width of the thinned cylinder. Defaults to the width of the layer.
+        """
         # Ensure that the layer does not already exist in the simplified detector
-        if layer.idx in self.cylinders.thinned:
+        if layer.idx in self.layers:
             raise Exception(f"Layer {layer.idx} already exists in the simplified detector")
 
-        # Add layer to the layer dictionary
-        # Check if layer is continuous in z
-        self.is_layer_continuous_in_z[layer.idx] = layer.is_continuous_in_z()
-        # Set layer envelope
-        self.cylinders.envelope[layer.idx] = layer.get_cell_envelope()
-        # Get overlap-resolved thinned cylinders
-        self.cylinders.thinned[layer.idx] = layer.thinned_cylinder
+        self._set_layer(layer, thinned_layer_width)
+        self.instrumentation.count("layers_added")
+
+    def add_layers(
+        self,
+        layers: Union[pd.DataFrame, list[Union[GeoLayer, LayerAnalysis]]],
+        thinned_layer_width: Optional[float] = None,
+    ) -> None:
+        """
+        Adds several layers to the detector, in order.
+
+        Args:
+            layers (Union[pd.DataFrame, list[Union[GeoLayer, LayerAnalysis]]]): The layers or their analyses, or a
+                table of layer analyses, see analyze_layers.
+            thinned_layer_width (float, optional): The width of the thinned cylinders. Defaults to the width of each
+                layer.
+        """
+        if isinstance(layers, pd.DataFrame):
+            layers = list(table_to_analyses(layers))
+
+        for layer in layers:
+            self.add_layer(layer, thinned_layer_width)
+
+    def update_layer(self, layer: Union[GeoLayer, LayerAnalysis], thinned_layer_width: Optional[float] = None) -> None:
+        """
+        Replaces a layer of the detector, e.g. after its cells changed.
+        If the detector has already been processed, only the overlaps between the thinned cylinders connected to the
+        layer are resolved again and only the cylinders whose neighbourhood changed are grown again. The result is the
+        same as processing all layers from scratch.
+
+        Args:
+            layer (Union[GeoLayer, LayerAnalysis]): The new layer or the analysis of the new layer.
+            thinned_layer_width (float, optional): The width of the thinned cylinder. Defaults to the width of the layer.
+        """
+        if layer.idx not in self.layers:
+            raise Exception(f"Layer {layer.idx} does not exist in the simplified detector")
+
+        self._set_layer(layer, thinned_layer_width)
+        self.instrumentation.count("layers_updated")
+
+    def remove_layer(self, layer_idx: Union[int, str]) -> None:
+        """
+        Removes a layer from the detector.
+        If the detector has already been processed, it is processed again, see update_layer.
+
+        Args:
+            layer_idx (Union[int, str]): The index of the layer.
+        """
+        layer_idx = str(layer_idx)
+        if layer_idx not in self.layers:
+            raise Exception(f"Layer {layer_idx} does not exist in the simplified detector")
+
+        del self.layers[layer_idx]
+        self.instrumentation.count("layers_removed")
+
+        if self.processed:
+            self._reprocess({layer_idx})
+        else:
+            del self.is_layer_continuous_in_z[layer_idx]
+            del self.cylinders.envelope[layer_idx]
+            del self.cylinders.thinned[layer_idx]
 
+    def _get_connected_layers(self, layer_idxs: set[str], cyl_dict: dict[str, Cylinder]) -> set[str]:
+        """
+        Returns the given layers and all layers connected to them through chains of overlapping cylinders. Cylinders
+        closer than the minimum distance are considered overlapping, to be safe against the tolerance of the overlap
+        checks.
+        """
+        grown_cyl_dict = {
+            idx: Cylinder(
+                cyl.rmin - self.min_dist,
+                cyl.rmax + self.min_dist,
+                cyl.zmin - self.min_dist,
+                cyl.zmax + self.min_dist,
+                cyl.is_barrel,
+            )
+            for idx, cyl in cyl_dict.items()
+        }
+        neighbours = {idx: set() for idx in cyl_dict}  # type: dict[str, set[str]]
+        for idx_a, idx_b in find_rz_overlaps(grown_cyl_dict):
+            neighbours[idx_a].add(idx_b)
+            neighbours[idx_b].add(idx_a)
+
+        connected = set(layer_idxs)
+        to_visit = [idx for idx in layer_idxs if idx in neighbours]
+        while to_visit:
+            for neighbour in neighbours[to_visit.pop()] - connected:
+                connected.add(neighbour)
+                to_visit.append(neighbour)
+
+        return connected
+
+    @traced()
+    def _reprocess(self, layer_idxs: set[str]) -> None:
+        """Processes the detector again after the given layers have been added, updated or removed."""
+        fresh_thinned = {
+            idx: analysis.thinned_cylinder(analysis.thinned_layer_width) for idx, analysis in self.layers.items()
+        }
+        # Overlaps are only resolved between overlapping cylinders, so the resolution of the cylinders that are not
+        # connected to the changed layers, neither before nor after the change, is the same as before
+        affected = self._get_connected_layers(layer_idxs, self._fresh_thinned) | self._get_connected_layers(
+            layer_idxs, fresh_thinned
+        )
+
+        self._fresh_thinned = {idx: cyl.copy() for idx, cyl in fresh_thinned.items()}
+        self.is_layer_continuous_in_z = {idx: analysis.is_continuous_in_z for idx, analysis in self.layers.items()}
+        self.cylinders.envelope = {idx: analysis.envelope for idx, analysis in self.layers.items()}
+        self.cylinders.thinned = {
+            idx: fresh_thinned[idx] if idx in affected else self._resolved_thinned[idx].copy() for idx in self.layers
+        }
+        self.resolution_log = [
+            resolution
+            for resolution in self.resolution_log
+            if resolution["barrel"] not in affected and resolution["endcap"] not in affected
+        ]
+        self.instrumentation.count("layers_reprocessed", len(affected & set(self.layers)))
+
+        with self.instrumentation.stage("resolve_thinned_overlaps"):
+            self._resolve_thinned_overlaps([idx for idx in self.layers if idx in affected])
+
+        self._grow_cylinders()
+
+    @traced()
     def process(self) -> None:
         if self.processed:
             raise Exception("Detector has already been processed. Cowardly refusing to re-process...")
 
         self.processed = True
+        self._fresh_thinned = {idx: cyl.copy() for idx, cyl in self.cylinders.thinned.items()}
+
+        if self.process_cache is not None:
+            key = ProcessCache.fingerprint(
+                self.cylinders.thinned,
+                self.cylinders.envelope,
+                self.is_layer_continuous_in_z,
+                self.min_dist,
+                self.envelope_width,
+                self.overlap_solver,
+            )
+            result = self.process_cache.get(key)
+            if result is not None:
+                self.instrumentation.count("process_cache_hits")
+                self._restore_process_result(result)
+                return
+            self.instrumentation.count("process_cache_misses")
+
         # Resolve thinned cylinder overlaps
-        self._resolve_thinned_overlaps()
+        with self.instrumentation.stage("resolve_thinned_overlaps"):
+            self._resolve_thinned_overlaps()
+
+        self._grow_cylinders()
+
+        if self.process_cache is not None:
+            self.process_cache.put(
+                key,
+                {
+                    "resolved_thinned": encode_cylinders(self._resolved_thinned),
+                    "resolution_log": self.resolution_log,
+                    "processed": encode_cylinders(self.cylinders.processed),
+                    "envelope": encode_cylinders(self.envelope),
+                },
+            )
+
+    def _restore_process_result(self, result: dict[str, Any]) -> None:
+        """Restores the processed detector from a cached processing result."""
+        self.cylinders.thinned = decode_cylinders(result["resolved_thinned"])
+        self.resolution_log = [dict(resolution) for resolution in result["resolution_log"]]
+        self._resolved_thinned = {idx: cyl.copy() for idx, cyl in self.cylinders.thinned.items()}
+        # Symmetrizing is cheap, so the symmetrized cylinders are not cached
+        with self.instrumentation.stage("symmetrize"):
+            self.cylinders.thinned = self._symmetrize_cylinders(cyl_type="thinned")
+            self.cylinders.envelope = self._symmetrize_cylinders(cyl_type="envelope")
+        self.cylinders.processed = decode_cylinders(result["processed"])
+        self.envelope = decode_cylinders(result["envelope"])
+
+    def _grow_cylinders(self) -> None:
+        """Symmetrizes, grows and merges the overlap-free thinned cylinders."""
+        self._resolved_thinned = {idx: cyl.copy() for idx, cyl in self.cylinders.thinned.items()}
         # Symmetrize thinned cylinders
-        self.cylinders.thinned = self._symmetrize_cylinders(cyl_type="thinned")
-        self.cylinders.envelope = self._symmetrize_cylinders(cyl_type="envelope")
+        with self.instrumentation.stage("symmetrize"):
+            self.cylinders.thinned = self._symmetrize_cylinders(cyl_type="thinned")
+            self.cylinders.envelope = self._symmetrize_cylinders(cyl_type="envelope")
         # Grow cylinders
-        self.cylinders.processed, self.envelope = post_process_cylinders(
-            cyl_dict=self.cylinders.thinned,
-            cell_envelope=self.cylinders.envelope,
-            min_dist=self.min_dist,
-            envelope_width=self.envelope_width,
-        )
+        with self.instrumentation.stage("post_process"):
+            self.cylinders.processed, self.envelope = post_process_cylinders(
+                cyl_dict=self.cylinders.thinned,
+                cell_envelope=self.cylinders.envelope,
+                min_dist=self.min_dist,
+                envelope_width=self.envelope_width,
+                state=self._post_process_state,
+            )
         # Merge barrel layers continuous at z=0
-        self._merge_barrel()
+        with self.instrumentation.stage("merge_barrel"):
+            self._merge_barrel()
+
+    def process_variant(
+        self,
+        min_layer_dist: Optional[float] = None,
+        envelope_width: Optional[float] = None,
+        thinned_layer_width: Optional[float] = None,
+    ) -> "SimplifiedDetector":
+        """
+        Processes the layers of the detector with different parameters, without analyzing the layers again.
+        The detector itself is left unchanged, so any number of variants can be processed from the same detector.
+
+        Args:
+            min_layer_dist (float, optional): The minimum distance between layers. Defaults to the one of the detector.
+            envelope_width (float, optional): The width of the detector envelope. Defaults to the one of the detector.
+            thinned_layer_width (float, optional): The width of the thinned cylinders. Defaults to the width each layer was added with.
+
+        Returns:
+            SimplifiedDetector: A new, processed detector.
+        """
+        variant = SimplifiedDetector(
+            min_layer_dist=self.min_dist if min_layer_dist is None else min_layer_dist,
+            envelope_width=self.envelope_width if envelope_width is None else envelope_width,
+            callback=self.instrumentation.callback,
+            process_cache=self.process_cache,
+            overlap_solver=self.overlap_solver,
+        )
+        for analysis in self.layers.values():
+            variant.add_layer(analysis, thinned_layer_width)
+        variant.process()
+
+        return variant
+
+    def sweep(self, grid: Union[dict[str, list[float]], list[dict[str, float]]], workers: int = 1) -> pd.DataFrame:
+        """
+        Processes variants of the detector for a grid of parameters, see process_variant.
+        The layer analyses are shipped once to each worker process, such that each variant only requires processing.
+
+        Args:
+            grid (Union[dict[str, list[float]], list[dict[str, float]]]): Either a dictionary mapping parameters to
+                their values, of which all combinations are evaluated, or a list of parameter combinations. Parameters
+                are min_layer_dist, envelope_width and thinned_layer_width, missing ones default to the ones of the detector.
+            workers (int, optional): The number of worker processes. Defaults to 1, which processes the variants in the current process.
+
+        Returns:
+            pd.DataFrame: One row per processed cylinder of each variant with its parameters, the cylinder bounds, the
+            number of remaining overlaps between the processed cylinders, the chosen overlap resolutions, the wall time
+            of the variant and the error if the variant could not be processed.
+        """
+        if isinstance(grid, dict):
+            param_grid = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+        else:
+            param_grid = [dict(params) for params in grid]
+
+        for params in param_grid:
+            invalid_params = set(params) - set(SWEEP_PARAMETERS)
+            if invalid_params:
+                raise ValueError(
+                    f"Invalid sweep parameters {sorted(invalid_params)}. Must be one of: {SWEEP_PARAMETERS}"
+                )
+
+        defaults = {"min_layer_dist": self.min_dist, "envelope_width": self.envelope_width}
+        initargs = (list(self.layers.values()), defaults, self.overlap_solver)
+
+        if workers == 1:
+            _init_sweep_worker(*initargs)
+            results = [_evaluate_variant(params) for params in param_grid]
+            _sweep_state.clear()
+        else:
+            with multiprocessing.Pool(processes=workers, initializer=_init_sweep_worker, initargs=initargs) as pool:
+                results = pool.map(_evaluate_variant, param_grid)
+
+        rows = [
+            {"variant": variant_idx, **row} for variant_idx, variant_rows in enumerate(results) for row in variant_rows
+        ]
+
+        return pd.DataFrame(rows)
 
     def check_overlaps(
         self, cyl_type: str = "thinned", print_output: bool = True, recursive: bool = False, coplanar: bool = False
     ) -> tuple[int, list[list[str]]]:
         cyl_dict = self._get_cylinder_dict(cyl_type)
 
-        return check_pairwise_overlaps(cyl_dict, print_output, recursive, coplanar)
+        # Count overlap engine calls and world builds towards the report of the detector
+        with instrument(self.instrumentation):
+            return check_pairwise_overlaps(cyl_dict, print_output, recursive, coplanar)
+
+    def plot_rz(
+        self,
+        df: Optional[pd.DataFrame] = None,
+        ax: Union[None, plt.Axes] = None,
+        view: str = "half",
+        overlap_cyl_type: Optional[str] = None,
+        unit_scale: float = 1,
+    ) -> plt.Axes:
+        """
+        Plot an r-z cross-section of the cylinders of the detector and, if provided, the cell footprints of its layers.
+        Overlaps are detected from the r-z cross-sections of the processed cylinders, or the thinned cylinders if the detector has not been processed yet.
+        """
+        if overlap_cyl_type is None:
+            overlap_cyl_type = "processed" if self.processed else "thinned"
+
+        ax = plot_detector_rz(
+            self.cylinders, df=df, ax=ax, view=view, overlap_cyl_type=overlap_cyl_type, unit_scale=unit_scale
+        )
 
+        return ax
+
+    @traced()
     def save_to_gdml(self, cyl_type: str = "processed", output_path: str = "simplified_detector.gmdl") -> None:
         if not self.processed:
             raise Exception("Detector has not been processed yet. Process first with detector.process()")
 
-        # Get the dimensions for the requested cylinder type
-        cyl_dict = self._get_cylinder_dict(cyl_type)
-        # Initialize the world and registry
-        world, registry = init_world(MaterialPredefined("G4_Galactic"))
-        # Add the cylinder to the registry
-        add_cylinder_dict_to_reg(registry, world, cyl_dict, MaterialPredefined("G4_Galactic"))
-        # Add envelope of detector
-        add_cylinder_dict_to_reg(registry, world, self.envelope, MaterialPredefined("G4_Galactic"))
-        # Write the gdml file
-        gdml_writer = Writer()
-        gdml_writer.addDetector(registry)
-        gdml_writer.write(output_path)
+        with self.instrumentation.stage("save_to_gdml"):
+            # Get the dimensions for the requested cylinder type
+            cyl_dict = self._get_cylinder_dict(cyl_type)
+            # Initialize the world and registry
+            world, registry = init_world(MaterialPredefined("G4_Galactic"))
+            # Add the cylinder to the registry
+            add_cylinder_dict_to_reg(registry, world, cyl_dict, MaterialPredefined("G4_Galactic"))
+            # Add envelope of detector
+            add_cylinder_dict_to_reg(registry, world, self.envelope, MaterialPredefined("G4_Galactic"))
+            # Write the gdml file
+            gdml_writer = Writer()
+            gdml_writer.addDetector(registry)
+            gdml_writer.write(output_path)
+
+
+def _init_sweep_worker(analyses: list[LayerAnalysis], defaults: dict[str, float], overlap_solver: str) -> None:
+    """Store the layer analyses, default parameters and overlap solver of a sweep in the current process."""
+    _sweep_state["analyses"] = analyses
+    _sweep_state["defaults"] = defaults
+    _sweep_state["overlap_solver"] = overlap_solver
+
+
+def _evaluate_variant(variant_params: dict[str, float]) -> list[dict[str, Any]]:
+    """Process a single variant of a sweep and return one row per processed cylinder."""
+    start = time.perf_counter()
+    # A thinned layer width of None uses the width each layer was added with
+    params = {**_sweep_state["defaults"], "thinned_layer_width": None, **variant_params}
+
+    try:
+        detector = SimplifiedDetector(
+            min_layer_dist=params["min_layer_dist"],
+            envelope_width=params["envelope_width"],
+            overlap_solver=_sweep_state["overlap_solver"],
+        )
+        for analysis in _sweep_state["analyses"]:
+            detector.add_layer(analysis, params["thinned_layer_width"])
+        detector.process()
+    except Exception as error:
+        return [{**params, "cylinder": None, "wall_time": time.perf_counter() - start, "error": str(error)}]
+
+    # Remaining overlaps are counted analytically from the r-z cross-sections of the processed cylinders
+    n_overlaps = len(find_rz_overlaps(detector.cylinders.processed))
+    resolutions = ";".join(
+        f"{resolution['barrel']}/{resolution['endcap']}:{resolution['option']}"
+        for resolution in detector.resolution_log
+    )
+    wall_time = time.perf_counter() - start
+
+    return [
+        {
+            **params,
+            # Processed cylinders are named after the layer index, e.g. 14, 14_POS or 14_NEG
+            "thinned_layer_width": detector.layers[cyl_name.split("_")[0]].thinned_layer_width,
+            "cylinder": cyl_name,
+            "rmin": cyl.rmin,
+            "rmax": cyl.rmax,
+            "zmin": cyl.zmin,
+            "zmax": cyl.zmax,
+            "is_barrel": bool(cyl.is_barrel),
+            "n_overlaps": n_overlaps,
+            "n_resolutions": len(detector.resolution_log),
+            "resolutions": resolutions,
+            "wall_time": wall_time,
+            "error": None,
+        }
+        for cyl_name, cyl in detector.cylinders.processed.items()
+    ]
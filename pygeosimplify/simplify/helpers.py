@@ -9,11 +9,15 @@ from pyg4ometry.geant4.Registry import Registry
 from pyg4ometry.geant4.solid import Box, Tubs
 
 from pygeosimplify.simplify.cylinder import Cylinder
+from pygeosimplify.utils.instrumentation import count
+from pygeosimplify.utils.tracing import traced
 
 
 def init_world(
     material: Material, X: float = 40000, Y: float = 40000, Z: float = 80000
 ) -> tuple[LogicalVolume, Registry]:
+    count("world_builds")
+
     # registry to store gdml data
     reg = Registry()
 
@@ -105,6 +109,7 @@ def check_world_overlap(
         logger.setLevel(original_level)
 
 
+@traced()
 def check_pairwise_overlaps(
     cyl_dict: dict[str, Cylinder], print_output: bool = True, recursive: bool = False, coplanar: bool = False
 ) -> tuple[int, list[list[str]]]:
@@ -170,6 +175,7 @@ def add_cylinder_dict_to_reg(registry: Registry, world_log: LogicalVolume, cyl_d
         add_cylinder_to_reg(idx, registry, world_log, cyl, material)
 
 
+@traced()
 def check_cyl_dict_overlaps(
     cyl_dict: dict, print_output: bool = True, recursive: bool = False, coplanar: bool = False
 ) -> tuple[int, list[list[str]]]:
@@ -185,6 +191,8 @@ def check_cyl_dict_overlaps(
     Returns:
         Tuple of (number of overlaps, list of overlapping volume pairs)
     """
+    count("overlap_engine_calls")
+
     material = MaterialPredefined("G4_Galactic")
     world_logic, reg = init_world(material)
 
@@ -217,3 +225,27 @@ def r_overlap_filter(row: pd.DataFrame, r_min_test: float, r_max_test: float) ->
     overlapDistance = overlap_distance(row.rmin, row.rmax, r_min_test, r_max_test)
 
     return overlapDistance > 0
+
+
+def find_rz_overlaps(cyl_dict: dict[str, Cylinder]) -> list[list[str]]:
+    """
+    Find overlapping cylinders analytically from their r-z cross-sections.
+    As all cylinders are full tubes around the z-axis, two cylinders overlap if and only if both their r and z
+    intervals overlap. Touching cylinders are not considered overlapping.
+
+    Args:
+        cyl_dict: Dictionary of cylinders to check
+
+    Returns:
+        List of overlapping cylinder name pairs, in the same order as returned by check_pairwise_overlaps
+    """
+    cyl_names = list(cyl_dict.keys())
+    bounds = np.array(
+        [[cyl_dict[name].rmin, cyl_dict[name].rmax, cyl_dict[name].zmin, cyl_dict[name].zmax] for name in cyl_names]
+    ).reshape(-1, 4)
+
+    r_overlap = np.minimum.outer(bounds[:, 1], bounds[:, 1]) - np.maximum.outer(bounds[:, 0], bounds[:, 0])
+    z_overlap = np.minimum.outer(bounds[:, 3], bounds[:, 3]) - np.maximum.outer(bounds[:, 2], bounds[:, 2])
+    is_overlapping = np.triu((r_overlap > 0) & (z_overlap > 0), k=1)
+
+    return [[cyl_names[idx_a], cyl_names[idx_b]] for idx_a, idx_b in zip(*np.nonzero(is_overlapping))]
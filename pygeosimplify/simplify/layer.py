@@ -1,15 +1,21 @@
-from typing import Union
+from typing import Optional, Union
 
+import matplotlib.colors as mcolors
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 from mpl_toolkits.mplot3d import Axes3D
 
-from pygeosimplify.cfg import config
+from pygeosimplify.cfg.config import GeometryConfig, get_config
 from pygeosimplify.coordinate.definitions import XYZ, EtaPhiR, EtaPhiZ, RPhiZ
 from pygeosimplify.geo.cells import EtaPhiRCell, EtaPhiZCell, RPhiZCell, XYZCell
+from pygeosimplify.geo.kernels import rz_extent
+from pygeosimplify.geo.query import PartitionedGeometry
+from pygeosimplify.geo.vertices import COORDINATE_COLUMNS, cell_vertices_rz
+from pygeosimplify.io.geo_handler import get_layer_coordinate_system
 from pygeosimplify.simplify.cylinder import Cylinder
-from pygeosimplify.vis.cylinder import plot_cylinder
+from pygeosimplify.utils.tracing import traced
+from pygeosimplify.vis.cylinder import plot_cylinder, plot_cylinder_rz
 from pygeosimplify.vis.geo import plot_geometry
 
 
@@ -28,7 +34,7 @@ class GeoLayer:
     is_barrel : bool
         True if the layer is a barrel layer, False otherwise.
     cells : list[Union[XYZCell, EtaPhiRCell, EtaPhiZCell, RPhiZCell]]
-        A list of cell objects representing the cells in the layer.
+        A list of cell objects representing the cells in the layer, created on first access.
     extent : dict
         A dictionary containing the minimum and maximum values of r and z coordinates of the cells in the layer.
 
@@ -46,40 +52,53 @@ class GeoLayer:
         Checks whether the layer is approximately continuous in z around z=0.
     """
 
-    def __init__(self, df: pd.DataFrame, layer_idx: int, thinned_layer_width: float = 10):
+    @traced()
+    def __init__(
+        self,
+        df: Union[pd.DataFrame, PartitionedGeometry],
+        layer_idx: int,
+        thinned_layer_width: float = 10,
+        config: Optional[GeometryConfig] = None,
+    ):
         """
         Initializes a GeoLayer object.
 
         Parameters:
         -----------
-        df : pd.DataFrame
-            A pandas dataframe containing the cell information for the layer.
+        df : Union[pd.DataFrame, PartitionedGeometry]
+            A pandas dataframe containing the cell information for the layer, or a partitioned geometry, e.g. a
+            GeometryIndex or a BinaryGeometry, of which only the cells of the layer are accessed.
         layer_idx : int
             The index of the layer.
         thinned_layer_width : float, optional
             The width of the thinned cylinder, by default 10.
+        config : GeometryConfig, optional
+            The coordinate branch configuration, by default the one installed with use_config or else the module
+            level coordinate branches.
         """
-        self.df = df[df["layer"] == layer_idx]
+        self.config = get_config(config)
+        self.df = df.layer_df(layer_idx) if isinstance(df, PartitionedGeometry) else df[df["layer"] == layer_idx]
         self.idx = str(layer_idx)
-        self.coordinate_system = self._get_coordinate_system()
+        self.thinned_layer_width = thinned_layer_width
+        self.coordinate_system = get_layer_coordinate_system(self.df, self.config)
         self.is_barrel = self.df.isBarrel.all()
-        self.cells = self._get_cells(self.df)
-        self.extent = self._min_max_rz_extent(self.cells)
+        self._cells: Optional[Union[list[XYZCell], list[EtaPhiRCell], list[EtaPhiZCell], list[RPhiZCell]]] = None
+        # The continuity in z for each distance threshold evaluated so far, as it is needed again for plotting
+        self._is_continuous_in_z: dict[float, bool] = {}
+        self.extent = rz_extent(self.df, self.coordinate_system)
         self.thinned_cylinder = self.get_thinned_cylinder(thinned_layer_width)
 
-    def _get_coordinate_system(self) -> str:
+    @property
+    def cells(self) -> Union[list[XYZCell], list[EtaPhiRCell], list[EtaPhiZCell], list[RPhiZCell]]:
         """
-        Infers the coordinate system used to define the cells in the layer.
-
-        Returns:
-        --------
-        str:
-            The coordinate system used to define the cells in the layer.
+        The cell objects of the layer.
+        They are only created on first access, as the extent and envelopes of the layer are computed from the cell
+        columns directly.
         """
-        for coordinate_system, branch_name in config.coordinate_branch_names.items():
-            if self.df[branch_name].all() == 1:
-                return coordinate_system
-        raise Exception(f"Could not infer set coordinate system found for layer {self.idx}.")
+        if self._cells is None:
+            self._cells = self._get_cells(self.df)
+
+        return self._cells
 
     def _get_cells(
         self, df: pd.DataFrame
@@ -185,9 +204,7 @@ class GeoLayer:
         """
         half_space_df = self.df[self.df.z > 0]
 
-        cells = self._get_cells(half_space_df)
-
-        cell_envelope = Cylinder(**self._min_max_rz_extent(cells), is_barrel=self.is_barrel)
+        cell_envelope = Cylinder(**rz_extent(half_space_df, self.coordinate_system), is_barrel=self.is_barrel)
 
         return cell_envelope
 
@@ -206,35 +223,7 @@ class GeoLayer:
         dict:
             A dictionary containing the containing the cylinder definition of the thinned down versions of the layers
         """
-        cyl = self.get_cell_envelope()
-
-        if self.is_barrel:
-            # For barrel layers we thin down the radius of the cylinder with dr = layer_width and r = rmin + (rmax - rmin)/2
-            center_r = cyl.rmin + (cyl.rmax - cyl.rmin) * 0.5
-            cyl.rmin = center_r - 0.5 * layer_width
-            cyl.rmax = center_r + 0.5 * layer_width
-
-            # Make sure that the cylinder does not go into maximum cell extensions
-            max_cell_r_width = abs(cyl.rmax - cyl.rmin)
-            if layer_width > max_cell_r_width:
-                raise ValueError(
-                    f"Layer width {layer_width} is larger than maximum cell extension {max_cell_r_width}. Please choose a smaller layer width."
-                )
-
-        else:
-            # For endcap layers we thin down the z thickness of the cylinder with dz = layer_width and z = zmin + (zmax - zmin)/2
-            center_z = cyl.zmin + (cyl.zmax - cyl.zmin) * 0.5
-            cyl.zmin = center_z - 0.5 * layer_width
-            cyl.zmax = center_z + 0.5 * layer_width
-
-            # Make sure that the cylinder does not go into maximum cell extensions
-            max_cell_z_width = abs(cyl.zmax - cyl.zmin)
-            if layer_width > max_cell_z_width:
-                raise ValueError(
-                    f"Layer width {layer_width} is larger than maximum cell extension {max_cell_z_width}. Please choose a smaller layer width."
-                )
-
-        return cyl
+        return thin_cylinder(self.get_cell_envelope(), layer_width)
 
     def plot_cell_vertices_rz(
         self,
@@ -243,9 +232,17 @@ class GeoLayer:
         marker_size: float = 0.01,
         x_label: str = "z",
         y_label: str = "r",
+        density: bool = False,
+        bins: Union[int, tuple[int, int]] = 500,
+        color_map: str = "Blues",
+        show_envelope: bool = False,
+        show_thinned: bool = False,
+        processed_cylinders: Optional[dict[str, Cylinder]] = None,
     ) -> plt.Axes:
         """
         Plots the r-z coordinates of the cell vertices (edges) in the layer.
+        In density mode, the vertices are binned into a 2D raster which is drawn as a single image,
+        such that the rendering time does not depend on the number of cells in the layer.
 
         Parameters:
         -----------
@@ -259,6 +256,18 @@ class GeoLayer:
             The label for the x-axis, by default 'z'.
         y_label : str, optional
             The label for the y-axis, by default 'r'.
+        density : bool, optional
+            Whether to draw the binned vertex density instead of the individual vertices, by default False.
+        bins : Union[int, tuple[int, int]], optional
+            The number of bins in (z, r) of the density raster, by default 500.
+        color_map : str, optional
+            The colormap of the density raster, by default 'Blues'.
+        show_envelope : bool, optional
+            Whether to overlay the cell envelope of the layer, by default False.
+        show_thinned : bool, optional
+            Whether to overlay the thinned cylinder of the layer, by default False.
+        processed_cylinders : dict[str, Cylinder], optional
+            The processed cylinders of a simplified detector. The cylinders belonging to the layer are overlaid, by default None.
 
         Returns:
         --------
@@ -269,28 +278,68 @@ class GeoLayer:
             fig = plt.figure()
             ax = fig.add_subplot()
 
-        r_values, z_values = self._cell_vertices_rz(self.cells)
-
-        ax.scatter(z_values, r_values, s=marker_size, color=color)
-
+        if density:
+            r_vertices, z_vertices = cell_vertices_rz(self.df, self.coordinate_system)
+            counts, z_edges, r_edges = np.histogram2d(z_vertices.ravel(), r_vertices.ravel(), bins=bins)
+            ax.imshow(
+                np.ma.masked_equal(counts.T, 0),
+                origin="lower",
+                extent=(z_edges[0], z_edges[-1], r_edges[0], r_edges[-1]),
+                aspect="auto",
+                interpolation="nearest",
+                cmap=plt.get_cmap(color_map),
+                norm=mcolors.LogNorm(),
+            )
+        else:
+            r_values, z_values = self._cell_vertices_rz(self.cells)
+            ax.scatter(z_values, r_values, s=marker_size, color=color)
+
+        if show_envelope:
+            for cyl in self._symmetrize_cylinder(self.get_cell_envelope()):
+                plot_cylinder_rz(cyl, ax=ax, color="black", linestyle="--")
+        if show_thinned:
+            for cyl in self._symmetrize_cylinder(self.thinned_cylinder):
+                plot_cylinder_rz(cyl, ax=ax, color="tab:red")
+        if processed_cylinders is not None:
+            for cyl_name, cyl in processed_cylinders.items():
+                # Processed cylinders are named after the layer index, e.g. 14, 14_POS or 14_NEG
+                if cyl_name.split("_")[0] == self.idx:
+                    plot_cylinder_rz(cyl, ax=ax, color="tab:green")
+
+        ax.autoscale_view()
         ax.set_xlabel(x_label)
         ax.set_ylabel(y_label)
 
         return ax
 
+    def _symmetrize_cylinder(self, cyl: Cylinder) -> list[Cylinder]:
+        """
+        Returns the cylinders covering both z halfspaces for a cylinder defined in the positive z halfspace.
+
+        Parameters:
+        -----------
+        cyl : Cylinder
+            The cylinder in the positive z halfspace.
+
+        Returns:
+        --------
+        list[Cylinder]:
+            A single cylinder if the layer is continuous in z, otherwise one cylinder in each z halfspace.
+        """
+        if self.is_continuous_in_z():
+            return [Cylinder(cyl.rmin, cyl.rmax, -cyl.zmax, cyl.zmax, cyl.is_barrel)]
+
+        return [
+            Cylinder(cyl.rmin, cyl.rmax, cyl.zmin, cyl.zmax, cyl.is_barrel),
+            Cylinder(cyl.rmin, cyl.rmax, -cyl.zmax, -cyl.zmin, cyl.is_barrel),
+        ]
+
     def plot_symmetrized_cylinder(
         self, cyl: Cylinder, ax: Axes3D = None, color: Union[tuple[float, float, float], str] = "black"
     ) -> Axes3D:
-        # If layer is continuous in z, plot as single cylinder
-        if self.is_continuous_in_z():
-            cyl_continuous = Cylinder(cyl.rmin, cyl.rmax, -cyl.zmax, cyl.zmax, cyl.is_barrel)
-            plot_cylinder(cyl_continuous, ax=ax, color=color)
-        # Otherwise, plot as two cylinders, one in each z halfspace
-        else:
-            cyl_pos_z_halfspace = Cylinder(cyl.rmin, cyl.rmax, cyl.zmin, cyl.zmax, cyl.is_barrel)
-            cyl_neg_z_halfspace = Cylinder(cyl.rmin, cyl.rmax, -cyl.zmax, -cyl.zmin, cyl.is_barrel)
-            plot_cylinder(cyl_pos_z_halfspace, ax=ax, color=color)
-            plot_cylinder(cyl_neg_z_halfspace, ax=ax, color=color)
+        # If layer is continuous in z, plot as single cylinder, otherwise as two cylinders, one in each z halfspace
+        for symmetrized_cyl in self._symmetrize_cylinder(cyl):
+            plot_cylinder(symmetrized_cyl, ax=ax, color=color)
 
     def plot_thinned_cylinder(
         self, ax: Axes3D = None, color: Union[tuple[float, float, float], str] = "red", thinned_layer_width: float = 10
@@ -399,33 +448,152 @@ class GeoLayer:
         bool:
             True if the layer is continuous in z around z=0, False otherwise.
         """
+        if distance_threshold in self._is_continuous_in_z:
+            return self._is_continuous_in_z[distance_threshold]
+
+        # Only the cell columns are selected, such that the cells can be taken as rows with a common type
+        pos_columns, size_columns = COORDINATE_COLUMNS[self.coordinate_system]
+        cell_df = self.df[list(dict.fromkeys([*pos_columns, *size_columns, "z"]))]
 
         # Get (one of) the cells in the z>0 halfspace closest to z=0
-        half_space_df = self.df[self.df.z > 0]
+        half_space_df = cell_df[cell_df.z > 0]
         min_z = half_space_df.z.min()
         pos_cell = half_space_df[half_space_df.z == min_z].iloc[0]
         # Get (one of) the cells in the z<0 halfspace closest to z=0
-        half_space_df = self.df[self.df.z < 0]
+        half_space_df = cell_df[cell_df.z < 0]
         max_z = half_space_df.z.max()
         neg_cell = half_space_df[half_space_df.z == max_z].iloc[0]
 
-        if self.coordinate_system in ["XYZ", "EtaPhiZ", "RPhiZ"]:
-            dz_pos = pos_cell.dz
-            dz_neg = neg_cell.dz
-        elif self.coordinate_system == "EtaPhiR":
-            # Estimate the dz with dz≈-Rsin(θ)dη (valid for small dη)
-            theta_pos = 2 * np.arctan(np.exp(-pos_cell.eta))
-            dz_pos = 2 * pos_cell.r * np.sin(theta_pos) * pos_cell.deta
-            theta_neg = 2 * np.arctan(np.exp(-neg_cell.eta))
-            dz_neg = 2 * neg_cell.r * np.sin(theta_neg) * neg_cell.deta
+        is_continuous = are_cells_continuous_in_z(pos_cell, neg_cell, self.coordinate_system, distance_threshold)
+        self._is_continuous_in_z[distance_threshold] = is_continuous
+
+        return is_continuous
+
+
+def are_cells_continuous_in_z(
+    pos_cell: pd.Series, neg_cell: pd.Series, coordinate_system: str, distance_threshold: float = 50
+) -> bool:
+    """
+    Checks whether the cells closest to z=0 in the z>0 and z<0 halfspaces of a layer are continuous in z, i.e. whether
+    their distance (edge to edge) is below a threshold, see GeoLayer.is_continuous_in_z and cells_continuous_in_z.
+
+    Parameters:
+    -----------
+    pos_cell : pd.Series
+        The position and size columns and z of the cell closest to z=0 in the z>0 halfspace.
+    neg_cell : pd.Series
+        The position and size columns and z of the cell closest to z=0 in the z<0 halfspace.
+    coordinate_system : str
+        The coordinate system in which the cells are defined.
+    distance_threshold : float, optional
+        The maximum distance between the cells for the layer to be considered continuous, by default 50.
+
+    Returns:
+    --------
+    bool:
+        True if the cells are continuous in z, False otherwise.
+    """
+    is_continuous = cells_continuous_in_z(
+        pos_cell.to_frame().T, neg_cell.to_frame().T, [coordinate_system], np.array([distance_threshold])
+    )
 
-        min_z_pos_cell = pos_cell.z - dz_pos / 2
-        max_z_neg_cell = neg_cell.z + dz_neg / 2
+    return bool(is_continuous[0, 0])
 
-        if min_z_pos_cell < 0 or max_z_neg_cell > 0:
-            # Cells in positive (negative) halfspace protrude into negative (positive) halfspace
-            return True
 
-        is_continuous = abs(min_z_pos_cell - max_z_neg_cell) < distance_threshold
+def cells_continuous_in_z(
+    pos_cells: pd.DataFrame, neg_cells: pd.DataFrame, coordinate_systems: list[str], distance_thresholds: np.ndarray
+) -> np.ndarray:
+    """
+    Checks for several layers at once whether the cells closest to z=0 in their z>0 and z<0 halfspaces are continuous
+    in z, for each of several thresholds.
 
-        return bool(is_continuous)
+    Parameters:
+    -----------
+    pos_cells : pd.DataFrame
+        The position and size columns and z of the cell closest to z=0 in the z>0 halfspace of each layer.
+    neg_cells : pd.DataFrame
+        The position and size columns and z of the cell closest to z=0 in the z<0 halfspace of each layer.
+    coordinate_systems : list[str]
+        The coordinate system in which the cells of each layer are defined.
+    distance_thresholds : np.ndarray
+        The maximum distances between the cells for a layer to be considered continuous.
+
+    Returns:
+    --------
+    np.ndarray:
+        Whether the cells of each layer are continuous in z for each threshold, of shape (n_layers, n_thresholds).
+    """
+    layer_coordinate_systems = np.asarray(coordinate_systems)
+    min_z_pos_cell = pos_cells["z"].to_numpy(dtype=np.float64) - _get_cell_dz(pos_cells, layer_coordinate_systems) / 2
+    max_z_neg_cell = neg_cells["z"].to_numpy(dtype=np.float64) + _get_cell_dz(neg_cells, layer_coordinate_systems) / 2
+
+    # Cells in positive (negative) halfspace that protrude into negative (positive) halfspace are continuous
+    is_protruding = (min_z_pos_cell < 0) | (max_z_neg_cell > 0)
+    distance = np.abs(min_z_pos_cell - max_z_neg_cell)
+
+    is_continuous: np.ndarray = is_protruding[:, np.newaxis] | (distance[:, np.newaxis] < distance_thresholds)
+
+    return is_continuous
+
+
+def _get_cell_dz(cells: pd.DataFrame, coordinate_systems: np.ndarray) -> np.ndarray:
+    """Returns the z size of each cell, given the coordinate system of each cell."""
+    dz = np.empty(len(cells), dtype=np.float64)
+    is_eta_phi_r = coordinate_systems == "EtaPhiR"
+    if is_eta_phi_r.any():
+        eta, r, deta = (cells[column].to_numpy(dtype=np.float64)[is_eta_phi_r] for column in ["eta", "r", "deta"])
+        # Estimate the dz with dz≈-Rsin(θ)dη (valid for small dη)
+        theta = 2 * np.arctan(np.exp(-eta))
+        dz[is_eta_phi_r] = 2 * r * np.sin(theta) * deta
+    if not is_eta_phi_r.all():
+        dz[~is_eta_phi_r] = cells["dz"].to_numpy(dtype=np.float64)[~is_eta_phi_r]
+
+    return dz
+
+
+def thin_cylinder(envelope: Cylinder, layer_width: float = 10) -> Cylinder:
+    """
+    Returns the thinned down version of a cell envelope, leaving the envelope unchanged.
+    For barrel layers the radius of the cylinder is thinned down, for endcap layers the z thickness of the cylinder is thinned down.
+
+    Parameters:
+    -----------
+    envelope : Cylinder
+        The cell envelope of the layer.
+    layer_width : float, optional
+        The width of the thinned down version of the cells in the layer, by default 10.
+
+    Returns:
+    --------
+    Cylinder:
+        The thinned cylinder.
+    """
+    cyl = envelope.copy()
+
+    if cyl.is_barrel:
+        # For barrel layers we thin down the radius of the cylinder with dr = layer_width and r = rmin + (rmax - rmin)/2
+        center_r = cyl.rmin + (cyl.rmax - cyl.rmin) * 0.5
+        cyl.rmin = center_r - 0.5 * layer_width
+        cyl.rmax = center_r + 0.5 * layer_width
+
+        # Make sure that the cylinder does not go into maximum cell extensions
+        max_cell_r_width = abs(cyl.rmax - cyl.rmin)
+        if layer_width > max_cell_r_width:
+            raise ValueError(
+                f"Layer width {layer_width} is larger than maximum cell extension {max_cell_r_width}. Please choose a smaller layer width."
+            )
+
+    else:
+        # For endcap layers we thin down the z thickness of the cylinder with dz = layer_width and z = zmin + (zmax - zmin)/2
+        center_z = cyl.zmin + (cyl.zmax - cyl.zmin) * 0.5
+        cyl.zmin = center_z - 0.5 * layer_width
+        cyl.zmax = center_z + 0.5 * layer_width
+
+        # Make sure that the cylinder does not go into maximum cell extensions
+        max_cell_z_width = abs(cyl.zmax - cyl.zmin)
+        if layer_width > max_cell_z_width:
+            raise ValueError(
+                f"Layer width {layer_width} is larger than maximum cell extension {max_cell_z_width}. Please choose a smaller layer width."
+            )
+
+    return cyl
@@ -0,0 +1,153 @@
+from typing import Any, Optional
+
+import numpy as np
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+from pygeosimplify.simplify.cylinder import Cylinder
+from pygeosimplify.simplify.helpers import find_rz_overlaps
+from pygeosimplify.utils.tracing import traced
+
+# Methods to resolve the overlaps between thinned cylinders, see SimplifiedDetector
+OVERLAP_SOLVERS = ("greedy", "milp")
+
+# The options to resolve an overlap between a barrel and an endcap cylinder, as in the greedy resolution
+_OPTIONS = ("Option A", "Option B", "Option C")
+
+
+@traced()
+def solve_thinned_overlaps(
+    cyl_dict: dict[str, Cylinder], min_dist: float
+) -> Optional[tuple[dict[str, Cylinder], list[dict[str, Any]]]]:
+    """
+    Resolves all overlaps between barrel and endcap cylinders at once, with a mixed-integer linear program that
+    minimizes the total movement of the cylinder boundaries.
+    Each overlap is resolved with one of the options of the greedy resolution: shortening the zmax of the barrel to
+    the zmin of the endcap (A), decreasing the rmax of the endcap to the rmin of the barrel (B) or increasing the rmin
+    of the endcap to the rmax of the barrel (C), each keeping a distance of min_dist. Unlike the greedy resolution, a
+    boundary moved for one overlap can be moved further for another, so the program never dead-ends on locked
+    boundaries, and the overlaps are not checked again after each resolution.
+
+    Args:
+        cyl_dict (dict[str, Cylinder]): The thinned cylinders. They are left unchanged.
+        min_dist (float): The minimum distance between the cylinders of a resolved overlap.
+
+    Returns:
+        Optional[tuple[dict[str, Cylinder], list[dict[str, Any]]]]: Copies of the cylinders with all overlaps resolved,
+            the moved boundaries locked, and the chosen option of each overlap, or None if the overlaps could not be
+            resolved this way, e.g. as two barrel or two endcap cylinders overlap or the program is infeasible.
+    """
+    pairs = []
+    for cyl_a_name, cyl_b_name in find_rz_overlaps(cyl_dict):
+        if cyl_dict[cyl_a_name].is_barrel == cyl_dict[cyl_b_name].is_barrel:
+            return None
+        pairs.append((cyl_a_name, cyl_b_name) if cyl_dict[cyl_a_name].is_barrel else (cyl_b_name, cyl_a_name))
+
+    resolved = {name: cyl.copy() for name, cyl in cyl_dict.items()}
+    if not pairs:
+        return resolved, []
+
+    choices = _solve_program(cyl_dict, pairs, min_dist)
+    if choices is None:
+        return None
+
+    # The boundaries are set to the exact targets of the chosen options, as the solution is only accurate within the
+    # tolerances of the solver
+    resolution_log = []
+    for (barrel_name, endcap_name), option in zip(pairs, choices):
+        barrel, endcap = resolved[barrel_name], resolved[endcap_name]
+        original_barrel, original_endcap = cyl_dict[barrel_name], cyl_dict[endcap_name]
+        if option == 0:
+            value = original_endcap.zmin - min_dist
+            barrel.zmax = min(barrel.zmax, value)
+            barrel.lock("zmax")
+            diff = abs(value - original_barrel.zmax)
+        elif option == 1:
+            value = original_barrel.rmin - min_dist
+            endcap.rmax = min(endcap.rmax, value)
+            endcap.lock("rmax")
+            diff = abs(value - original_endcap.rmax)
+        else:
+            value = original_barrel.rmax + min_dist
+            endcap.rmin = max(endcap.rmin, value)
+            endcap.lock("rmin")
+            diff = abs(original_endcap.rmin - value)
+        resolution_log.append({"barrel": barrel_name, "endcap": endcap_name, "option": _OPTIONS[option], "diff": diff})
+
+    is_valid = all(cyl.rmin <= cyl.rmax and cyl.zmin <= cyl.zmax for cyl in resolved.values())
+    if not is_valid or find_rz_overlaps(resolved):
+        return None
+
+    return resolved, resolution_log
+
+
+def _solve_program(cyl_dict: dict[str, Cylinder], pairs: list[tuple[str, str]], min_dist: float) -> Optional[list[int]]:
+    """
+    Solves the program for the overlapping pairs of barrel and endcap cylinders and returns the index of the chosen
+    option of each pair, or None if the program could not be solved.
+    The continuous variables are the zmax of each barrel and the rmin and rmax of each endcap, bounded by their
+    current values, such that cylinders only shrink and no new overlaps arise. Each pair has a binary variable per
+    option, exactly one of which is set, and the constraint of an option only applies if it is set (big-M).
+    """
+    barrels = list(dict.fromkeys(barrel_name for barrel_name, _ in pairs))
+    endcaps = list(dict.fromkeys(endcap_name for _, endcap_name in pairs))
+    zmax_vars = {name: idx for idx, name in enumerate(barrels)}
+    rmin_vars = {name: len(barrels) + 2 * idx for idx, name in enumerate(endcaps)}
+    rmax_vars = {name: len(barrels) + 2 * idx + 1 for idx, name in enumerate(endcaps)}
+    n_continuous = len(barrels) + 2 * len(endcaps)
+    n_vars = n_continuous + len(_OPTIONS) * len(pairs)
+
+    lower, upper = np.zeros(n_vars), np.ones(n_vars)
+    # Minimizing the total movement is minimizing the sum of the endcap rmin and the negative barrel zmax and endcap rmax
+    cost = np.zeros(n_vars)
+    for name in barrels:
+        lower[zmax_vars[name]], upper[zmax_vars[name]] = cyl_dict[name].zmin, cyl_dict[name].zmax
+        cost[zmax_vars[name]] = -1
+    for name in endcaps:
+        for var in (rmin_vars[name], rmax_vars[name]):
+            lower[var], upper[var] = cyl_dict[name].rmin, cyl_dict[name].rmax
+        cost[rmin_vars[name]], cost[rmax_vars[name]] = 1, -1
+
+    # Larger than any difference between the boundaries, such that a constraint is void if its option is not chosen
+    max_bound = max(max(abs(cyl.rmin), abs(cyl.rmax), abs(cyl.zmin), abs(cyl.zmax)) for cyl in cyl_dict.values())
+    big_m = 2 * (max_bound + abs(min_dist)) + 1
+
+    rows, row_lower, row_upper = [], [], []
+
+    def add_row(coefficients: dict[int, float], row_lb: float, row_ub: float) -> None:
+        row = np.zeros(n_vars)
+        for var, coefficient in coefficients.items():
+            row[var] = coefficient
+        rows.append(row)
+        row_lower.append(row_lb)
+        row_upper.append(row_ub)
+
+    for name in endcaps:
+        add_row({rmin_vars[name]: 1, rmax_vars[name]: -1}, -np.inf, 0)
+    for pair_idx, (barrel_name, endcap_name) in enumerate(pairs):
+        barrel, endcap = cyl_dict[barrel_name], cyl_dict[endcap_name]
+        option_a, option_b, option_c = (n_continuous + len(_OPTIONS) * pair_idx + option for option in range(3))
+        add_row({option_a: 1, option_b: 1, option_c: 1}, 1, 1)
+        # A: zmax of the barrel <= zmin of the endcap - min_dist
+        add_row({zmax_vars[barrel_name]: 1, option_a: big_m}, -np.inf, endcap.zmin - min_dist + big_m)
+        # B: rmax of the endcap <= rmin of the barrel - min_dist
+        add_row({rmax_vars[endcap_name]: 1, option_b: big_m}, -np.inf, barrel.rmin - min_dist + big_m)
+        # C: rmin of the endcap >= rmax of the barrel + min_dist
+        add_row({rmin_vars[endcap_name]: -1, option_c: big_m}, -np.inf, -(barrel.rmax + min_dist) + big_m)
+
+    integrality = np.zeros(n_vars)
+    integrality[n_continuous:] = 1
+    try:
+        result = milp(
+            cost,
+            constraints=LinearConstraint(np.array(rows), row_lower, row_upper),
+            integrality=integrality,
+            bounds=Bounds(lower, upper),
+        )
+    except ValueError:
+        return None
+    if not result.success:
+        return None
+
+    option_values = result.x[n_continuous:].reshape(len(pairs), len(_OPTIONS))
+
+    return [int(option) for option in np.argmax(option_values, axis=1)]
@@ -1,121 +1,310 @@
-from typing import Union
+from dataclasses import dataclass, field
+from typing import Callable, Optional, Union
 
 import pandas as pd
 
 from pygeosimplify.simplify.cylinder import Cylinder
 from pygeosimplify.simplify.helpers import r_overlap_filter, z_overlap_filter
-
-
-def post_process_cylinders(  # noqa: C901
-    cyl_dict: dict[str, Cylinder], cell_envelope: dict[str, Cylinder], min_dist: float = 1, envelope_width: float = 100
+from pygeosimplify.utils.instrumentation import count
+from pygeosimplify.utils.tracing import traced
+
+# Bounds of a cylinder as (rmin, rmax, zmin, zmax)
+Bounds = tuple[float, float, float, float]
+_BOUND_COLUMNS = ("rmin", "rmax", "zmin", "zmax")
+
+
+@dataclass
+class PostProcessState:
+    """
+    Intermediate results of a post-processing run. A later run given the state only grows the cylinders whose
+    neighbourhood changed, and reuses the results of this run for all others.
+
+    Attributes:
+        min_dist (float, optional): The minimum distance between cylinders of the run, None before the first run.
+        inputs (dict[str, tuple]): The bounds of the input cylinder, whether it is a barrel and the bounds of the cell
+            envelope of each cylinder.
+        stages (list[dict[str, Bounds]]): The bounds of the cylinders before the first and after each growth stage.
+        extremes (dict[tuple[int, str], tuple[float, ...]]): The extremes of all cylinders at the time each cylinder
+            was grown, by stage and cylinder.
+    """
+
+    min_dist: Optional[float] = None
+    inputs: dict[str, tuple[Bounds, bool, Bounds]] = field(default_factory=dict)
+    stages: list[dict[str, Bounds]] = field(default_factory=list)
+    extremes: dict[tuple[int, str], tuple[float, ...]] = field(default_factory=dict)
+
+
+def _get_bounds(cyl: Union[Cylinder, pd.Series]) -> Bounds:
+    return (cyl.rmin, cyl.rmax, cyl.zmin, cyl.zmax)
+
+
+def _fill_endcap_r(
+    df: pd.DataFrame,
+    endcap_layer: pd.Series,
+    cyl: Cylinder,
+    envelope: Cylinder,
+    min_dist: float,
+    extremes: tuple[float, ...],
+) -> dict[str, float]:
+    """Fill gaps in r for an endcap layer"""
+    limiting_layer_dict = {
+        "out": get_cyl_limiting_r_extension(df, endcap_layer, side="OUT"),
+        "in": get_cyl_limiting_r_extension(df, endcap_layer, side="IN"),
+    }
+    updates = {}
+
+    if limiting_layer_dict["out"] is None:
+        # No layer limits the extension in r, so we extend it to the maximum r of the layers
+        updates["rmax"] = extremes[0]
+    else:
+        # Extend the radius of the endcap layer to the radius of the limiting layer
+        updates["rmax"] = limiting_layer_dict["out"].rmin - min_dist
+
+    if limiting_layer_dict["in"] is None:
+        # No layer limits the extension in r, so we extend it to the minimum r of the layers
+        # This should usually correspond to the beam pipe, in principle could set this to 0, but this should be safer
+        updates["rmin"] = extremes[1]
+
+    return updates
+
+
+def _fill_barrel_z(
+    df: pd.DataFrame,
+    barrel_layer: pd.Series,
+    cyl: Cylinder,
+    envelope: Cylinder,
+    min_dist: float,
+    extremes: tuple[float, ...],
+) -> dict[str, float]:
+    """Fill gaps in z for a barrel layer"""
+    limiting_layer_dict = {
+        "right": get_cyl_limiting_z_extension(df, barrel_layer, side="RIGHT"),
+        "left": get_cyl_limiting_z_extension(df, barrel_layer, side="LEFT"),
+    }
+    updates = {}
+
+    if limiting_layer_dict["right"] is None:
+        # No layer limits the extension in +z, so we extend it to the origin or the maximum z of the layers
+        if "POS" in barrel_layer.cyl_name:
+            updates["zmax"] = extremes[0]
+        if "NEG" in barrel_layer.cyl_name:
+            updates["zmax"] = 0
+    else:
+        # Extend the z of the barrel layer to the z of the limiting layer
+        updates["zmax"] = limiting_layer_dict["right"].zmin - min_dist
+
+    if limiting_layer_dict["left"] is None:
+        # No layer limits the extension in -z, so we extend it to the origin or the minimum z of the layers
+        if "POS" in barrel_layer.cyl_name:
+            updates["zmin"] = 0
+        if "NEG" in barrel_layer.cyl_name:
+            updates["zmin"] = extremes[1]
+    else:
+        # Extend the z of the barrel layer to the z of the limiting layer
+        updates["zmin"] = limiting_layer_dict["left"].zmax + min_dist
+
+    return updates
+
+
+def _grow_barrel_r(
+    df: pd.DataFrame,
+    barrel_layer: pd.Series,
+    cyl: Cylinder,
+    envelope: Cylinder,
+    min_dist: float,
+    extremes: tuple[float, ...],
+) -> dict[str, float]:
+    """Grow a barrel layer in r to the r of the limiting layers"""
+    limiting_layer_dict = {
+        "out": get_cyl_limiting_r_extension(df, barrel_layer, side="OUT"),
+        "in": get_cyl_limiting_r_extension(df, barrel_layer, side="IN"),
+    }
+    updates = {}
+
+    if limiting_layer_dict["out"] is None:
+        updates["rmax"] = cyl.rmax
+    else:
+        # Grow rmax to the radius of the limiting layer (but not larger than the radius of the cell envelope)
+        r_lim = limiting_layer_dict["out"].rmin
+        updates["rmax"] = envelope.rmax if r_lim > envelope.rmax else r_lim - min_dist
+
+    if limiting_layer_dict["in"] is None:
+        updates["rmin"] = cyl.rmin
+    else:
+        # Reduce rmin to the radius of the limiting layer (but not smaller than the radius of the cell envelope)
+        r_lim = limiting_layer_dict["in"].rmax
+        updates["rmin"] = envelope.rmin if r_lim < envelope.rmin else r_lim + min_dist
+
+    return updates
+
+
+def _grow_endcap_z(
+    df: pd.DataFrame,
+    endcap_layer: pd.Series,
+    cyl: Cylinder,
+    envelope: Cylinder,
+    min_dist: float,
+    extremes: tuple[float, ...],
+) -> dict[str, float]:
+    """Grow an endcap layer in z to the z of the limiting layers"""
+    limiting_layer_dict = {
+        "right": get_cyl_limiting_z_extension(df, endcap_layer, side="RIGHT"),
+        "left": get_cyl_limiting_z_extension(df, endcap_layer, side="LEFT"),
+    }
+    updates = {}
+
+    if limiting_layer_dict["right"] is None:
+        updates["zmax"] = cyl.zmax
+    else:
+        # Grow zmax to the z of the limiting layer (but not larger than the cell envelope z)
+        z_lim = limiting_layer_dict["right"].zmin
+        updates["zmax"] = envelope.zmax if z_lim > envelope.zmax else z_lim - min_dist
+
+    if limiting_layer_dict["left"] is None:
+        updates["zmin"] = cyl.zmin
+    else:
+        # Reduce zmin to the z of the limiting layer  (but not smaller than the cell envelope z)
+        z_lim = limiting_layer_dict["left"].zmax
+        updates["zmin"] = envelope.zmin if z_lim < envelope.zmin else z_lim + min_dist
+
+    return updates
+
+
+GrowthFunction = Callable[[pd.DataFrame, pd.Series, Cylinder, Cylinder, float, tuple[float, ...]], dict[str, float]]
+
+# The growth stages in order of application: whether barrel or endcap layers are grown, the coordinate in which
+# candidate limiting layers must overlap, the growth function and the extremes of all cylinders the layers may extend to
+_GROWTH_STAGES: list[tuple[bool, str, GrowthFunction, Callable[[pd.DataFrame], tuple[float, ...]]]] = [
+    (False, "z", _fill_endcap_r, lambda df: (df.rmax.max(), df.rmin.min())),
+    (True, "r", _fill_barrel_z, lambda df: (df.zmax.max(), df.zmin.min())),
+    (True, "z", _grow_barrel_r, lambda df: ()),
+    (False, "r", _grow_endcap_z, lambda df: ()),
+]
+
+
+def _is_neighbourhood_changed(
+    layer: pd.Series, coord: str, changed_names: set[str], bounds_list: list[dict[str, Bounds]]
+) -> bool:
+    """
+    Decides whether any of the changed cylinders can limit the growth of a layer, i.e. whether one of them lies in the
+    same z halfspace and, with any of the given bounds, overlaps or touches the layer in the given coordinate.
+    """
+    z_half_space = "POS" if "POS" in layer.cyl_name else "NEG"
+    coord_idx = 0 if coord == "r" else 2
+    layer_bounds = _get_bounds(layer)
+
+    for name in changed_names:
+        if name == layer.cyl_name or z_half_space not in name:
+            continue
+        for bounds in bounds_list:
+            if name not in bounds:
+                continue
+            cyl_min, cyl_max = bounds[name][coord_idx], bounds[name][coord_idx + 1]
+            if min(cyl_max, layer_bounds[coord_idx + 1]) - max(cyl_min, layer_bounds[coord_idx]) >= 0:
+                return True
+
+    return False
+
+
+@traced()
+def post_process_cylinders(
+    cyl_dict: dict[str, Cylinder],
+    cell_envelope: dict[str, Cylinder],
+    min_dist: float = 1,
+    envelope_width: float = 100,
+    state: Optional[PostProcessState] = None,
 ) -> tuple[dict[str, Cylinder], dict[str, Cylinder]]:
+    """
+    Grows the thinned cylinders towards their neighbours and adds an envelope around all cylinders.
+
+    Args:
+        cyl_dict (dict[str, Cylinder]): The overlap-free thinned cylinders of both z halfspaces.
+        cell_envelope (dict[str, Cylinder]): The cell envelopes of the cylinders, which limit their growth.
+        min_dist (float, optional): The minimum distance between cylinders. Defaults to 1.
+        envelope_width (float, optional): The width of the detector envelope. Defaults to 100.
+        state (PostProcessState, optional): The intermediate results of a previous run. If provided, only the
+            cylinders whose input or neighbourhood changed since that run are grown again, the results of the previous
+            run are reused for all others. The state is updated in place with the results of this run.
+
+    Returns:
+        tuple[dict[str, Cylinder], dict[str, Cylinder]]: The processed cylinders and the detector envelope.
+    """
     # Convert cylinder dictionary to a dataframe
     df = pd.DataFrame.from_dict(cyl_dict, orient="index")
     # Add layer name as column
     df = df.rename_axis("cyl_name").reset_index()
-    # Get the endcap and barrel layers
-    endcap_layers = df[df.is_barrel.eq(False)]
-    barrel_layers = df[df.is_barrel.eq(True)]
-
-    # Fill gaps in r for endcap layers
-    for idx, endcap_layer in endcap_layers.iterrows():
-        limiting_layer_dict = {
-            "out": get_cyl_limiting_r_extension(df, endcap_layer, side="OUT"),
-            "in": get_cyl_limiting_r_extension(df, endcap_layer, side="IN"),
-        }
-
-        if limiting_layer_dict["out"] is None:
-            # No layer limits the extension in r, so we extend it to the maximum r of the layers
-            df.at[idx, "rmax"] = df.rmax.max()
-        else:
-            # Extend the radius of the endcap layer to the radius of the limiting layer
-            df.at[idx, "rmax"] = limiting_layer_dict["out"].rmin - min_dist
-
-        if limiting_layer_dict["in"] is None:
-            # No layer limits the extension in r, so we extend it to the minimum r of the layers
-            # This should usually correspond to the beam pipe, in principle could set this to 0, but this should be safer
-            df.at[idx, "rmin"] = df.rmin.min()
-
-    # Fill gaps in z for barrel layers
-    for idx, barrel_layer in barrel_layers.iterrows():
-        limiting_layer_dict = {
-            "right": get_cyl_limiting_z_extension(df, barrel_layer, side="RIGHT"),
-            "left": get_cyl_limiting_z_extension(df, barrel_layer, side="LEFT"),
-        }
-
-        if limiting_layer_dict["right"] is None:
-            # No layer limits the extension in +z, so we extend it to the origin or the maximum z of the layers
-            if "POS" in barrel_layer.cyl_name:
-                df.at[idx, "zmax"] = df.zmax.max()
-            if "NEG" in barrel_layer.cyl_name:
-                df.at[idx, "zmax"] = 0
-        else:
-            # Extend the z of the barrel layer to the z of the limiting layer
-            df.at[idx, "zmax"] = limiting_layer_dict["right"].zmin - min_dist
-
-        if limiting_layer_dict["left"] is None:
-            # No layer limits the extension in -z, so we extend it to the origin or the minimum z of the layers
-            if "POS" in barrel_layer.cyl_name:
-                df.at[idx, "zmin"] = 0
-            if "NEG" in barrel_layer.cyl_name:
-                df.at[idx, "zmin"] = df.zmin.min()
-        else:
-            # Extend the z of the barrel layer to the z of the limiting layer
-            df.at[idx, "zmin"] = limiting_layer_dict["left"].zmax + min_dist
-
-    # Grow barrel layers in z to the z of the limiting endcap layer
-    for idx, barrel_layer in barrel_layers.iterrows():
-        limiting_layer_dict = {
-            "out": get_cyl_limiting_r_extension(df, barrel_layer, side="OUT"),
-            "in": get_cyl_limiting_r_extension(df, barrel_layer, side="IN"),
-        }
-
-        if limiting_layer_dict["out"] is None:
-            df.at[idx, "rmax"] = cyl_dict[barrel_layer.cyl_name].rmax
-        else:
-            # Grow rmax to the radius of the limiting layer (but not larger than the radius of the cell envelope)
-            r_lim = limiting_layer_dict["out"].rmin
-            if r_lim > cell_envelope[barrel_layer.cyl_name].rmax:
-                df.at[idx, "rmax"] = cell_envelope[barrel_layer.cyl_name].rmax
-            else:
-                df.at[idx, "rmax"] = r_lim - min_dist
-
-        if limiting_layer_dict["in"] is None:
-            df.at[idx, "rmin"] = cyl_dict[barrel_layer.cyl_name].rmin
-        else:
-            # Reduce rmin to the radius of the limiting layer (but not smaller than the radius of the cell envelope)
-            r_lim = limiting_layer_dict["in"].rmax
-            if r_lim < cell_envelope[barrel_layer.cyl_name].rmin:
-                df.at[idx, "rmin"] = cell_envelope[barrel_layer.cyl_name].rmin
-            else:
-                df.at[idx, "rmin"] = r_lim + min_dist
-
-    # Grow endcap layers to the z of the limiting layers
-    for idx, endcap_layer in endcap_layers.iterrows():
-        limiting_layer_dict = {
-            "right": get_cyl_limiting_z_extension(df, endcap_layer, side="RIGHT"),
-            "left": get_cyl_limiting_z_extension(df, endcap_layer, side="LEFT"),
-        }
-
-        if limiting_layer_dict["right"] is None:
-            df.at[idx, "zmax"] = cyl_dict[endcap_layer.cyl_name].zmax
-        else:
-            # Grow zmax to the z of the limiting layer (but not larger than the cell envelope z)
-            z_lim = limiting_layer_dict["right"].zmin
-            if z_lim > cell_envelope[endcap_layer.cyl_name].zmax:
-                df.at[idx, "zmax"] = cell_envelope[endcap_layer.cyl_name].zmax
+    # Get the endcap and barrel layers, which keep the bounds of the input cylinders
+    layers = {True: df[df.is_barrel.eq(True)], False: df[df.is_barrel.eq(False)]}
+
+    inputs = {
+        name: (_get_bounds(cyl), bool(cyl.is_barrel), _get_bounds(cell_envelope[name]))
+        for name, cyl in cyl_dict.items()
+    }
+    # Results of a previous run can only be reused if it was made with the same minimum distance and cylinder order
+    previous = state if state is not None and state.stages and state.min_dist == min_dist else None
+    if previous is not None and [name for name in previous.inputs if name in inputs] != [
+        name for name in inputs if name in previous.inputs
+    ]:
+        previous = None
+    changed = (
+        set(inputs) if previous is None else {name for name in inputs if previous.inputs.get(name) != inputs[name]}
+    )
+    removed = set() if previous is None else set(previous.inputs) - set(inputs)
+
+    bounds = {row.cyl_name: _get_bounds(row) for row in df.itertuples()}
+    stages = [dict(bounds)]
+    extremes = {}
+    n_reused = 0
+
+    for stage_idx, (is_barrel, coord, grow, get_extremes) in enumerate(_GROWTH_STAGES):
+        # Cylinders whose bounds differ from the ones of the previous run at the same point of the stage
+        dirty = set(changed)
+        if previous is not None:
+            dirty.update(
+                name for name in bounds if name not in changed and bounds[name] != previous.stages[stage_idx][name]
+            )
+
+        for idx, layer in layers[is_barrel].iterrows():
+            name = layer.cyl_name
+            extremes[stage_idx, name] = get_extremes(df)
+
+            if (
+                previous is not None
+                and name not in changed
+                and previous.extremes[stage_idx, name] == extremes[stage_idx, name]
+                and not _is_neighbourhood_changed(
+                    layer,
+                    coord,
+                    dirty | removed,
+                    [bounds, previous.stages[stage_idx], previous.stages[stage_idx + 1]],
+                )
+            ):
+                # Nothing that limits the growth of the layer changed, so it grows as in the previous run
+                previous_bounds = dict(zip(_BOUND_COLUMNS, previous.stages[stage_idx + 1][name]))
+                columns = ["rmin", "rmax"] if coord == "z" else ["zmin", "zmax"]
+                updates = {col: previous_bounds[col] for col in columns}
+                n_reused += 1
             else:
-                df.at[idx, "zmax"] = z_lim - min_dist
-
-        if limiting_layer_dict["left"] is None:
-            df.at[idx, "zmin"] = cyl_dict[endcap_layer.cyl_name].zmin
-        else:
-            # Reduce zmin to the z of the limiting layer  (but not smaller than the cell envelope z)
-            z_lim = limiting_layer_dict["left"].zmax
-            if z_lim < cell_envelope[endcap_layer.cyl_name].zmin:
-                df.at[idx, "zmin"] = cell_envelope[endcap_layer.cyl_name].zmin
+                updates = grow(df, layer, cyl_dict[name], cell_envelope[name], min_dist, extremes[stage_idx, name])
+
+            for col, value in updates.items():
+                df.at[idx, col] = value
+            bounds[name] = _get_bounds(df.loc[idx])
+
+            if previous is not None and name not in changed and bounds[name] == previous.stages[stage_idx + 1][name]:
+                dirty.discard(name)
             else:
-                df.at[idx, "zmin"] = z_lim + min_dist
+                dirty.add(name)
+
+        stages.append(dict(bounds))
+
+    count("post_process_reused_growths", n_reused)
+
+    if state is not None:
+        state.min_dist = min_dist
+        state.inputs = inputs
+        state.stages = stages
+        state.extremes = extremes
 
     # Convert back to dictionary
     cyl_dict_out = df.set_index("cyl_name").to_dict("index")
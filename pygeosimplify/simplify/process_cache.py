@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Optional
+
+from pygeosimplify.io.cache import evict_least_recently_used, write_json_atomic
+from pygeosimplify.simplify.cylinder import Cylinder
+
+# Version of the processing, which is part of the fingerprints of stored results. Increase it whenever the processing
+# changes, such that results stored by a previous version are not reused
+PROCESS_CACHE_VERSION = 1
+
+_LOCKABLE_ATTRIBUTES = ("rmin", "rmax", "zmin", "zmax")
+
+
+def encode_cylinders(cyl_dict: dict[str, Cylinder]) -> dict[str, list[Any]]:
+    """
+    Returns a JSON serializable representation of cylinders, including their lock status.
+
+    Args:
+        cyl_dict (dict[str, Cylinder]): The cylinders.
+
+    Returns:
+        dict[str, list[Any]]: The bounds, whether it is a barrel and the locked attributes of each cylinder.
+    """
+    return {
+        name: [
+            float(cyl.rmin),
+            float(cyl.rmax),
+            float(cyl.zmin),
+            float(cyl.zmax),
+            bool(cyl.is_barrel),
+            [attr for attr in _LOCKABLE_ATTRIBUTES if cyl.is_locked(attr)],
+        ]
+        for name, cyl in cyl_dict.items()
+    }
+
+
+def decode_cylinders(encoded_cyl_dict: dict[str, list[Any]]) -> dict[str, Cylinder]:
+    """
+    Returns new cylinders from their representation, see encode_cylinders.
+
+    Args:
+        encoded_cyl_dict (dict[str, list[Any]]): The representation of the cylinders.
+
+    Returns:
+        dict[str, Cylinder]: The cylinders.
+    """
+    cyl_dict = {}
+    for name, (rmin, rmax, zmin, zmax, is_barrel, locked_attrs) in encoded_cyl_dict.items():
+        cyl = Cylinder(rmin, rmax, zmin, zmax, is_barrel)
+        for attr in locked_attrs:
+            cyl.lock(attr)
+        cyl_dict[name] = cyl
+
+    return cyl_dict
+
+
+class ProcessCache:
+    """
+    A cache of the results of processing simplified detectors, keyed by a fingerprint of the inputs of the processing.
+    Results are kept in memory, where the least recently used ones are evicted beyond max_entries, and optionally in a
+    directory, such that they are shared between runs and processes.
+
+    Attributes:
+        max_entries (int): The maximum number of results kept in memory.
+        cache_dir (str, optional): The directory holding the stored results. None to only keep results in memory.
+        max_size (int, optional): The maximum size of the stored results in bytes. None for an unbounded store.
+        hits (int): The number of results found in the cache.
+        misses (int): The number of results not found in the cache.
+    """
+
+    def __init__(
+        self, max_entries: int = 128, cache_dir: Optional[str] = None, max_size: Optional[int] = 64 * 1024**2
+    ) -> None:
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._results: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+    @staticmethod
+    def fingerprint(
+        thinned: dict[str, Cylinder],
+        envelope: dict[str, Cylinder],
+        is_continuous_in_z: dict[str, bool],
+        min_dist: float,
+        envelope_width: float,
+        overlap_solver: str = "greedy",
+    ) -> str:
+        """
+        Returns the fingerprint of the inputs of the processing of a simplified detector.
+        The order of the layers is part of the fingerprint, as overlaps are resolved in that order.
+
+        Args:
+            thinned (dict[str, Cylinder]): The thinned cylinders of the layers.
+            envelope (dict[str, Cylinder]): The cell envelopes of the layers.
+            is_continuous_in_z (dict[str, bool]): Whether each layer is continuous in z.
+            min_dist (float): The minimum distance between layers.
+            envelope_width (float): The width of the detector envelope.
+            overlap_solver (str, optional): The method resolving the overlaps. Defaults to "greedy".
+
+        Returns:
+            str: The fingerprint.
+        """
+        inputs = {
+            "version": PROCESS_CACHE_VERSION,
+            "layers": [
+                [idx, encode_cylinders({idx: cyl})[idx], encode_cylinders({idx: envelope[idx]})[idx]]
+                for idx, cyl in thinned.items()
+            ],
+            "is_continuous_in_z": [bool(is_continuous_in_z[idx]) for idx in thinned],
+            "min_dist": float(min_dist),
+            "envelope_width": float(envelope_width),
+            "overlap_solver": overlap_solver,
+        }
+
+        return hashlib.sha256(json.dumps(inputs).encode()).hexdigest()
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(str(self.cache_dir), f"{key}.json")
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        """
+        Returns the result stored under a fingerprint.
+
+        Args:
+            key (str): The fingerprint of the inputs.
+
+        Returns:
+            dict[str, Any]: The JSON serializable result, or None if no result is stored under the fingerprint.
+        """
+        if key in self._results:
+            self._results.move_to_end(key)
+            self.hits += 1
+            return self._results[key]
+
+        if self.cache_dir is not None and os.path.exists(self._get_path(key)):
+            with open(self._get_path(key)) as cache_file:
+                result: dict[str, Any] = json.load(cache_file)
+            # Mark the result as recently used
+            os.utime(self._get_path(key))
+            self._remember(key, result)
+            self.hits += 1
+            return result
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, result: dict[str, Any]) -> None:
+        """
+        Stores a result under a fingerprint.
+
+        Args:
+            key (str): The fingerprint of the inputs.
+            result (dict[str, Any]): The JSON serializable result.
+        """
+        self._remember(key, result)
+
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            write_json_atomic(self._get_path(key), result)
+            evict_least_recently_used(self.cache_dir, self.max_size, suffix=".json")
+
+    def _remember(self, key: str, result: dict[str, Any]) -> None:
+        self._results[key] = result
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
@@ -0,0 +1,191 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+import uproot
+
+from pygeosimplify.cfg.config import GeometryConfig
+from pygeosimplify.geo.kernels import rz_extent
+from pygeosimplify.geo.vertices import COORDINATE_COLUMNS
+from pygeosimplify.io.geo_handler import (
+    GeometrySource,
+    check_geo_consistency,
+    get_geometry_sources,
+    get_layer_coordinate_system,
+    get_loading_config,
+)
+from pygeosimplify.simplify.analysis import LayerAnalysis
+from pygeosimplify.simplify.cylinder import Cylinder
+from pygeosimplify.simplify.layer import are_cells_continuous_in_z
+from pygeosimplify.utils.tracing import span, traced
+
+
+class LayerReducer:
+    """
+    Reduces the cells of a layer, given in chunks, to everything the analysis of the layer needs: the number of cells,
+    whether all cells are barrel cells, the extent of the cell vertices in the positive z halfspace and the cells
+    closest to z=0 in both halfspaces. The result is identical to the analysis of all cells of the layer at once.
+
+    Attributes:
+        layer_idx (int): The index of the layer.
+        coordinate_system (str): The coordinate system in which the cells are defined.
+        n_cells (int): The number of cells reduced so far.
+        is_barrel (bool): True if all cells reduced so far are barrel cells.
+    """
+
+    def __init__(self, layer_idx: int, coordinate_system: str) -> None:
+        self.layer_idx = layer_idx
+        self.coordinate_system = coordinate_system
+        self.n_cells = 0
+        self.is_barrel = True
+        pos_columns, size_columns = COORDINATE_COLUMNS[coordinate_system]
+        self._cell_columns = list(dict.fromkeys([*pos_columns, *size_columns, "z"]))
+        # The rmin, rmax, zmin and zmax of the cell vertices in the positive z halfspace, None while it has no cells
+        self._extent: Optional[np.ndarray] = None
+        self._pos_cell: Optional[pd.Series] = None
+        self._neg_cell: Optional[pd.Series] = None
+
+    def update(self, layer_df: pd.DataFrame) -> None:
+        """
+        Reduces the next chunk of cells of the layer.
+
+        Args:
+            layer_df (pd.DataFrame): The cells of the layer in the chunk.
+        """
+        self.n_cells += len(layer_df)
+        self.is_barrel = self.is_barrel and bool(layer_df.isBarrel.all())
+
+        cell_df = layer_df[self._cell_columns]
+
+        half_space_df = cell_df[cell_df.z > 0]
+        if len(half_space_df) > 0:
+            extent = np.array(list(rz_extent(half_space_df, self.coordinate_system).values()))
+            if self._extent is None:
+                self._extent = extent
+            else:
+                # The minimum of the minima is the minimum of all values, and NaN values propagate as in np.min
+                self._extent = np.array(
+                    [
+                        np.minimum(self._extent[0], extent[0]),
+                        np.maximum(self._extent[1], extent[1]),
+                        np.minimum(self._extent[2], extent[2]),
+                        np.maximum(self._extent[3], extent[3]),
+                    ]
+                )
+            min_z = half_space_df.z.min()
+            # On ties, the earlier cell is kept, as in GeoLayer.is_continuous_in_z
+            if self._pos_cell is None or min_z < self._pos_cell.z:
+                self._pos_cell = half_space_df[half_space_df.z == min_z].iloc[0]
+
+        half_space_df = cell_df[cell_df.z < 0]
+        if len(half_space_df) > 0:
+            max_z = half_space_df.z.max()
+            if self._neg_cell is None or max_z > self._neg_cell.z:
+                self._neg_cell = half_space_df[half_space_df.z == max_z].iloc[0]
+
+    def get_analysis(self, thinned_layer_width: float = 10, distance_threshold: float = 50) -> LayerAnalysis:
+        """
+        Returns the analysis of the cells reduced so far.
+
+        Args:
+            thinned_layer_width (float, optional): The width of the thinned cylinder. Defaults to 10.
+            distance_threshold (float, optional): The continuity threshold, see GeoLayer.is_continuous_in_z. Defaults to 50.
+
+        Returns:
+            LayerAnalysis: The analysis of the layer.
+
+        Raises:
+            ValueError: If the layer has no cells in one of the z halfspaces.
+        """
+        if self._extent is None or self._pos_cell is None or self._neg_cell is None:
+            raise ValueError(f"Layer {self.layer_idx} needs cells in both z halfspaces to be analyzed.")
+
+        rmin, rmax, zmin, zmax = self._extent
+
+        return LayerAnalysis(
+            idx=str(self.layer_idx),
+            is_barrel=self.is_barrel,
+            is_continuous_in_z=are_cells_continuous_in_z(
+                self._pos_cell, self._neg_cell, self.coordinate_system, distance_threshold
+            ),
+            n_cells=self.n_cells,
+            thinned_layer_width=thinned_layer_width,
+            _envelope=Cylinder(rmin=rmin, rmax=rmax, zmin=zmin, zmax=zmax, is_barrel=self.is_barrel),
+        )
+
+
+@traced()
+def stream_layer_analyses(
+    file_path: Union[GeometrySource, list[GeometrySource]],
+    tree_name: Optional[str] = None,
+    config: Optional[GeometryConfig] = None,
+    thinned_layer_width: float = 10,
+    distance_threshold: float = 50,
+    step_size: Union[int, str] = "100 MB",
+    workers: Optional[int] = None,
+) -> dict[int, LayerAnalysis]:
+    """
+    Analyzes the layers of a geometry by iterating over its ROOT trees in chunks, without ever holding all cells.
+    Only the required branches are read, each chunk is checked for consistency and reduced per layer, see
+    LayerReducer. The analyses are identical to those of GeoLayers of the loaded geometry and can be added to a
+    SimplifiedDetector directly.
+
+    Args:
+        file_path (Union[GeometrySource, list[GeometrySource]]): The path to the ROOT file, or a list of sources, see
+            load_geometry.
+        tree_name (str, optional): The name of the tree to load from the sources given as paths.
+        config (GeometryConfig, optional): The coordinate branch configuration. If not provided, the configuration
+            installed with use_config or else the module level coordinate branches are used.
+        thinned_layer_width (float, optional): The width of the thinned cylinders. Defaults to 10.
+        distance_threshold (float, optional): The continuity threshold, see GeoLayer.is_continuous_in_z. Defaults to 50.
+        step_size (Union[int, str], optional): The number of cells, or the memory size, of each chunk, see
+            uproot.TTree.iterate. Defaults to "100 MB".
+        workers (int, optional): The number of threads decompressing and interpreting the baskets. Defaults to the
+            number of CPUs.
+
+    Returns:
+        dict[int, LayerAnalysis]: The analysis of each layer, ordered by layer index.
+
+    Raises:
+        Exception: If coordinate branches have not been set.
+        Exception: If not all cells in a layer have the same coordinate system assigned.
+    """
+    config = get_loading_config(config)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    reducers: dict[int, LayerReducer] = {}
+    with ExitStack() as stack:
+        executors = {}
+        if workers > 1:
+            executors = {
+                "decompression_executor": stack.enter_context(ThreadPoolExecutor(workers)),
+                "interpretation_executor": stack.enter_context(ThreadPoolExecutor(workers)),
+            }
+        for source_path, source_tree_name in get_geometry_sources(file_path, tree_name):
+            tree = uproot.open(f"{source_path}:{source_tree_name}")
+            # Missing required branches are reported by the consistency check
+            tree_branches = tree.keys()
+            branches = [branch for branch in config.required_branches if branch in tree_branches]
+            for chunk_df in tree.iterate(branches, step_size=step_size, library="pd", **executors):
+                with span("reduce_chunk", file_path=source_path, n_cells=len(chunk_df)):
+                    check_geo_consistency(chunk_df, config)
+                    _reduce_chunk(chunk_df, reducers, config)
+
+    return {
+        layer_idx: reducers[layer_idx].get_analysis(thinned_layer_width, distance_threshold)
+        for layer_idx in sorted(reducers)
+    }
+
+
+def _reduce_chunk(chunk_df: pd.DataFrame, reducers: dict[int, LayerReducer], config: GeometryConfig) -> None:
+    """Reduces the cells of a chunk with the reducers of their layers, adding reducers for new layers."""
+    for layer_idx, layer_df in chunk_df.groupby("layer", sort=False):
+        coordinate_system = get_layer_coordinate_system(layer_df, config)
+        reducer = reducers.setdefault(int(layer_idx), LayerReducer(int(layer_idx), coordinate_system))
+        if reducer.coordinate_system != coordinate_system:
+            raise Exception(f"Not all cells in layer {layer_idx} have the same coordinate system assigned.")
+        reducer.update(layer_df)
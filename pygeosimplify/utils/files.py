@@ -0,0 +1,25 @@
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(file_path: str) -> Iterator[str]:
+    """
+    Provides a temporary path to write a file to, which replaces the file once the context exits, such that concurrent
+    readers never see a partially written file. If the context raises, the temporary file is removed instead.
+
+    Args:
+        file_path (str): The path of the file.
+
+    Yields:
+        str: The temporary path to write the file to.
+    """
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    try:
+        yield tmp_path
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, file_path)
@@ -0,0 +1,126 @@
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Optional
+
+# Callback invoked with the name of a finished stage and its timing and the counters at that point
+InstrumentationCallback = Callable[[str, dict[str, Any]], None]
+
+
+@dataclass
+class StageTiming:
+    """Accumulated timing of a stage."""
+
+    wall_time: float = 0
+    cpu_time: float = 0
+    calls: int = 0
+
+
+class Instrumentation:
+    """
+    Collects stage timings and counters.
+    Stages are timed in wall and CPU time and accumulated over repeated calls. Counters are incremented either
+    directly or, from code that has no reference to the instrumentation, with the module level count function while
+    the instrumentation is installed with instrument.
+
+    Attributes:
+        stages (dict[str, StageTiming]): The timings of the stages, in order of first execution.
+        counters (dict[str, int]): The counters.
+        callback (InstrumentationCallback, optional): Invoked at the end of each stage.
+    """
+
+    def __init__(self, callback: Optional[InstrumentationCallback] = None) -> None:
+        self.stages: dict[str, StageTiming] = {}
+        self.counters: dict[str, int] = {}
+        self.callback = callback
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Times a stage and installs the instrumentation for its duration.
+
+        Args:
+            name (str): The name of the stage.
+        """
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            with instrument(self):
+                yield
+        finally:
+            timing = self.stages.setdefault(name, StageTiming())
+            timing.wall_time += time.perf_counter() - wall_start
+            timing.cpu_time += time.process_time() - cpu_start
+            timing.calls += 1
+
+            if self.callback is not None:
+                self.callback(name, {**asdict(timing), "counters": dict(self.counters)})
+
+    def count(self, name: str, n: int = 1) -> None:
+        """
+        Increments a counter.
+
+        Args:
+            name (str): The name of the counter.
+            n (int, optional): The increment. Defaults to 1.
+        """
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def reset(self) -> None:
+        """Clears all stage timings and counters."""
+        self.stages = {}
+        self.counters = {}
+
+    def report(self) -> dict[str, Any]:
+        """
+        Returns a structured report of the stage timings and counters.
+
+        Returns:
+            dict[str, Any]: The timings of each stage under "stages", the counters under "counters" and the summed
+            wall and CPU time of all stages under "total".
+        """
+        return {
+            "stages": {name: asdict(timing) for name, timing in self.stages.items()},
+            "counters": dict(self.counters),
+            "total": {
+                "wall_time": sum(timing.wall_time for timing in self.stages.values()),
+                "cpu_time": sum(timing.cpu_time for timing in self.stages.values()),
+            },
+        }
+
+
+# Instrumentation installed for the current thread or task, if any
+_active_instrumentation: ContextVar[Optional[Instrumentation]] = ContextVar("instrumentation", default=None)
+
+
+@contextmanager
+def instrument(instrumentation: Instrumentation) -> Iterator[Instrumentation]:
+    """
+    Installs an instrumentation for the current thread or task for the duration of the context.
+
+    Args:
+        instrumentation (Instrumentation): The instrumentation to install.
+
+    Yields:
+        Instrumentation: The installed instrumentation.
+    """
+    token = _active_instrumentation.set(instrumentation)
+    try:
+        yield instrumentation
+    finally:
+        _active_instrumentation.reset(token)
+
+
+def count(name: str, n: int = 1) -> None:
+    """
+    Increments a counter of the installed instrumentation. Does nothing if no instrumentation is installed.
+
+    Args:
+        name (str): The name of the counter.
+        n (int, optional): The increment. Defaults to 1.
+    """
+    instrumentation = _active_instrumentation.get()
+    if instrumentation is not None:
+        instrumentation.count(name, n)
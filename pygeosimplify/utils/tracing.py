@@ -0,0 +1,175 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any, Callable, Optional, TypeVar, cast
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Tracer:
+    """
+    Records spans as Chrome trace events, which can be opened in Perfetto or about:tracing.
+    Spans of all threads are recorded. Timestamps are taken from the monotonic clock shared by all processes of a host,
+    such that the events of worker processes can be merged into a single trace.
+
+    Attributes:
+        events (list[dict[str, Any]]): The recorded trace events.
+    """
+
+    def __init__(self) -> None:
+        self.events: list[dict[str, Any]] = []
+
+    @contextmanager
+    def span(self, name: str, **args: Any) -> Iterator[None]:
+        """
+        Records a span covering the duration of the context.
+
+        Args:
+            name (str): The name of the span.
+            **args: Additional arguments shown with the span.
+        """
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            # Appending to a list is atomic, so no lock is required to record spans from several threads
+            self.events.append(
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": start / 1000,
+                    "dur": (end - start) / 1000,
+                    "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                    "args": args,
+                }
+            )
+
+    def write(self, output_path: str) -> None:
+        """
+        Writes the recorded events as Chrome trace-event JSON.
+
+        Args:
+            output_path (str): The path of the trace file.
+        """
+        with open(output_path, "w") as trace_file:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, trace_file)
+
+
+# The tracer of the current process, None while tracing is disabled
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Optional[Tracer]:
+    """
+    Returns the enabled tracer of the current process.
+
+    Returns:
+        Tracer: The enabled tracer, or None if tracing is disabled.
+    """
+    return _tracer
+
+
+def enable_tracing(tracer: Optional[Tracer] = None) -> Tracer:
+    """
+    Enables tracing in the current process.
+
+    Args:
+        tracer (Tracer, optional): The tracer recording the spans. If not provided, a new tracer is created.
+
+    Returns:
+        Tracer: The enabled tracer.
+    """
+    global _tracer
+
+    _tracer = tracer if tracer is not None else Tracer()
+
+    return _tracer
+
+
+def disable_tracing() -> Optional[Tracer]:
+    """
+    Disables tracing in the current process.
+
+    Returns:
+        Tracer: The previously enabled tracer, if any.
+    """
+    global _tracer
+
+    tracer, _tracer = _tracer, None
+
+    return tracer
+
+
+@contextmanager
+def tracing(output_path: Optional[str] = None) -> Iterator[Tracer]:
+    """
+    Enables tracing for the duration of the context.
+
+    Args:
+        output_path (str, optional): If provided, the trace is written to this path when the context exits.
+
+    Yields:
+        Tracer: The enabled tracer.
+    """
+    previous_tracer = _tracer
+    tracer = enable_tracing()
+    try:
+        yield tracer
+    finally:
+        if previous_tracer is not None:
+            enable_tracing(previous_tracer)
+        else:
+            disable_tracing()
+        if output_path is not None:
+            tracer.write(output_path)
+
+
+@contextmanager
+def span(name: str, **args: Any) -> Iterator[None]:
+    """
+    Records a span with the enabled tracer. Does nothing if tracing is disabled.
+
+    Args:
+        name (str): The name of the span.
+        **args: Additional arguments shown with the span.
+    """
+    if _tracer is None:
+        yield
+        return
+
+    with _tracer.span(name, **args):
+        yield
+
+
+def traced(name: Optional[str] = None) -> Callable[[F], F]:
+    """
+    Decorator recording a span for each call of the decorated function while tracing is enabled.
+    While tracing is disabled, the only overhead is a single global lookup per call.
+
+    Args:
+        name (str, optional): The name of the span. Defaults to the qualified name of the function.
+
+    Returns:
+        Callable[[F], F]: The decorator.
+    """
+
+    def decorator(func: F) -> F:
+        span_name = name if name is not None else func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            tracer = _tracer
+            if tracer is None:
+                return func(*args, **kwargs)
+            with tracer.span(span_name):
+                return func(*args, **kwargs)
+
+        return cast(F, wrapper)
+
+    return decorator
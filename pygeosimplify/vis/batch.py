@@ -0,0 +1,233 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Optional, Union
+
+import matplotlib
+import matplotlib.colors as mcolors
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import uproot
+from matplotlib.figure import Figure
+from mpl_toolkits.mplot3d import Axes3D
+from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+from tqdm import tqdm
+
+from pygeosimplify.cfg.config import GeometryConfig, get_config
+from pygeosimplify.utils.message_type import MessageType as mt
+from pygeosimplify.vis.geo import get_cell_from_row
+from pygeosimplify.vis.scene import cell_triangles
+
+# Geometry and energy buffers of the current process, set by the worker initializer
+_worker_state: dict[str, Any] = {}
+
+
+@dataclass(frozen=True)
+class EventDisplaySettings:
+    """Settings shared by all event displays of a batch."""
+
+    unit_scale_energy: float = 1
+    energy_threshold: Optional[float] = None
+    energy_label: str = "Cell Energy"
+    color_map: str = "gist_heat_r"
+    axis_labels: tuple[str, str, str] = ("x", "y", "z")
+    dpi: int = 100
+
+
+def precompute_cell_meshes(
+    df: pd.DataFrame, unit_scale: float = 1, config: Optional[GeometryConfig] = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Triangulates the convex hulls of all cells of a geometry once.
+
+    Args:
+        df (pd.DataFrame): The DataFrame containing the geometry data.
+        unit_scale (float, optional): The scale factor for the unit of measurement. Defaults to 1.
+        config (GeometryConfig, optional): The coordinate branch configuration. Defaults to the configuration installed with use_config or else the module level coordinate branches.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The triangles of all cells of shape (n_triangles, 3, 3) and the offsets of
+        shape (n_cells + 1,), such that the triangles of cell i are triangles[offsets[i]:offsets[i + 1]].
+    """
+    config = get_config(config)
+    triangles = [
+        cell_triangles(get_cell_from_row(row, unit_scale, config)) for row in tqdm(df.itertuples(), total=len(df))
+    ]
+
+    offsets = np.zeros(len(triangles) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(faces) for faces in triangles])
+
+    return np.concatenate(triangles), offsets
+
+
+def load_energy_table(
+    energies: Union[str, pd.DataFrame, np.ndarray], tree_name: Optional[str] = None, energy_branch: str = "cell_energy"
+) -> tuple[np.ndarray, list[int]]:
+    """
+    Loads an event-indexed table of cell energies.
+
+    Args:
+        energies (Union[str, pd.DataFrame, np.ndarray]): Either the path to a ROOT file with one entry per event and
+            an array branch holding the energy of every cell, a DataFrame with one row per event indexed by event
+            number, or an array of shape (n_events, n_cells).
+        tree_name (str, optional): The name of the tree if energies is a ROOT file.
+        energy_branch (str, optional): The name of the energy branch if energies is a ROOT file. Defaults to "cell_energy".
+
+    Returns:
+        tuple[np.ndarray, list[int]]: The energy table of shape (n_events, n_cells) and the event numbers.
+    """
+    if isinstance(energies, str):
+        if tree_name is None:
+            raise ValueError("tree_name must be provided if energies are loaded from a ROOT file")
+        tree = uproot.open(f"{energies}:{tree_name}")
+        table = np.stack(tree[energy_branch].array(library="np")).astype(np.float64)
+        event_ids = list(range(len(table)))
+    elif isinstance(energies, pd.DataFrame):
+        table = energies.to_numpy(dtype=np.float64)
+        event_ids = [int(event_id) for event_id in energies.index]
+    else:
+        table = np.asarray(energies, dtype=np.float64)
+        event_ids = list(range(len(table)))
+
+    if table.ndim != 2:
+        raise ValueError(f"Energy table must be of shape (n_events, n_cells), got {table.shape}")
+
+    return table, event_ids
+
+
+def _init_worker(buffer_dir: str, settings: EventDisplaySettings, use_agg: bool = True) -> None:
+    """Map the shared geometry and energy buffers into the current process."""
+    if use_agg:
+        matplotlib.use("Agg")
+
+    # Memory mapped buffers are shared between processes through the page cache
+    _worker_state["triangles"] = np.load(os.path.join(buffer_dir, "triangles.npy"), mmap_mode="r")
+    _worker_state["offsets"] = np.load(os.path.join(buffer_dir, "offsets.npy"), mmap_mode="r")
+    _worker_state["energies"] = np.load(os.path.join(buffer_dir, "energies.npy"), mmap_mode="r")
+    _worker_state["settings"] = settings
+
+
+def _render_event(task: tuple[int, int, str]) -> Optional[str]:
+    """Render the event display of a single event from the buffers of the current process."""
+    event_row, event_id, output_path = task
+    triangles = _worker_state["triangles"]
+    offsets = _worker_state["offsets"]
+    settings: EventDisplaySettings = _worker_state["settings"]
+
+    energy = np.asarray(_worker_state["energies"][event_row]) * settings.unit_scale_energy
+    threshold = settings.energy_threshold if settings.energy_threshold is not None else 0
+    cells = np.flatnonzero(energy > threshold)
+
+    if cells.size == 0:
+        print(f"{mt.WARNING} Event {event_id} has no cells above threshold. Skipping...")
+        return None
+
+    # Gather the triangles of all selected cells
+    starts = offsets[cells]
+    counts = offsets[cells + 1] - starts
+    triangle_idx = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+    faces = np.asarray(triangles[triangle_idx])
+
+    cmap = plt.get_cmap(settings.color_map)
+    norm = mcolors.LogNorm(energy[cells].min() * 0.1, energy[cells].max())
+    facecolors = np.repeat(cmap(norm(energy[cells])), counts, axis=0)
+
+    fig = Figure()
+    ax: Axes3D = fig.add_subplot(111, projection="3d")
+    ax.grid(False)
+    ax.xaxis.set_pane_color((1.0, 1.0, 1.0, 0.0))
+    ax.yaxis.set_pane_color((1.0, 1.0, 1.0, 0.0))
+    ax.zaxis.set_pane_color((1.0, 1.0, 1.0, 0.0))
+
+    ax.add_collection3d(
+        Poly3DCollection(faces, facecolors=facecolors, linewidths=0.01, edgecolors=(1, 1, 1, 1), alpha=0.1)
+    )
+
+    # Regularize x,y limits so that limits are identical for x and y (to avoid distortions)
+    min_xyz = faces.reshape(-1, 3).min(axis=0)
+    max_xyz = faces.reshape(-1, 3).max(axis=0)
+    min_max = (min(min_xyz[0], min_xyz[1]), max(max_xyz[0], max_xyz[1]))
+    ax.set_xlim(min_max)
+    ax.set_ylim(min_max)
+    ax.set_zlim((min_xyz[2], max_xyz[2]))
+
+    ax.set_xlabel(settings.axis_labels[0])
+    ax.set_ylabel(settings.axis_labels[1])
+    ax.set_zlabel(settings.axis_labels[2])
+
+    mappable = plt.cm.ScalarMappable(norm=norm, cmap=cmap)
+    cbar = fig.colorbar(mappable, ax=ax, fraction=0.035, pad=0.15)
+    cbar.set_label(settings.energy_label)
+
+    fig.savefig(output_path, dpi=settings.dpi)
+
+    return output_path
+
+
+def render_event_displays(
+    df: pd.DataFrame,
+    energies: Union[str, pd.DataFrame, np.ndarray],
+    output_dir: str,
+    tree_name: Optional[str] = None,
+    energy_branch: str = "cell_energy",
+    workers: int = 1,
+    file_prefix: str = "event",
+    unit_scale: float = 1,
+    settings: Optional[EventDisplaySettings] = None,
+    config: Optional[GeometryConfig] = None,
+) -> list[str]:
+    """
+    Render event displays of many events on a fixed geometry.
+    The cell meshes are computed once and shared with the worker processes through memory mapped buffers, such that
+    each event only requires coloring and drawing the cells with non-zero energy.
+
+    Args:
+        df (pd.DataFrame): The DataFrame containing the geometry data. The energy table must have one column per row of the DataFrame.
+        energies (Union[str, pd.DataFrame, np.ndarray]): The event-indexed cell energies, see load_energy_table.
+        output_dir (str): The directory the event displays are written to.
+        tree_name (str, optional): The name of the tree if energies is a ROOT file.
+        energy_branch (str, optional): The name of the energy branch if energies is a ROOT file. Defaults to "cell_energy".
+        workers (int, optional): The number of worker processes. Defaults to 1, which renders in the current process.
+        file_prefix (str, optional): The prefix of the output files, which are named <file_prefix>_<event number>.png. Defaults to "event".
+        unit_scale (float, optional): The scale factor for the unit of measurement of the geometry. Defaults to 1.
+        settings (EventDisplaySettings, optional): The settings of the event displays.
+        config (GeometryConfig, optional): The coordinate branch configuration of the geometry.
+
+    Returns:
+        list[str]: The paths of the written event displays, in event order. Events without cells above threshold are skipped.
+    """
+    if settings is None:
+        settings = EventDisplaySettings()
+
+    table, event_ids = load_energy_table(energies, tree_name, energy_branch)
+
+    if table.shape[1] != len(df):
+        raise ValueError(f"Energy table has {table.shape[1]} cells per event, but the geometry has {len(df)} cells")
+
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = [
+        (event_row, event_id, os.path.join(output_dir, f"{file_prefix}_{event_id:06d}.png"))
+        for event_row, event_id in enumerate(event_ids)
+    ]
+
+    triangles, offsets = precompute_cell_meshes(df, unit_scale, config)
+
+    with tempfile.TemporaryDirectory() as buffer_dir:
+        np.save(os.path.join(buffer_dir, "triangles.npy"), triangles)
+        np.save(os.path.join(buffer_dir, "offsets.npy"), offsets)
+        np.save(os.path.join(buffer_dir, "energies.npy"), table)
+
+        if workers == 1:
+            # Render in the current process without changing its matplotlib backend
+            _init_worker(buffer_dir, settings, use_agg=False)
+            output_paths = [_render_event(task) for task in tqdm(tasks)]
+            _worker_state.clear()
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(buffer_dir, settings)
+            ) as executor:
+                output_paths = list(tqdm(executor.map(_render_event, tasks), total=len(tasks)))
+
+    return [output_path for output_path in output_paths if output_path is not None]
@@ -2,6 +2,7 @@ from typing import Union
 
 import matplotlib.pyplot as plt
 import numpy as np
+from matplotlib.patches import Rectangle
 from mpl_toolkits.mplot3d import Axes3D
 from scipy.linalg import norm
 
@@ -96,3 +97,32 @@ def plot_cylinder(
         ax.plot_surface(x, y, z, color=color, alpha=alpha)
 
     return ax
+
+
+def plot_cylinder_rz(
+    cylinder: Cylinder,
+    ax: Union[None, plt.Axes] = None,
+    color: Union[tuple[float, float, float], str] = "black",
+    alpha: float = 1,
+    fill: bool = False,
+    linestyle: str = "-",
+    label: Union[None, str] = None,
+) -> plt.Axes:
+    """Plot the r-z cross-section of a cylinder as a rectangle with z on the x-axis and r on the y-axis."""
+    if ax is None:
+        fig = plt.figure()
+        ax = fig.add_subplot()
+
+    rectangle = Rectangle(
+        (cylinder.zmin, cylinder.rmin),
+        cylinder.zmax - cylinder.zmin,
+        cylinder.rmax - cylinder.rmin,
+        edgecolor=color,
+        facecolor=color if fill else "none",
+        alpha=alpha,
+        linestyle=linestyle,
+        label=label,
+    )
+    ax.add_patch(rectangle)
+
+    return ax
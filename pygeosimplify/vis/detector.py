@@ -0,0 +1,169 @@
+from typing import Optional, Union
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from distinctipy import get_colors
+from matplotlib.collections import PolyCollection
+
+from pygeosimplify.cfg.config import GeometryConfig, get_config
+from pygeosimplify.geo.vertices import cell_footprints_rz
+from pygeosimplify.io.geo_handler import get_layer_coordinate_system
+from pygeosimplify.simplify.cylinder import Cylinder, CylinderGroup
+from pygeosimplify.simplify.helpers import find_rz_overlaps
+
+# Line styles of the different cylinder types in the r-z view
+CYLINDER_STYLES = {
+    "envelope": {"edgecolor": "black", "linestyle": "--"},
+    "thinned": {"edgecolor": "tab:red", "linestyle": "-"},
+    "processed": {"edgecolor": "tab:green", "linestyle": "-"},
+}
+
+
+def plot_detector_rz(  # noqa: C901
+    cylinders: CylinderGroup,
+    df: Optional[pd.DataFrame] = None,
+    ax: Union[None, plt.Axes] = None,
+    view: str = "half",
+    cyl_types: Optional[list[str]] = None,
+    overlap_cyl_type: str = "processed",
+    overlapping_layers: Optional[list[list[str]]] = None,
+    unit_scale: float = 1,
+    x_label: str = "z",
+    y_label: str = "r",
+    config: Optional[GeometryConfig] = None,
+) -> plt.Axes:
+    """
+    Plot an r-z cross-section of a simplified detector.
+    The r-z footprints of the cells are drawn as one PolyCollection per layer and the cylinders of each type as one
+    rectangle collection, such that the cost of the plot does not depend on the number of cylinders or cells.
+    Overlapping cylinders are marked by their hatched intersection.
+
+    Parameters:
+        cylinders (CylinderGroup): The cylinders of the simplified detector.
+        df (pd.DataFrame, optional): The DataFrame containing the cell data. If provided, the cell footprints of the layers of the detector are drawn.
+        ax (plt.Axes, optional): The axes to plot on. If not provided, a new figure and axes will be created.
+        view (str, optional): Either 'half' to show the full z range or 'quarter' to show only the positive z halfspace. Default is 'half'.
+        cyl_types (list[str], optional): The cylinder types to draw. If not provided, all non-empty cylinder types are drawn.
+        overlap_cyl_type (str, optional): The cylinder type that is checked for overlaps. Default is 'processed'.
+        overlapping_layers (list[list[str]], optional): Pairs of overlapping cylinders, e.g. from detector.check_overlaps(). If not provided, overlaps are detected from the r-z cross-sections.
+        unit_scale (float, optional): The scale factor for the unit of measurement. Default is 1.
+        x_label (str, optional): The label for the x-axis. Default is 'z'.
+        y_label (str, optional): The label for the y-axis. Default is 'r'.
+        config (GeometryConfig, optional): The coordinate branch configuration. If not provided, the configuration installed with use_config or else the module level coordinate branches are used.
+
+    Returns:
+        plt.Axes: The axes object containing the plot.
+    """
+    config = get_config(config)
+
+    if view not in ["half", "quarter"]:
+        raise ValueError(f"Invalid view {view}. Must be one of: half, quarter")
+
+    if ax is None:
+        fig = plt.figure()
+        ax = fig.add_subplot()
+
+    if cyl_types is None:
+        cyl_types = [cyl_type for cyl_type in CYLINDER_STYLES if getattr(cylinders, cyl_type)]
+
+    # Cylinder names are the layer index, optionally followed by the z halfspace, e.g. 14, 14_POS or 14_NEG
+    layer_names = sorted({name.split("_")[0] for name in cylinders.envelope})
+
+    if df is not None:
+        layer_color_dict = dict(zip(layer_names, get_colors(len(layer_names), rng=0)))
+        for layer_name in layer_names:
+            layer_df = df[df["layer"] == int(layer_name)]
+            if view == "quarter":
+                layer_df = layer_df[layer_df.z > 0]
+            if layer_df.empty:
+                continue
+
+            footprints = cell_footprints_rz(layer_df, get_layer_coordinate_system(layer_df, config)) * unit_scale
+            # Cells at different phi share the same footprint, so only draw each footprint once
+            footprints = np.unique(footprints.reshape(len(footprints), -1), axis=0).reshape(-1, 4, 2)
+
+            ax.add_collection(
+                PolyCollection(
+                    list(footprints),
+                    facecolors=layer_color_dict[layer_name],
+                    edgecolors="none",
+                    alpha=0.5,
+                    label=f"Layer {layer_name}",
+                )
+            )
+
+    for cyl_type in cyl_types:
+        cyl_dict = _select_view(getattr(cylinders, cyl_type), view)
+        if not cyl_dict:
+            continue
+        ax.add_collection(
+            PolyCollection(
+                [_rectangle(cyl, unit_scale) for cyl in cyl_dict.values()],
+                facecolors="none",
+                edgecolors=CYLINDER_STYLES[cyl_type]["edgecolor"],
+                linestyle=CYLINDER_STYLES[cyl_type]["linestyle"],
+                label=cyl_type,
+            )
+        )
+
+    overlap_cyl_dict = _select_view(getattr(cylinders, overlap_cyl_type), view)
+    if overlapping_layers is None:
+        overlapping_layers = find_rz_overlaps(overlap_cyl_dict)
+
+    overlap_rectangles = []
+    for cyl_name_a, cyl_name_b in overlapping_layers:
+        if cyl_name_a not in overlap_cyl_dict or cyl_name_b not in overlap_cyl_dict:
+            continue
+        cyl_a, cyl_b = overlap_cyl_dict[cyl_name_a], overlap_cyl_dict[cyl_name_b]
+        intersection = Cylinder(
+            max(cyl_a.rmin, cyl_b.rmin),
+            min(cyl_a.rmax, cyl_b.rmax),
+            max(cyl_a.zmin, cyl_b.zmin),
+            min(cyl_a.zmax, cyl_b.zmax),
+            cyl_a.is_barrel,
+        )
+        overlap_rectangles.append(_rectangle(intersection, unit_scale))
+
+    if overlap_rectangles:
+        ax.add_collection(
+            PolyCollection(
+                overlap_rectangles,
+                facecolors=(1, 0, 0, 0.3),
+                edgecolors="red",
+                hatch="xx",
+                label=f"Overlaps ({len(overlap_rectangles)})",
+            )
+        )
+
+    ax.autoscale_view()
+    if view == "quarter":
+        ax.set_xlim(left=0)
+    ax.set_ylim(bottom=0)
+
+    ax.set_xlabel(x_label)
+    ax.set_ylabel(y_label)
+
+    return ax
+
+
+def _select_view(cyl_dict: dict[str, Cylinder], view: str) -> dict[str, Cylinder]:
+    """Select the cylinders that are visible in the requested view."""
+    if view == "quarter":
+        return {name: cyl for name, cyl in cyl_dict.items() if cyl.zmax > 0}
+    return cyl_dict
+
+
+def _rectangle(cyl: Cylinder, unit_scale: float) -> np.ndarray:
+    """Returns the (z, r) corners of the r-z cross-section of a cylinder."""
+    return (
+        np.array(
+            [
+                [cyl.zmin, cyl.rmin],
+                [cyl.zmax, cyl.rmin],
+                [cyl.zmax, cyl.rmax],
+                [cyl.zmin, cyl.rmax],
+            ]
+        )
+        * unit_scale
+    )
@@ -7,15 +7,18 @@ import pandas as pd
 from distinctipy import get_colors
 from mpl_toolkits.mplot3d import Axes3D
 
-import pygeosimplify as pgs
+from pygeosimplify.cfg.config import GeometryConfig, get_config
 from pygeosimplify.coordinate.definitions import XYZ, EtaPhiR, EtaPhiZ
 from pygeosimplify.geo.base import Cell
 from pygeosimplify.geo.cells import EtaPhiRCell, EtaPhiZCell, XYZCell
+from pygeosimplify.geo.query import GeometryIndex, PartitionedGeometry
+from pygeosimplify.simplify.cylinder import Cylinder
+from pygeosimplify.vis.cylinder import plot_cylinder
 from pygeosimplify.vis.scene import CellScene
 
 
 def plot_geometry(  # noqa: C901
-    df: pd.DataFrame,
+    df: Union[pd.DataFrame, PartitionedGeometry],
     ax: Union[None, Axes3D] = None,
     layer_list: Optional[list[int]] = None,
     eta_range: Optional[list] = None,
@@ -27,12 +30,16 @@ def plot_geometry(  # noqa: C901
     unit_scale_energy: float = 1,
     energy_label: str = "Cell Energy",
     color_map: str = "gist_heat_r",
+    energy_threshold: Optional[float] = None,
+    top_k: Optional[int] = None,
+    context_cylinders: Optional[dict[str, Cylinder]] = None,
+    config: Optional[GeometryConfig] = None,
 ) -> Axes3D:
     """
     Plot the geometry based on the provided DataFrame.
 
     Parameters:
-        df (pd.DataFrame): The DataFrame containing the geometry data.
+        df (Union[pd.DataFrame, PartitionedGeometry]): The DataFrame containing the geometry data. If a partitioned geometry is provided, the layer, eta and phi selections are resolved per layer, e.g. with binary searches for a GeometryIndex or by reading only the selected layers of a BinaryGeometry.
         ax (Axes3D, optional): The 3D axes to plot on. If not provided, a new figure and axes will be created.
         layer_list (list[int], optional): The list of layers to consider. If not provided, all layers will be considered.
         eta_range (list, optional): The range of eta values to filter the data. If not provided, the default range is [-5, 5].
@@ -44,6 +51,10 @@ def plot_geometry(  # noqa: C901
         unit_scale_energy (float, optional): The scale factor for the unit of measurement of the cell energy. Default is 1.
         energy_label (str, optional): The label for the colorbar when cell energy is used. Default is "Cell Energy".
         color_map (str, optional): The colormap to use when coloring the cells based on energy values. Default is "gist_heat_r".
+        energy_threshold (float, optional): If provided, only cells with a scaled energy above the threshold are drawn. The cells are dropped before any geometry is constructed.
+        top_k (int, optional): If provided, only the top_k cells with the highest energy are drawn.
+        context_cylinders (dict[str, Cylinder], optional): Cylinders, e.g. the processed cylinders of a simplified detector, drawn as faint layer outlines for context.
+        config (GeometryConfig, optional): The coordinate branch configuration. If not provided, the configuration installed with use_config or else the module level coordinate branches are used.
 
     Returns:
         Axes3D: The 3D axes object containing the plot.
@@ -60,15 +71,25 @@ def plot_geometry(  # noqa: C901
     if axis_labels is None:
         axis_labels = ["x", "y", "z"]
 
-    # If no layer list is provided consider all all layers
-    if layer_list is None:
-        layer_list = list(df["layer"].unique())
+    if isinstance(df, PartitionedGeometry):
+        # If no layer list is provided consider all all layers, in order of appearance for an index as for a DataFrame
+        if layer_list is None:
+            if isinstance(df, GeometryIndex):
+                layer_list = list(df.df["layer"].unique())
+            else:
+                layer_list = [int(layer_idx) for layer_idx in df.layers]
+        # Select layers and eta and phi range from the partitioned geometry
+        df = df.select(layer_list=layer_list, eta_range=eta_range, phi_range=phi_range)
+    else:
+        # If no layer list is provided consider all all layers
+        if layer_list is None:
+            layer_list = list(df["layer"].unique())
 
-    # Filter for layer list
-    df = df[df["layer"].isin(layer_list)]
+        # Filter for layer list
+        df = df[df["layer"].isin(layer_list)]
 
-    # Filter for eta and phi range
-    df = filter_df_eta_phi(df, eta_range, phi_range)
+        # Filter for eta and phi range
+        df = filter_df_eta_phi(df, eta_range, phi_range)
 
     # Create a visual cell scene
     vis = CellScene()
@@ -84,6 +105,7 @@ def plot_geometry(  # noqa: C901
             scene=vis,
             unit_scale=unit_scale,
             layer_color_dict=layer_color_dict,
+            config=config,
         )
     else:
         # Make sure the energy column exists
@@ -93,6 +115,9 @@ def plot_geometry(  # noqa: C901
         if df[cell_energy_col].empty or df[cell_energy_col].eq(0).all():
             raise ValueError(f"Column {cell_energy_col} is empty or always 0")
 
+        # Drop cells below threshold before any cell geometry is constructed
+        df = cull_cells_by_energy(df, cell_energy_col, unit_scale_energy, energy_threshold, top_k)
+
         # Create a color map mapping cell energy to a color
         vmin = df[cell_energy_col].min() * unit_scale_energy
         vmax = df[cell_energy_col].max() * unit_scale_energy
@@ -105,10 +130,24 @@ def plot_geometry(  # noqa: C901
             unit_scale_energy=unit_scale_energy,
             colormap=plt.get_cmap(color_map),
             norm=norm,
+            cell_energy_col=cell_energy_col,
+            config=config,
         )
 
     vis.plot(ax=ax, axis_labels=axis_labels)
 
+    # Draw faint layer outlines for context
+    if context_cylinders is not None:
+        for cyl in context_cylinders.values():
+            scaled_cyl = Cylinder(
+                cyl.rmin * unit_scale,
+                cyl.rmax * unit_scale,
+                cyl.zmin * unit_scale,
+                cyl.zmax * unit_scale,
+                cyl.is_barrel,
+            )
+            plot_cylinder(scaled_cyl, ax=ax, color="grey", alpha=0.05, linspace_count=50)
+
     if cell_energy_col:
         mappable = plt.cm.ScalarMappable(norm=norm, cmap=plt.get_cmap(color_map))
         cbar = plt.colorbar(mappable, ax=ax, fraction=0.035, pad=0.15)
@@ -145,6 +184,48 @@ def filter_df_eta_phi(df: pd.DataFrame, eta_range: list, phi_range: list) -> pd.
     return df
 
 
+def cull_cells_by_energy(
+    df: pd.DataFrame,
+    cell_energy_col: str,
+    unit_scale_energy: float = 1,
+    energy_threshold: Optional[float] = None,
+    top_k: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Drop cells with low energy from a DataFrame, keeping the original order of the remaining cells.
+
+    Args:
+        df (pd.DataFrame): The DataFrame containing the cell data.
+        cell_energy_col (str): The name of the column containing the cell energy values.
+        unit_scale_energy (float, optional): The scale factor for the unit of measurement of the cell energy. Defaults to 1.
+        energy_threshold (float, optional): If provided, only cells with a scaled energy above the threshold are kept.
+        top_k (int, optional): If provided, only the top_k cells with the highest energy are kept.
+
+    Returns:
+        pd.DataFrame: The DataFrame containing the remaining cells.
+
+    Raises:
+        ValueError: If no cells remain.
+    """
+    energy = df[cell_energy_col].to_numpy() * unit_scale_energy
+    keep = np.ones(len(df), dtype=bool)
+
+    if energy_threshold is not None:
+        keep &= energy > energy_threshold
+
+    if top_k is not None:
+        # Keep the top_k highest energy cells among the ones above threshold
+        candidates = np.flatnonzero(keep)
+        top_candidates = candidates[np.argsort(-energy[candidates], kind="stable")[:top_k]]
+        keep = np.zeros(len(df), dtype=bool)
+        keep[top_candidates] = True
+
+    if not keep.any():
+        raise ValueError(f"No cells left after culling on column {cell_energy_col}")
+
+    return df.iloc[np.flatnonzero(keep)]
+
+
 def add_cells_to_scene(
     df: pd.DataFrame,
     scene: CellScene,
@@ -153,6 +234,8 @@ def add_cells_to_scene(
     layer_color_dict: Optional[dict] = None,
     colormap: Optional[Any] = None,
     norm: Optional[mcolors.Normalize] = None,
+    cell_energy_col: str = "cell_energy",
+    config: Optional[GeometryConfig] = None,
 ) -> None:
     """
     Adds cells to a given scene.
@@ -165,9 +248,14 @@ def add_cells_to_scene(
         layer_color_dict (Optional[dict], optional): A dictionary mapping layer names to colors. Defaults to None.
         colormap (Optional[Any], optional): The colormap used to map cell energy values to colors. Defaults to None.
         norm (Optional[mcolors.Normalize], optional): The normalization function used for the colormap. Defaults to None.
+        cell_energy_col (str, optional): The name of the column containing the cell energy values. Defaults to "cell_energy".
+        config (Optional[GeometryConfig], optional): The coordinate branch configuration. Defaults to the configuration installed with use_config or else the module level coordinate branches.
     """
+    # Resolve the configuration once for all cells
+    config = get_config(config)
+
     for row in df.itertuples():
-        cell = get_cell_from_row(row, unit_scale)
+        cell = get_cell_from_row(row, unit_scale, config)
 
         # Get color from color dict if provided, else use colormap
         if layer_color_dict:
@@ -176,34 +264,37 @@ def add_cells_to_scene(
             if colormap is None or norm is None:
                 raise ValueError("colormap and norm must be provided if layer_color_dict is not provided")
 
-            color = colormap(norm(row.cell_energy * unit_scale_energy))
+            color = colormap(norm(getattr(row, cell_energy_col) * unit_scale_energy))
 
         scene.add_cell(cell, facecolor=color, alpha=0.1, edgewidth=0.01)
 
 
-def get_cell_from_row(row: pd.DataFrame, unit_scale: float) -> Cell:
+def get_cell_from_row(row: pd.DataFrame, unit_scale: float, config: Optional[GeometryConfig] = None) -> Cell:
     """
     Converts a row of data into a Cell object based on the coordinate branch names.
 
     Args:
         row (pd.DataFrame): The row of data containing the coordinate information.
         unit_scale (float): The scaling factor to apply to the coordinate values.
+        config (GeometryConfig, optional): The coordinate branch configuration. Defaults to the configuration installed with use_config or else the module level coordinate branches.
 
     Returns:
         Cell: The corresponding Cell object based on the coordinate branch names.
     """
-    if getattr(row, pgs.cfg.config.coordinate_branch_names["XYZ"]):
+    coordinate_branch_names = get_config(config).coordinate_branch_names
+
+    if getattr(row, coordinate_branch_names["XYZ"]):
         cell = XYZCell(
             row.dx * unit_scale,
             row.dy * unit_scale,
             row.dz * unit_scale,
             XYZ(row.x * unit_scale, row.y * unit_scale, row.z * unit_scale),
         )
-    elif getattr(row, pgs.cfg.config.coordinate_branch_names["EtaPhiR"]):
+    elif getattr(row, coordinate_branch_names["EtaPhiR"]):
         cell = EtaPhiRCell(
             row.deta, row.dphi, row.dr * unit_scale, EtaPhiR(row.eta, row.phi, row.r * unit_scale)
         ).to_XYZ()
-    elif getattr(row, pgs.cfg.config.coordinate_branch_names["EtaPhiZ"]):
+    elif getattr(row, coordinate_branch_names["EtaPhiZ"]):
         cell = EtaPhiZCell(
             row.deta, row.dphi, row.dz * unit_scale, EtaPhiZ(row.eta, row.phi, row.z * unit_scale)
         ).to_XYZ()
@@ -104,14 +104,7 @@ class CellScene:
             ax.set_zlabel(axis_labels[2])
 
         for cell in tqdm(self.cell_list):
-            if type(cell.vertices[0]) is np.ndarray:
-                raw_vertices = cell.vertices
-            else:
-                # Convert to raw vertices if cell coordinates are provided in specificy coordinate system
-                raw_vertices = [(vert[0], vert[1], vert[2]) for vert in cell.vertices]
-            # Compute convex hull of cell vertices
-            hull = ConvexHull(raw_vertices)
-            triangularFaces = hull.points[hull.simplices]
+            triangularFaces = cell_triangles(cell)
 
             ax.add_collection3d(
                 Poly3DCollection(
@@ -124,3 +117,29 @@ class CellScene:
             )
 
         return ax
+
+
+def cell_triangles(cell: Cell) -> np.ndarray:
+    """
+    Returns the triangular faces of the convex hull of the cell vertices.
+
+    Parameters:
+    -----------
+    cell : Cell
+        The cell to triangulate.
+
+    Returns:
+    --------
+    np.ndarray
+        An array of shape (n_triangles, 3, 3) containing the vertices of the triangular faces.
+    """
+    if type(cell.vertices[0]) is np.ndarray:
+        raw_vertices = cell.vertices
+    else:
+        # Convert to raw vertices if cell coordinates are provided in specificy coordinate system
+        raw_vertices = np.array([(vert[0], vert[1], vert[2]) for vert in cell.vertices])
+    # Compute convex hull of cell vertices
+    hull = ConvexHull(raw_vertices)
+    triangular_faces: np.ndarray = hull.points[hull.simplices]
+
+    return triangular_faces
@@ -0,0 +1,69 @@
+import os
+
+import awkward as ak
+import numpy as np
+import pandas as pd
+import pytest
+import uproot
+from test_cell_energy_plot import test_load_geometry as atlas_cells_with_energy  # noqa: F401
+
+from pygeosimplify.vis.batch import (
+    EventDisplaySettings,
+    load_energy_table,
+    precompute_cell_meshes,
+    render_event_displays,
+)
+
+
+def test_precompute_cell_meshes(atlas_cells_with_energy):  # noqa: F811
+    df = atlas_cells_with_energy.iloc[:10]
+    triangles, offsets = precompute_cell_meshes(df, unit_scale=1e-3)
+
+    assert len(offsets) == len(df) + 1
+    assert offsets[-1] == len(triangles)
+    assert triangles.shape[1:] == (3, 3)
+
+
+def test_load_energy_table(atlas_cells_with_energy, tmpdir):  # noqa: F811
+    n_cells = len(atlas_cells_with_energy)
+    table = np.arange(3 * n_cells, dtype=np.float64).reshape(3, n_cells)
+
+    loaded_table, event_ids = load_energy_table(pd.DataFrame(table, index=[10, 20, 30]))
+    np.testing.assert_array_equal(loaded_table, table)
+    assert event_ids == [10, 20, 30]
+
+    with uproot.recreate(f"{tmpdir}/events.root") as file:
+        file["events"] = {"cell_energy": ak.Array(list(table))}
+
+    loaded_table, event_ids = load_energy_table(f"{tmpdir}/events.root", tree_name="events")
+    np.testing.assert_array_equal(loaded_table, table)
+    assert event_ids == [0, 1, 2]
+
+    with pytest.raises(ValueError):
+        load_energy_table(f"{tmpdir}/events.root")
+    with pytest.raises(ValueError):
+        load_energy_table(np.zeros(n_cells))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_render_event_displays(atlas_cells_with_energy, tmpdir, workers):  # noqa: F811
+    df = atlas_cells_with_energy
+    energy = df["cell_energy"].to_numpy()
+    # Second event is a scaled version of the first one, third event has no energy deposits above threshold
+    table = pd.DataFrame([energy, 2 * energy, np.zeros_like(energy)], index=[7, 8, 9])
+
+    output_paths = render_event_displays(
+        df,
+        table,
+        output_dir=f"{tmpdir}/displays",
+        workers=workers,
+        unit_scale=1e-3,
+        settings=EventDisplaySettings(unit_scale_energy=1e-3, energy_threshold=0.01, dpi=50),
+    )
+
+    assert output_paths == [f"{tmpdir}/displays/event_000007.png", f"{tmpdir}/displays/event_000008.png"]
+    assert all(os.path.exists(output_path) for output_path in output_paths)
+    assert not os.path.exists(f"{tmpdir}/displays/event_000009.png")
+
+    with pytest.raises(ValueError):
+        render_event_displays(df.iloc[:10], table, output_dir=f"{tmpdir}/displays")
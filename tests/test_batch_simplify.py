@@ -0,0 +1,125 @@
+import json
+import os
+from dataclasses import replace
+
+from pygeosimplify.cfg.config import GeometryConfig, use_config
+from pygeosimplify.cfg.test_data import ATLAS_CALO_DATA_DIR, ATLAS_CALO_DATA_TREE_NAME
+from pygeosimplify.io import cache
+from pygeosimplify.io.geo_handler import load_geometry
+from pygeosimplify.simplify import batch
+from pygeosimplify.simplify.batch import (
+    STREAMING_CACHE_WARNING,
+    SimplificationJob,
+    SimplificationSettings,
+    load_manifest,
+    run_batch,
+    run_job,
+)
+
+COORDINATE_BRANCHES = {"XYZ": "isXYZ", "EtaPhiR": "isEtaPhiR", "EtaPhiZ": "isEtaPhiZ", "RPhiZ": "isRPhiZ"}
+
+
+def test_load_manifest(tmpdir):
+    manifest = {
+        "settings": {"coordinate_branches": COORDINATE_BRANCHES, "layer_list": [0, 4, 21], "min_layer_dist": 2},
+        "jobs": [
+            {"file_path": "a.root", "tree_name": "tree", "output_path": "a.gdml"},
+            {"file_path": "b.root", "tree_name": "tree", "output_path": "b.gdml", "settings": {"min_layer_dist": 5}},
+        ],
+    }
+    manifest_path = f"{tmpdir}/manifest.json"
+    with open(manifest_path, "w") as manifest_file:
+        json.dump(manifest, manifest_file)
+
+    jobs = load_manifest(manifest_path)
+
+    assert len(jobs) == 2
+    assert jobs[0].settings.config == GeometryConfig.from_dict(COORDINATE_BRANCHES)
+    assert jobs[0].settings.layer_list == (0, 4, 21)
+    assert jobs[0].settings.min_layer_dist == 2
+    assert jobs[1].settings.min_layer_dist == 5
+    assert jobs[1].output_path == "b.gdml"
+
+
+def test_run_job(tmpdir):
+    settings = SimplificationSettings(config=GeometryConfig.from_dict(COORDINATE_BRANCHES), layer_list=(0, 4, 21))
+    job = SimplificationJob(ATLAS_CALO_DATA_DIR, ATLAS_CALO_DATA_TREE_NAME, f"{tmpdir}/detector.gdml", settings)
+
+    summary = run_job(job)
+
+    assert summary["status"] == "success"
+    assert summary["n_layers"] == 3
+    assert set(summary["timings"]) == {"load", "layers", "process", "save", "total"}
+    assert SimplificationSettings.from_dict(summary["settings"]) == settings
+    assert (tmpdir / "detector.gdml").exists()
+
+    # Without a configuration in the settings, the installed one is used
+    with use_config(settings.config):
+        summary = run_job(replace(job, settings=replace(settings, config=None)))
+    assert summary["status"] == "success"
+    assert SimplificationSettings.from_dict(summary["settings"]).config == settings.config
+
+
+def test_run_job_single_threaded(tmpdir, monkeypatch):
+    workers = []
+
+    def load_geometry_spy(*args, **kwargs):
+        workers.append(kwargs.get("workers"))
+        return load_geometry(*args, **kwargs)
+
+    monkeypatch.setattr(batch, "load_geometry", load_geometry_spy)
+    monkeypatch.setattr(cache, "load_geometry", load_geometry_spy)
+
+    # Jobs run in worker processes, so the geometries are loaded without thread pools, also when they are cached
+    settings = SimplificationSettings(config=GeometryConfig.from_dict(COORDINATE_BRANCHES), layer_list=(0, 4, 21))
+    for cache_dir in [None, f"{tmpdir}/cache"]:
+        job = SimplificationJob(
+            ATLAS_CALO_DATA_DIR,
+            ATLAS_CALO_DATA_TREE_NAME,
+            f"{tmpdir}/detector.gdml",
+            replace(settings, cache_dir=cache_dir),
+        )
+        assert run_job(job)["status"] == "success"
+    assert workers == [1, 1]
+
+
+def test_run_job_streaming(tmpdir, capsys):
+    settings = SimplificationSettings(
+        config=GeometryConfig.from_dict(COORDINATE_BRANCHES), layer_list=(0, 4, 21), streaming=True
+    )
+    job = SimplificationJob(ATLAS_CALO_DATA_DIR, ATLAS_CALO_DATA_TREE_NAME, f"{tmpdir}/detector.gdml", settings)
+
+    summary = run_job(job)
+
+    assert summary["status"] == "success"
+    assert summary["n_layers"] == 3
+    assert summary["n_cells"] == run_job(replace(job, settings=replace(settings, streaming=False)))["n_cells"]
+    assert (tmpdir / "detector.gdml").exists()
+
+    # Only the processing results of streamed geometries are cached, which is reported
+    capsys.readouterr()
+    summary = run_job(replace(job, settings=replace(settings, cache_dir=f"{tmpdir}/cache")))
+    assert summary["status"] == "success"
+    assert STREAMING_CACHE_WARNING in capsys.readouterr().out
+    assert os.listdir(f"{tmpdir}/cache") == ["process"]
+
+
+def test_run_batch(tmpdir):
+    settings = SimplificationSettings(config=GeometryConfig.from_dict(COORDINATE_BRANCHES), layer_list=(0, 4, 21))
+    jobs = [
+        SimplificationJob(ATLAS_CALO_DATA_DIR, ATLAS_CALO_DATA_TREE_NAME, f"{tmpdir}/detector_a.gdml", settings),
+        SimplificationJob(f"{tmpdir}/missing.root", ATLAS_CALO_DATA_TREE_NAME, f"{tmpdir}/missing.gdml", settings),
+        SimplificationJob(ATLAS_CALO_DATA_DIR, ATLAS_CALO_DATA_TREE_NAME, f"{tmpdir}/detector_b.gdml", settings),
+    ]
+
+    summary_path = f"{tmpdir}/summary.json"
+    summaries = run_batch(jobs, workers=2, max_tasks_per_child=1, retries=1, summary_path=summary_path)
+
+    assert [summary["status"] for summary in summaries] == ["success", "failed", "success"]
+    assert [summary["attempts"] for summary in summaries] == [1, 2, 1]
+    assert summaries[1]["error"]
+    assert (tmpdir / "detector_a.gdml").exists()
+    assert (tmpdir / "detector_b.gdml").exists()
+
+    with open(summary_path) as summary_file:
+        assert json.load(summary_file)["jobs"] == summaries
@@ -1,8 +1,11 @@
+import matplotlib.pyplot as plt
 import pytest
 from helpers import save_and_compare
 
 import pygeosimplify as pgs
 from pygeosimplify.cfg.test_data import CELL_ENERGY_DATA_DIR, CELL_ENERGY_DATA_TREE_NAME, REF_DIR
+from pygeosimplify.simplify.cylinder import Cylinder
+from pygeosimplify.vis.geo import cull_cells_by_energy
 
 
 @pytest.fixture(name="atlas_cells_with_energy")
@@ -34,3 +37,46 @@ def test_plot_cell_energy(atlas_cells_with_energy, tmpdir):
     )
 
     assert save_and_compare("atlas_shower_cell_energy.png", REF_DIR, tmpdir, tol=0.5)
+
+
+def test_plot_cell_energy_culling(atlas_cells_with_energy):
+    n_above_threshold = int((atlas_cells_with_energy["cell_energy"] * 1e-3 > 1).sum())
+
+    # Cells below threshold are not drawn
+    ax = pgs.plot_geometry(
+        atlas_cells_with_energy,
+        phi_range=[-4, 4],
+        cell_energy_col="cell_energy",
+        unit_scale_energy=1e-3,
+        energy_threshold=1,
+    )
+    assert len(ax.collections) == n_above_threshold
+    plt.close("all")
+
+    # Only the top k cells are drawn
+    ax = pgs.plot_geometry(atlas_cells_with_energy, cell_energy_col="cell_energy", top_k=5)
+    assert len(ax.collections) == 5
+    plt.close("all")
+
+    # Context cylinders are drawn with a face and two endcaps each
+    context_cylinders = {"0": Cylinder(1400, 1500, -3000, 3000, True), "3": Cylinder(2000, 2100, -3000, 3000, True)}
+    ax = pgs.plot_geometry(
+        atlas_cells_with_energy, cell_energy_col="cell_energy", top_k=5, context_cylinders=context_cylinders
+    )
+    assert len(ax.collections) == 5 + 3 * len(context_cylinders)
+    plt.close("all")
+
+    with pytest.raises(ValueError):
+        pgs.plot_geometry(atlas_cells_with_energy, cell_energy_col="cell_energy", energy_threshold=1e9)
+
+
+def test_cull_cells_by_energy(atlas_cells_with_energy):
+    df = atlas_cells_with_energy
+    culled_df = cull_cells_by_energy(df, "cell_energy", energy_threshold=50, top_k=10)
+
+    expected_index = df[df["cell_energy"] > 50].nlargest(10, "cell_energy").index
+    assert sorted(culled_df.index) == sorted(expected_index)
+    # Original cell order is kept
+    assert list(culled_df.index) == sorted(culled_df.index)
+    # Without threshold and top k, nothing is culled
+    assert cull_cells_by_energy(df, "cell_energy").equals(df)
@@ -0,0 +1,97 @@
+import json
+import os
+
+import pytest
+
+from pygeosimplify.cfg.test_data import ATLAS_CALO_DATA_DIR, ATLAS_CALO_DATA_TREE_NAME
+from pygeosimplify.cli import main
+
+COMMON_ARGS = [
+    "--tree",
+    ATLAS_CALO_DATA_TREE_NAME,
+    "-c",
+    "XYZ=isXYZ",
+    "-c",
+    "EtaPhiR=isEtaPhiR",
+    "-c",
+    "EtaPhiZ=isEtaPhiZ",
+    "-c",
+    "RPhiZ=isRPhiZ",
+    "--layers",
+    "0",
+    "4",
+    "21",
+]
+
+
+def test_cli_simplify(tmpdir):
+    summary_path = f"{tmpdir}/summary.json"
+    exit_code = main(
+        [
+            "simplify",
+            ATLAS_CALO_DATA_DIR,
+            "-o",
+            str(tmpdir),
+            "--summary",
+            summary_path,
+            "--cache-dir",
+            f"{tmpdir}/cache",
+            "--branches",
+            *COMMON_ARGS,
+        ]
+    )
+
+    assert exit_code == 0
+    gdml_name = f"{os.path.splitext(os.path.basename(ATLAS_CALO_DATA_DIR))[0]}.gdml"
+    assert (tmpdir / gdml_name).exists()
+    assert len([file_name for file_name in os.listdir(f"{tmpdir}/cache") if file_name.endswith(".pgsgeo")]) == 1
+    assert len(os.listdir(f"{tmpdir}/cache/layers")) == 3
+
+    with open(summary_path) as summary_file:
+        summary = json.load(summary_file)
+    assert summary["jobs"][0]["settings"]["branches"] == []
+    assert summary["jobs"][0]["layer_cache"] == {"hits": 0, "misses": 3}
+
+
+def test_cli_check_overlaps(capsys):
+    assert main(["check-overlaps", ATLAS_CALO_DATA_DIR, *COMMON_ARGS]) == 0
+    assert main(["check-overlaps", ATLAS_CALO_DATA_DIR, "--cyl-type", "thinned", *COMMON_ARGS]) == 0
+    assert main(["check-overlaps", ATLAS_CALO_DATA_DIR, "--streaming", *COMMON_ARGS]) == 0
+
+
+def test_cli_plot(tmpdir):
+    output_path = f"{tmpdir}/geometry.png"
+    assert main(["plot", ATLAS_CALO_DATA_DIR, "-o", output_path, "--eta-range", "0", "0.1", *COMMON_ARGS]) == 0
+    assert os.path.exists(output_path)
+
+
+def test_cli_bench_with_profile(tmpdir, capsys):
+    profile_path = f"{tmpdir}/bench.prof"
+    trace_path = f"{tmpdir}/bench.json"
+    assert (
+        main(
+            [
+                "bench",
+                ATLAS_CALO_DATA_DIR,
+                "--repeat",
+                "2",
+                "--profile",
+                profile_path,
+                "--trace",
+                trace_path,
+                *COMMON_ARGS,
+            ]
+        )
+        == 0
+    )
+    assert os.path.exists(profile_path)
+    assert "process" in capsys.readouterr().out
+
+    with open(trace_path) as trace_file:
+        trace_events = json.load(trace_file)["traceEvents"]
+    assert sum(event["name"] == "run_job" for event in trace_events) == 2
+
+
+def test_cli_invalid_coordinate_branch():
+    with pytest.raises(SystemExit):
+        main(["check-overlaps", ATLAS_CALO_DATA_DIR, "--tree", ATLAS_CALO_DATA_TREE_NAME, "-c", "XYZisXYZ"])
@@ -1,8 +1,14 @@
+import matplotlib.pyplot as plt
+import numpy as np
 import pytest
 from helpers import save_and_compare
 from test_load_geo import test_load_geometry as atlas_calo_geo  # noqa: F401
 
 from pygeosimplify.cfg.test_data import REF_DIR
+from pygeosimplify.geo import kernels
+from pygeosimplify.geo.kernels import rz_extent
+from pygeosimplify.geo.vertices import COORDINATE_COLUMNS, cell_vertices_rz
+from pygeosimplify.simplify.cylinder import Cylinder
 from pygeosimplify.simplify.layer import GeoLayer
 
 
@@ -88,3 +94,81 @@ def test_geo_endcap_layer_23(atlas_calo_geo, tmpdir):  # noqa: F811
     assert pytest.approx(thinned_cyl.rmax) == 458.8423527799789
     assert pytest.approx(thinned_cyl.zmin) == 5863.9501953125
     assert pytest.approx(thinned_cyl.zmax) == 5873.9501953125
+
+
+@pytest.mark.parametrize("layer_idx", [14, 5, 23])
+def test_vectorized_cell_vertices_rz(atlas_calo_geo, layer_idx):  # noqa: F811
+    layer = GeoLayer(atlas_calo_geo, layer_idx=layer_idx)
+
+    r_values, z_values = cell_vertices_rz(layer.df, layer.coordinate_system)
+    expected_r_values, expected_z_values = layer._cell_vertices_rz(layer.cells)
+
+    np.testing.assert_allclose(r_values.ravel(), expected_r_values, rtol=1e-12)
+    np.testing.assert_allclose(z_values.ravel(), expected_z_values, rtol=1e-12)
+
+
+@pytest.mark.parametrize("layer_idx", [14, 5, 23])
+def test_rz_extent(atlas_calo_geo, layer_idx):  # noqa: F811
+    layer = GeoLayer(atlas_calo_geo, layer_idx=layer_idx)
+    # Cell objects are only created when needed
+    assert layer._cells is None
+
+    # The extent computed from the cell columns is identical to the one from the cell objects
+    assert rz_extent(layer.df, layer.coordinate_system, use_numba=False) == layer._min_max_rz_extent(layer.cells)
+    assert layer.extent == layer._min_max_rz_extent(layer.cells)
+
+    # The kernels, run uncompiled on a subset of the cells, agree with the NumPy implementation
+    df = layer.df.iloc[:200]
+    pos_columns, size_columns = COORDINATE_COLUMNS[layer.coordinate_system]
+    columns = [df[column].to_numpy() for column in (*pos_columns, *size_columns)]
+    coordinate_system_code = kernels._COORDINATE_SYSTEM_CODES[layer.coordinate_system]
+    expected_extent = rz_extent(df, layer.coordinate_system, use_numba=False)
+
+    extent = kernels._rz_extent_kernel(*columns, coordinate_system_code)
+    assert extent == pytest.approx(tuple(expected_extent.values()), rel=1e-12)
+    is_extreme = kernels._extreme_cells_kernel(*columns, coordinate_system_code, np.array(extent), 1e-9)
+    assert is_extreme.any()
+    assert rz_extent(df[is_extreme], layer.coordinate_system, use_numba=False) == expected_extent
+
+
+def test_rz_extent_numba(atlas_calo_geo):  # noqa: F811
+    pytest.importorskip("numba")
+
+    # The final values are computed by NumPy, so the results are identical despite differences between the
+    # transcendental functions of NumPy and Numba
+    for layer_idx in range(24):
+        layer = GeoLayer(atlas_calo_geo, layer_idx=layer_idx)
+        assert rz_extent(layer.df, layer.coordinate_system, use_numba=True) == rz_extent(
+            layer.df, layer.coordinate_system, use_numba=False
+        )
+
+
+def test_rz_extent_without_numba(atlas_calo_geo, monkeypatch):  # noqa: F811
+    monkeypatch.setattr(kernels, "HAS_NUMBA", False)
+    layer = GeoLayer(atlas_calo_geo, layer_idx=14)
+
+    with pytest.raises(ImportError):
+        rz_extent(layer.df, layer.coordinate_system, use_numba=True)
+    with pytest.raises(ValueError):
+        rz_extent(layer.df.iloc[:0], layer.coordinate_system, use_numba=False)
+
+
+def test_plot_cell_vertices_rz_density(atlas_calo_geo):  # noqa: F811
+    layer = GeoLayer(atlas_calo_geo, layer_idx=14)
+    processed_cylinders = {
+        "14": Cylinder(3500, 3600, -2800, 2800, True),
+        "15": Cylinder(3800, 3900, -2800, 2800, True),
+    }
+
+    ax = layer.plot_cell_vertices_rz(
+        density=True, bins=(100, 50), show_envelope=True, show_thinned=True, processed_cylinders=processed_cylinders
+    )
+
+    assert len(ax.images) == 1
+    assert ax.images[0].get_array().shape == (50, 100)
+    # Number of vertices in the raster is independent of the binning
+    assert ax.images[0].get_array().sum() == 8 * len(layer.df)
+    # Envelope and thinned cylinder of the continuous layer, and the processed cylinder of layer 14
+    assert layer.is_continuous_in_z()
+    assert len(ax.patches) == 3
+    plt.close(ax.figure)
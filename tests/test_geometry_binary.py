@@ -0,0 +1,165 @@
+import filecmp
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+import uproot
+from test_load_geo import test_load_geometry as atlas_calo_geo  # noqa: F401
+
+import pygeosimplify as pgs
+from pygeosimplify.cfg.test_data import ATLAS_CALO_DATA_DIR, ATLAS_CALO_DATA_TREE_NAME
+from pygeosimplify.geo.query import GeometryIndex, PartitionedGeometry
+from pygeosimplify.io import binary
+from pygeosimplify.io.binary import (
+    convert_geometry_binary,
+    load_geometry_binary,
+    save_geometry_binary,
+)
+from pygeosimplify.io.cache import load_geometry_cached
+from pygeosimplify.io.geo_handler import compact_geometry
+from pygeosimplify.simplify.analysis import LayerCache
+from pygeosimplify.simplify.layer import GeoLayer
+
+
+def test_binary_geometry(atlas_calo_geo, tmpdir):  # noqa: F811
+    file_path = f"{tmpdir}/geometry.pgsgeo"
+    # Shuffle the cells, such that the layers are not contiguous in the saved geometry
+    df = atlas_calo_geo.sample(frac=1, random_state=42)
+    save_geometry_binary(df, file_path)
+
+    geometry = load_geometry_binary(file_path)
+    assert len(geometry) == len(df)
+    np.testing.assert_array_equal(geometry.layers, np.arange(24))
+    assert geometry.coordinate_systems[0] == "EtaPhiR"
+    assert geometry.coordinate_systems[4] == "EtaPhiZ"
+    assert geometry.coordinate_systems[21] == "XYZ"
+    assert geometry.coordinate_branches["XYZ"] == "isXYZ"
+
+    # The cells of each layer keep their order and index
+    for layer_idx in [0, 14, 23]:
+        layer_df = geometry.layer_df(layer_idx)
+        assert layer_df.equals(df[df["layer"] == layer_idx])
+        assert layer_df.index.equals(df[df["layer"] == layer_idx].index)
+    assert geometry.df.sort_index().equals(atlas_calo_geo)
+
+    # The layers are read-only views of the mapped file
+    layer_df = geometry.layer_df(14)
+    assert np.shares_memory(layer_df["eta"].to_numpy(), geometry.df["eta"].to_numpy())
+    assert not layer_df["eta"].to_numpy().flags.writeable
+
+    layer, mapped_layer = GeoLayer(atlas_calo_geo, 14), GeoLayer(geometry.layer_df(14), 14)
+    assert mapped_layer.get_cell_envelope() == layer.get_cell_envelope()
+
+    with pytest.raises(ValueError):
+        geometry.layer_df(100)
+
+
+def test_binary_geometry_compact(atlas_calo_geo, tmpdir):  # noqa: F811
+    compact_df = compact_geometry(atlas_calo_geo)
+    save_geometry_binary(compact_df, f"{tmpdir}/geometry.pgsgeo")
+
+    geometry = load_geometry_binary(f"{tmpdir}/geometry.pgsgeo")
+    assert (geometry.df.dtypes == compact_df.dtypes).all()
+    assert geometry.df.sort_index().equals(compact_df)
+
+
+def test_binary_geometry_invalid(atlas_calo_geo, tmpdir):  # noqa: F811
+    with pytest.raises(ValueError):
+        save_geometry_binary(atlas_calo_geo.assign(name="cell"), f"{tmpdir}/geometry.pgsgeo")
+
+    with open(f"{tmpdir}/invalid.pgsgeo", "wb") as invalid_file:
+        invalid_file.write(b"invalid")
+    with pytest.raises(ValueError):
+        load_geometry_binary(f"{tmpdir}/invalid.pgsgeo")
+
+
+def test_load_geometry_cached(atlas_calo_geo, tmpdir):  # noqa: F811
+    for _ in range(2):
+        df = load_geometry_cached(ATLAS_CALO_DATA_DIR, ATLAS_CALO_DATA_TREE_NAME, f"{tmpdir}/cache")
+        assert df.equals(atlas_calo_geo)
+    assert len(tmpdir.join("cache").listdir()) == 1
+
+    # By default, the geometry is an ordinary copy that can be modified in place
+    df.loc[df.layer == 4, "z"] += 1
+    assert (df.z - atlas_calo_geo.z)[atlas_calo_geo.layer == 4].eq(1).all()
+    assert load_geometry_cached(ATLAS_CALO_DATA_DIR, ATLAS_CALO_DATA_TREE_NAME, f"{tmpdir}/cache").equals(
+        atlas_calo_geo
+    )
+
+    # The mapped geometry is shared without copying and is read-only
+    mapped_df = load_geometry_cached(ATLAS_CALO_DATA_DIR, ATLAS_CALO_DATA_TREE_NAME, f"{tmpdir}/cache", memory_map=True)
+    assert mapped_df.sort_index().equals(atlas_calo_geo)
+    assert not mapped_df["z"].to_numpy().flags.writeable
+
+
+def test_convert_geometry_binary(atlas_calo_geo, tmpdir):  # noqa: F811
+    save_geometry_binary(atlas_calo_geo, f"{tmpdir}/saved.pgsgeo")
+
+    # The converted file is identical to the saved one, independent of the chunking
+    for step_size in [5000, "100 MB"]:
+        geometry = convert_geometry_binary(
+            ATLAS_CALO_DATA_DIR, f"{tmpdir}/converted.pgsgeo", ATLAS_CALO_DATA_TREE_NAME, step_size=step_size
+        )
+        assert filecmp.cmp(f"{tmpdir}/saved.pgsgeo", f"{tmpdir}/converted.pgsgeo", shallow=False)
+    assert geometry.df.sort_index().equals(atlas_calo_geo)
+
+    # Several sources are numbered consecutively, as in the loaded geometry
+    parts = [atlas_calo_geo[atlas_calo_geo["layer"] % 2 == 0], atlas_calo_geo[atlas_calo_geo["layer"] % 2 == 1]]
+    for part_idx, part in enumerate(parts):
+        with uproot.recreate(f"{tmpdir}/subsystem_{part_idx}.root") as file:
+            file["subsystem"] = {column: part[column].to_numpy() for column in part.columns}
+    sources = [f"{tmpdir}/subsystem_0.root", f"{tmpdir}/subsystem_1.root"]
+    geometry = convert_geometry_binary(sources, f"{tmpdir}/sources.pgsgeo", "subsystem", branches=[], step_size=10000)
+    df = pgs.load_geometry(sources, "subsystem", branches=[])
+    assert "id" not in geometry.df.columns
+    assert geometry.df.sort_index().equals(df[geometry.df.columns])
+
+    with uproot.recreate(f"{tmpdir}/subsystem_2.root") as file:
+        file["subsystem"] = {column: parts[0][column].to_numpy() for column in parts[0].columns if column != "id"}
+    with pytest.raises(Exception, match="Branches of source"):
+        convert_geometry_binary([*sources, f"{tmpdir}/subsystem_2.root"], f"{tmpdir}/invalid.pgsgeo", "subsystem")
+
+
+def test_convert_geometry_binary_failure(tmpdir, monkeypatch):
+    def _get_chunk_rows(*args):
+        raise RuntimeError("Conversion failed")
+
+    # A failing conversion leaves neither the output nor the partially written temporary file behind
+    monkeypatch.setattr(binary, "_get_chunk_rows", _get_chunk_rows)
+    with pytest.raises(RuntimeError, match="Conversion failed"):
+        convert_geometry_binary(ATLAS_CALO_DATA_DIR, f"{tmpdir}/converted.pgsgeo", ATLAS_CALO_DATA_TREE_NAME)
+    assert tmpdir.listdir() == []
+
+
+def test_binary_geometry_partitions(atlas_calo_geo, tmpdir):  # noqa: F811
+    save_geometry_binary(atlas_calo_geo, f"{tmpdir}/geometry.pgsgeo")
+    geometry = load_geometry_binary(f"{tmpdir}/geometry.pgsgeo")
+    index = GeometryIndex(atlas_calo_geo)
+    assert isinstance(geometry, PartitionedGeometry)
+    assert isinstance(index, PartitionedGeometry)
+
+    # Selections are those of the index, grouped by layer
+    for kwargs in [
+        {},
+        {"layer_list": [14, 2, 100]},
+        {"layer_list": [0, 1], "eta_range": [0, 1], "phi_range": [0, 0.2]},
+        {"r_range": [1500, 2000], "z_range": [-100, 100]},
+    ]:
+        selected_df = geometry.select(**kwargs)
+        assert selected_df.sort_index().equals(index.select(**kwargs))
+    assert len(geometry.select(layer_list=[100])) == 0
+
+    # Layers and their analyses only read the cells of the layer
+    layer, mapped_layer = GeoLayer(atlas_calo_geo, 14), GeoLayer(geometry, 14)
+    assert mapped_layer.df.equals(layer.df)
+    assert mapped_layer.get_cell_envelope() == layer.get_cell_envelope()
+    cache = LayerCache(f"{tmpdir}/cache")
+    assert cache.get_analysis(geometry, 14) == cache.get_analysis(atlas_calo_geo, 14)
+    assert cache.hits == 1
+
+    kwargs = {"layer_list": [14], "eta_range": [0, 1], "phi_range": [0, 0.2]}
+    ax = pgs.plot_geometry(atlas_calo_geo, **kwargs)
+    mapped_ax = pgs.plot_geometry(geometry, **kwargs)
+    assert len(mapped_ax.collections) == len(ax.collections) > 0
+    assert mapped_ax.get_xlim() == ax.get_xlim()
+    plt.close("all")
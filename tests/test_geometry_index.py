@@ -0,0 +1,77 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+from test_load_geo import test_load_geometry as atlas_calo_geo  # noqa: F401
+
+import pygeosimplify as pgs
+from pygeosimplify.geo.query import GeometryIndex
+from pygeosimplify.simplify.layer import GeoLayer
+from pygeosimplify.vis.geo import filter_df_eta_phi
+
+
+@pytest.fixture(name="geo_index")
+def test_geometry_index(atlas_calo_geo):  # noqa: F811
+    geo_index = GeometryIndex(atlas_calo_geo)
+
+    assert len(geo_index) == len(atlas_calo_geo)
+    np.testing.assert_array_equal(geo_index.layers, np.arange(24))
+
+    return geo_index
+
+
+def test_layer_df(atlas_calo_geo, geo_index):  # noqa: F811
+    for layer_idx in [0, 14, 23]:
+        assert geo_index.layer_df(layer_idx).equals(atlas_calo_geo[atlas_calo_geo["layer"] == layer_idx])
+
+    with pytest.raises(ValueError):
+        geo_index.layer_df(100)
+
+
+@pytest.mark.parametrize(
+    "ranges",
+    [
+        {},
+        {"layer_list": [0, 5, 21]},
+        {"eta_range": [-1, 2.5], "phi_range": [0, 0.1]},
+        {"layer_list": [1, 2, 100], "eta_range": [0.5, 0.6]},
+        {"r_range": [1500, 2000], "z_range": [-100, 3000]},
+        {"phi_range": [1, 1]},
+    ],
+)
+def test_query(atlas_calo_geo, geo_index, ranges):  # noqa: F811
+    df = atlas_calo_geo
+    mask = np.ones(len(df), dtype=bool)
+    if "layer_list" in ranges:
+        mask &= df["layer"].isin(ranges["layer_list"]).to_numpy()
+    for key in ["eta", "phi", "r", "z"]:
+        if f"{key}_range" in ranges:
+            value_range = ranges[f"{key}_range"]
+            mask &= ((df[key] > value_range[0]) & (df[key] < value_range[1])).to_numpy()
+
+    np.testing.assert_array_equal(geo_index.query(**ranges), np.flatnonzero(mask))
+    assert geo_index.select(**ranges).equals(df[mask])
+
+
+def test_select_matches_filter(atlas_calo_geo, geo_index):  # noqa: F811
+    eta_range, phi_range = [-5, 5], [0, 0.1]
+    expected_df = filter_df_eta_phi(atlas_calo_geo[atlas_calo_geo["layer"].isin([0, 4])], eta_range, phi_range)
+
+    assert geo_index.select(layer_list=[0, 4], eta_range=eta_range, phi_range=phi_range).equals(expected_df)
+
+
+def test_geo_layer_from_index(atlas_calo_geo, geo_index):  # noqa: F811
+    layer = GeoLayer(atlas_calo_geo, layer_idx=14)
+    indexed_layer = GeoLayer(geo_index, layer_idx=14)
+
+    assert indexed_layer.df.equals(layer.df)
+    assert indexed_layer.extent == layer.extent
+
+
+def test_plot_geometry_from_index(atlas_calo_geo, geo_index):  # noqa: F811
+    kwargs = {"layer_list": [14], "eta_range": [0, 1], "phi_range": [0, 0.2]}
+    ax = pgs.plot_geometry(atlas_calo_geo, **kwargs)
+    indexed_ax = pgs.plot_geometry(geo_index, **kwargs)
+
+    assert len(indexed_ax.collections) == len(ax.collections) > 0
+    assert indexed_ax.get_xlim() == ax.get_xlim()
+    plt.close("all")
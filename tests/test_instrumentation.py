@@ -0,0 +1,67 @@
+import time
+
+from test_load_geo import test_load_geometry as atlas_calo_geo  # noqa: F401
+
+from pygeosimplify.simplify.detector import SimplifiedDetector
+from pygeosimplify.simplify.layer import GeoLayer
+from pygeosimplify.utils.instrumentation import Instrumentation, count, instrument
+
+
+def test_instrumentation():
+    events = []
+    instrumentation = Instrumentation(callback=lambda name, data: events.append((name, data)))
+
+    # Counting without installed instrumentation is a no-op
+    count("calls")
+
+    for _ in range(2):
+        with instrumentation.stage("sleep"):
+            time.sleep(0.01)
+            count("calls")
+
+    with instrument(instrumentation):
+        count("calls", 3)
+
+    report = instrumentation.report()
+    assert report["stages"]["sleep"]["calls"] == 2
+    assert report["stages"]["sleep"]["wall_time"] >= 0.02
+    assert report["stages"]["sleep"]["cpu_time"] >= 0
+    assert report["counters"] == {"calls": 5}
+    assert report["total"]["wall_time"] == report["stages"]["sleep"]["wall_time"]
+
+    assert [name for name, _ in events] == ["sleep", "sleep"]
+    assert events[0][1]["calls"] == 1
+    assert events[1][1]["counters"] == {"calls": 2}
+
+    instrumentation.reset()
+    assert instrumentation.report()["counters"] == {}
+
+
+def test_detector_report(atlas_calo_geo, tmpdir):  # noqa: F811
+    stage_names = []
+    detector = SimplifiedDetector(callback=lambda name, data: stage_names.append(name))
+    layer_list = [0, 4, 21]
+    for layer_idx in layer_list:
+        detector.add_layer(GeoLayer(atlas_calo_geo, layer_idx))
+    detector.process()
+    detector.save_to_gdml(output_path=f"{tmpdir}/detector.gdml")
+
+    report = detector.report
+    assert list(report["stages"]) == [
+        "add_layer",
+        "resolve_thinned_overlaps",
+        "symmetrize",
+        "post_process",
+        "merge_barrel",
+        "save_to_gdml",
+    ]
+    assert report["stages"]["add_layer"]["calls"] == 3
+    assert stage_names == [*["add_layer"] * 3, *list(report["stages"])[1:]]
+
+    counters = report["counters"]
+    assert counters["layers_added"] == 3
+    assert counters["cells_processed"] == sum((atlas_calo_geo.layer == idx).sum() for idx in layer_list)
+    # One overlap engine call per pair of thinned cylinders, each building a world
+    assert counters["overlap_engine_calls"] == 3
+    assert counters["world_builds"] == counters["overlap_engine_calls"] + 1
+    assert counters.get("overlap_resolution_iterations", 0) == 0
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from test_load_geo import test_load_geometry as atlas_calo_geo  # noqa: F401
+
+from pygeosimplify.geo.query import GeometryIndex
+from pygeosimplify.simplify.analysis import LayerAnalysis, analyze_layers, layers_continuous_in_z, table_to_analyses
+from pygeosimplify.simplify.detector import SimplifiedDetector
+from pygeosimplify.simplify.layer import GeoLayer
+
+
+def test_analyze_layers(atlas_calo_geo):  # noqa: F811
+    # Shuffle the cells, such that the layers are not contiguous
+    df = atlas_calo_geo.sample(frac=1, random_state=42)
+    table = analyze_layers(df, thinned_layer_width=20)
+    assert list(table.index) == list(range(24))
+    assert table["n_cells"].sum() == len(df)
+
+    index = GeometryIndex(df)
+    for layer_idx, analysis in zip(table.index, table_to_analyses(table)):
+        layer = GeoLayer(index, layer_idx, thinned_layer_width=20)
+        assert analysis == LayerAnalysis.from_layer(layer)
+        assert table.loc[layer_idx, "coordinate_system"] == layer.coordinate_system
+        np.testing.assert_array_equal(
+            table.loc[layer_idx, ["rmin", "rmax", "zmin", "zmax"]].to_numpy(dtype=float), list(layer.extent.values())
+        )
+        assert table.loc[layer_idx, "thinned_rmin"] == layer.thinned_cylinder.rmin
+        assert table.loc[layer_idx, "thinned_zmax"] == layer.thinned_cylinder.zmax
+
+    # The table can be added to a detector directly
+    layer_list = [2, 5, 6, 17, 18, 19]
+    detector, table_detector = SimplifiedDetector(), SimplifiedDetector()
+    detector.add_layers([GeoLayer(atlas_calo_geo, layer_idx) for layer_idx in layer_list])
+    table_detector.add_layers(analyze_layers(atlas_calo_geo[atlas_calo_geo["layer"].isin(layer_list)]))
+    assert list(table_detector.layers) == [str(layer_idx) for layer_idx in layer_list]
+    detector.process()
+    table_detector.process()
+    assert table_detector.cylinders.processed == detector.cylinders.processed
+
+    with pytest.raises(ValueError):
+        analyze_layers(atlas_calo_geo[atlas_calo_geo.z > 0])
+
+
+def test_layers_continuous_in_z(atlas_calo_geo):  # noqa: F811
+    distance_thresholds = [0, 10, 50, 100, 200]
+    flags = layers_continuous_in_z(atlas_calo_geo, distance_thresholds)
+    assert list(flags.columns) == distance_thresholds
+    assert list(flags.index) == list(range(24))
+
+    index = GeometryIndex(atlas_calo_geo)
+    for layer_idx in flags.index:
+        layer = GeoLayer(index, layer_idx)
+        for distance_threshold in distance_thresholds:
+            assert flags.loc[layer_idx, distance_threshold] == layer.is_continuous_in_z(distance_threshold)
+    # Some layers are only continuous for larger thresholds
+    assert flags[0].sum() < flags[200].sum()
+
+    assert layers_continuous_in_z(atlas_calo_geo, 100).equals(flags[100].rename("is_continuous_in_z"))
+
+    # Any sequence of thresholds gives one column per threshold
+    for thresholds in [(10, 100), np.array([10, 100])]:
+        assert layers_continuous_in_z(atlas_calo_geo, thresholds).equals(flags[[10, 100]])
@@ -0,0 +1,70 @@
+import os
+
+import pytest
+from test_load_geo import test_load_geometry as atlas_calo_geo  # noqa: F401
+
+from pygeosimplify.geo.query import GeometryIndex
+from pygeosimplify.io.cache import write_json_atomic
+from pygeosimplify.simplify import analysis
+from pygeosimplify.simplify.analysis import LayerAnalysis, LayerCache
+from pygeosimplify.simplify.layer import GeoLayer
+
+
+def test_layer_cache(atlas_calo_geo, tmpdir, monkeypatch):  # noqa: F811
+    cache = LayerCache(f"{tmpdir}/layers")
+    layer_list = [0, 4, 21]
+
+    analyses = [cache.get_analysis(atlas_calo_geo, layer_idx) for layer_idx in layer_list]
+    assert (cache.hits, cache.misses) == (0, 3)
+    assert analyses[0] == LayerAnalysis.from_layer(GeoLayer(atlas_calo_geo, 0))
+
+    # Analyses are reused, also for a GeometryIndex of the same geometry and when unrelated columns are added
+    index = GeometryIndex(atlas_calo_geo.assign(energy=1.0))
+    assert [cache.get_analysis(index, layer_idx) for layer_idx in layer_list] == analyses
+    assert (cache.hits, cache.misses) == (3, 3)
+
+    # Only changed layers and layers analyzed with different settings are analyzed again
+    df = atlas_calo_geo.copy()
+    df.loc[df.layer == 4, "z"] += 10
+    assert cache.get_analysis(df, 0) == analyses[0]
+    assert cache.get_analysis(df, 4).envelope.zmax == analyses[1].envelope.zmax + 10
+    assert cache.get_analysis(df, 21, thinned_layer_width=20).thinned_layer_width == 20
+    assert (cache.hits, cache.misses) == (4, 5)
+    assert len(os.listdir(f"{tmpdir}/layers")) == 5
+
+    # Analyses stored by a previous version of the analysis are not reused
+    monkeypatch.setattr(analysis, "LAYER_ANALYSIS_VERSION", analysis.LAYER_ANALYSIS_VERSION + 1)
+    assert cache.get_analysis(atlas_calo_geo, 0) == analyses[0]
+    assert (cache.hits, cache.misses) == (4, 6)
+
+
+def test_layer_cache_eviction(atlas_calo_geo, tmpdir):  # noqa: F811
+    cache = LayerCache(f"{tmpdir}/layers")
+    cache.get_analysis(atlas_calo_geo, 0)
+    entry_size = os.path.getsize(os.path.join(cache.cache_dir, os.listdir(cache.cache_dir)[0]))
+
+    # The least recently used analyses are evicted once the store exceeds its maximum size
+    cache.max_size = int(2.5 * entry_size)
+    cache.get_analysis(atlas_calo_geo, 4)
+    # Timestamps may be too coarse to order the accesses, so mark the analysis of layer 4 as least recently used
+    os.utime(
+        os.path.join(cache.cache_dir, f"{cache.key(atlas_calo_geo[atlas_calo_geo.layer == 4], 4)}.json"), ns=(0, 0)
+    )
+    cache.get_analysis(atlas_calo_geo, 0)
+    cache.get_analysis(atlas_calo_geo, 21)
+    assert len(os.listdir(cache.cache_dir)) == 2
+
+    # The analysis of layer 0 was used more recently and is kept
+    cache.get_analysis(atlas_calo_geo, 0)
+    assert (cache.hits, cache.misses) == (2, 3)
+
+
+def test_write_json_atomic(tmpdir):
+    write_json_atomic(f"{tmpdir}/entry.json", {"value": 1})
+
+    # A failing write leaves the previous entry and no temporary file behind
+    with pytest.raises(TypeError):
+        write_json_atomic(f"{tmpdir}/entry.json", {"value": object()})
+    assert os.listdir(tmpdir) == ["entry.json"]
+    with open(f"{tmpdir}/entry.json") as entry_file:
+        assert entry_file.read() == '{"value": 1}'
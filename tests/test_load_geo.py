@@ -1,9 +1,23 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
 import pytest
 import uproot
 
 import pygeosimplify as pgs
-from pygeosimplify.cfg.config import reset_coordinate_branches, set_coordinate_branch
+from pygeosimplify.cfg.config import (
+    GeometryConfig,
+    get_config,
+    reset_coordinate_branches,
+    set_coordinate_branch,
+    use_config,
+)
 from pygeosimplify.cfg.test_data import ATLAS_CALO_DATA_DIR, ATLAS_CALO_DATA_TREE_NAME
+from pygeosimplify.geo.query import GeometryIndex
+from pygeosimplify.io.geo_handler import check_geo_consistency, compact_geometry
+from pygeosimplify.simplify.layer import GeoLayer
 
 
 @pytest.fixture(name="atlas_calo_geo")
@@ -73,3 +87,177 @@ def test_load_invalid_geometry(tmpdir):
 
     assert {"eta", "phi", "z", "deta", "dphi", "dz"} <= set(pgs.cfg.config.required_branches)
     reset_coordinate_branches()
+
+
+def test_set_coordinate_branch_does_not_duplicate_required_branches():
+    reset_coordinate_branches()
+    pgs.set_coordinate_branch("XYZ", "isXYZ")
+    pgs.set_coordinate_branch("XYZ", "isXYZ")
+    pgs.set_coordinate_branch("EtaPhiR", "isEtaPhiR")
+
+    required_branches = pgs.cfg.config.required_branches
+    assert len(required_branches) == len(set(required_branches))
+    reset_coordinate_branches()
+
+
+def test_geometry_config():
+    config = GeometryConfig.from_dict({"XYZ": "isXYZ", "EtaPhiR": "isEtaPhiR"})
+
+    assert config == GeometryConfig((("XYZ", "isXYZ"), ("EtaPhiR", "isEtaPhiR")))
+    assert hash(config) == hash(GeometryConfig.from_dict({"XYZ": "isXYZ", "EtaPhiR": "isEtaPhiR"}))
+    assert config.coordinate_branch_names == {"XYZ": "isXYZ", "EtaPhiR": "isEtaPhiR"}
+
+    # The order in which the coordinate branches are given does not matter
+    reordered_config = GeometryConfig.from_dict({"EtaPhiR": "isEtaPhiR", "XYZ": "isXYZ"})
+    assert reordered_config == config
+    assert hash(reordered_config) == hash(config)
+    assert reordered_config.coordinate_branches == config.coordinate_branches
+    assert len(config.required_branches) == len(set(config.required_branches))
+    assert {"isXYZ", "dx", "isEtaPhiR", "deta"} <= set(config.required_branches)
+
+    updated_config = config.with_coordinate_branch("RPhiZ", "isRPhiZ")
+    assert "RPhiZ" not in config.coordinate_branch_names
+    assert updated_config.coordinate_branch_names["RPhiZ"] == "isRPhiZ"
+
+    with pytest.raises(ValueError):
+        GeometryConfig.from_dict({"InvalidSystem": "isInvalid"})
+
+
+def test_use_config():
+    reset_coordinate_branches()
+    pgs.set_coordinate_branch("XYZ", "isXYZ")
+    config = GeometryConfig.from_dict({"EtaPhiR": "isEtaPhiR"})
+
+    assert get_config().coordinate_branch_names == {"XYZ": "isXYZ"}
+    with use_config(config):
+        assert get_config() is config
+    assert get_config().coordinate_branch_names == {"XYZ": "isXYZ"}
+    reset_coordinate_branches()
+
+
+def test_load_geometry_with_config():
+    reset_coordinate_branches()
+    config = GeometryConfig.from_dict(
+        {"XYZ": "isXYZ", "EtaPhiR": "isEtaPhiR", "EtaPhiZ": "isEtaPhiZ", "RPhiZ": "isRPhiZ"}
+    )
+
+    df = pgs.load_geometry(ATLAS_CALO_DATA_DIR, ATLAS_CALO_DATA_TREE_NAME, config=config)
+    assert len(df.columns) == 19
+    # The module level configuration is left untouched
+    assert pgs.cfg.config.coordinate_branch_names == {}
+
+
+def test_concurrent_configs(atlas_calo_geo):
+    # Two copies of the geometry with different coordinate branch names
+    branch_names = {"XYZ": "isXYZ", "EtaPhiR": "isEtaPhiR", "EtaPhiZ": "isEtaPhiZ", "RPhiZ": "isRPhiZ"}
+    renamed_branch_names = {system: f"{branch}Renamed" for system, branch in branch_names.items()}
+    renamed_df = atlas_calo_geo.rename(columns=dict(zip(branch_names.values(), renamed_branch_names.values())))
+
+    def infer_coordinate_systems(args):
+        df, branch_dict = args
+        with use_config(GeometryConfig.from_dict(branch_dict)):
+            check_geo_consistency(df)
+            return [GeoLayer(df, layer_idx).coordinate_system for layer_idx in [0, 4, 21]]
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(
+            executor.map(infer_coordinate_systems, [(atlas_calo_geo, branch_names), (renamed_df, renamed_branch_names)])
+        )
+
+    assert results == [["EtaPhiR", "EtaPhiZ", "XYZ"]] * 2
+
+
+def test_load_geometry_compact(atlas_calo_geo):
+    compact_df = pgs.load_geometry(ATLAS_CALO_DATA_DIR, ATLAS_CALO_DATA_TREE_NAME, compact=True)
+    check_geo_consistency(compact_df)
+
+    assert compact_df["layer"].dtype == np.int8
+    assert compact_df["isBarrel"].dtype == bool
+    assert compact_df["isEtaPhiR"].dtype == bool
+    assert compact_df["eta"].dtype == np.float32
+    assert compact_df["dz"].dtype == np.float32
+    assert compact_df["id"].dtype == atlas_calo_geo["id"].dtype
+    assert compact_df.memory_usage(deep=True).sum() < 0.5 * atlas_calo_geo.memory_usage(deep=True).sum()
+
+    for layer_idx in [0, 4, 21]:
+        layer = GeoLayer(atlas_calo_geo, layer_idx)
+        compact_layer = GeoLayer(compact_df, layer_idx)
+        assert compact_layer.coordinate_system == layer.coordinate_system
+        assert compact_layer.is_barrel == layer.is_barrel
+        envelope, compact_envelope = layer.get_cell_envelope(), compact_layer.get_cell_envelope()
+        for attr in ["rmin", "rmax", "zmin", "zmax"]:
+            assert getattr(compact_envelope, attr) == pytest.approx(getattr(envelope, attr), abs=1e-2)
+
+
+def test_compact_geometry_tolerance(atlas_calo_geo):
+    # Offsets below the float32 resolution of the radii
+    precise_df = atlas_calo_geo.copy()
+    precise_df["r"] += 1e-4
+
+    compact_df = compact_geometry(precise_df, envelope_tolerance=1e-2)
+    assert compact_df["r"].dtype == np.float32
+
+    compact_df = compact_geometry(precise_df, envelope_tolerance=1e-6)
+    # The columns of the coordinate systems depending on r are kept in double precision
+    for column in ["eta", "phi", "r", "deta", "dphi", "dr"]:
+        assert compact_df[column].dtype == np.float64
+    assert compact_df["x"].dtype == np.float32
+    assert compact_df["layer"].dtype == np.int8
+
+
+def test_load_geometry_arrow(atlas_calo_geo):
+    pytest.importorskip("pyarrow")
+    arrow_df = pgs.load_geometry(ATLAS_CALO_DATA_DIR, ATLAS_CALO_DATA_TREE_NAME, backend="arrow")
+
+    assert all(isinstance(dtype, pd.ArrowDtype) for dtype in arrow_df.dtypes)
+    # The columns are handed out as read-only views of the Arrow buffers
+    assert not arrow_df["eta"].to_numpy().flags.writeable
+    np.testing.assert_array_equal(arrow_df["eta"].to_numpy(), atlas_calo_geo["eta"].to_numpy())
+
+    index = GeometryIndex(arrow_df)
+    for layer_idx in [0, 4, 21]:
+        layer, arrow_layer = GeoLayer(atlas_calo_geo, layer_idx), GeoLayer(index, layer_idx)
+        assert arrow_layer.coordinate_system == layer.coordinate_system
+        assert arrow_layer.get_cell_envelope() == layer.get_cell_envelope()
+        assert arrow_layer.is_continuous_in_z() == layer.is_continuous_in_z()
+
+
+def test_load_geometry_backend_errors(monkeypatch):
+    reset_coordinate_branches()
+    pgs.set_coordinate_branch("EtaPhiR", "isEtaPhiR")
+
+    with pytest.raises(ValueError):
+        pgs.load_geometry(ATLAS_CALO_DATA_DIR, ATLAS_CALO_DATA_TREE_NAME, backend="polars")
+
+    # Importing a module mapped to None raises an ImportError
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    with pytest.raises(ImportError):
+        pgs.load_geometry(ATLAS_CALO_DATA_DIR, ATLAS_CALO_DATA_TREE_NAME, backend="arrow")
+    reset_coordinate_branches()
+
+
+def test_load_geometry_multiple_sources(atlas_calo_geo, tmpdir):
+    # Split the geometry into two subsystems stored in separate files
+    parts = [atlas_calo_geo[atlas_calo_geo["layer"] < 12], atlas_calo_geo[atlas_calo_geo["layer"] >= 12]]
+    for part_idx, part in enumerate(parts):
+        with uproot.recreate(f"{tmpdir}/subsystem_{part_idx}.root") as file:
+            file["subsystem"] = {column: part[column].to_numpy() for column in part.columns}
+    sources = [f"{tmpdir}/subsystem_0.root", (f"{tmpdir}/subsystem_1.root", "subsystem")]
+
+    expected_df = pd.concat(parts, ignore_index=True)
+    for workers in [1, 2]:
+        df = pgs.load_geometry(sources, "subsystem", workers=workers)
+        assert df.equals(expected_df[df.columns])
+
+    # Only the required branches are read from each source
+    df = pgs.load_geometry(sources, "subsystem", branches=[], workers=2)
+    assert "id" not in df.columns
+    assert df.equals(expected_df[df.columns])
+
+    with pytest.raises(ValueError):
+        pgs.load_geometry(sources)
+
+    with uproot.recreate(f"{tmpdir}/subsystem_2.root") as file:
+        file["subsystem"] = {column: parts[0][column].to_numpy() for column in parts[0].columns if column != "id"}
+    with pytest.raises(Exception, match="Branches of source"):
+        pgs.load_geometry([*sources, f"{tmpdir}/subsystem_2.root"], "subsystem", workers=2)
@@ -0,0 +1,79 @@
+from dataclasses import replace
+
+from test_load_geo import test_load_geometry as atlas_calo_geo  # noqa: F401
+
+from pygeosimplify.simplify import process_cache as process_cache_module
+from pygeosimplify.simplify.analysis import LayerAnalysis
+from pygeosimplify.simplify.detector import SimplifiedDetector
+from pygeosimplify.simplify.layer import GeoLayer
+from pygeosimplify.simplify.process_cache import ProcessCache
+
+
+def _process_layers(analyses, process_cache=None, min_layer_dist=1):
+    detector = SimplifiedDetector(min_layer_dist=min_layer_dist, process_cache=process_cache)
+    for analysis in analyses:
+        detector.add_layer(analysis)
+    detector.process()
+
+    return detector
+
+
+def _get_bounds(cyl_dict):
+    return {name: (cyl.rmin, cyl.rmax, cyl.zmin, cyl.zmax, cyl.is_barrel) for name, cyl in cyl_dict.items()}
+
+
+def test_process_cache(atlas_calo_geo, tmpdir, monkeypatch):  # noqa: F811
+    analyses = [LayerAnalysis.from_layer(GeoLayer(atlas_calo_geo, layer_idx)) for layer_idx in [0, 2, 5]]
+    process_cache = ProcessCache(cache_dir=f"{tmpdir}/process")
+
+    expected = _process_layers(analyses, process_cache)
+    assert (process_cache.hits, process_cache.misses) == (0, 1)
+
+    # The same inputs are not processed again
+    detector = _process_layers(analyses, process_cache)
+    assert (process_cache.hits, process_cache.misses) == (1, 1)
+    assert detector.report["counters"]["process_cache_hits"] == 1
+    assert "overlap_engine_calls" not in detector.report["counters"]
+    assert _get_bounds(detector.cylinders.processed) == _get_bounds(expected.cylinders.processed)
+    assert _get_bounds(detector.cylinders.thinned) == _get_bounds(expected.cylinders.thinned)
+    assert _get_bounds(detector.envelope) == _get_bounds(expected.envelope)
+    assert detector.resolution_log == expected.resolution_log
+
+    # Cached results are not affected by changes to the cylinders of a detector
+    detector.cylinders.processed["0"].rmax = 0
+    assert _get_bounds(_process_layers(analyses, process_cache).cylinders.processed) == _get_bounds(
+        expected.cylinders.processed
+    )
+
+    # Results are shared through the cache directory
+    process_cache = ProcessCache(cache_dir=f"{tmpdir}/process")
+    _process_layers(analyses, process_cache)
+    assert (process_cache.hits, process_cache.misses) == (1, 0)
+
+    # Different inputs or parameters are processed
+    _process_layers(analyses, process_cache, min_layer_dist=5)
+    _process_layers([analyses[0], analyses[2], analyses[1]], process_cache)
+    assert (process_cache.hits, process_cache.misses) == (1, 2)
+
+    # Results stored by a previous version of the processing are not reused
+    monkeypatch.setattr(process_cache_module, "PROCESS_CACHE_VERSION", process_cache_module.PROCESS_CACHE_VERSION + 1)
+    _process_layers(analyses, process_cache)
+    assert (process_cache.hits, process_cache.misses) == (1, 3)
+
+
+def test_process_cache_update_layer(atlas_calo_geo):  # noqa: F811
+    analyses = [LayerAnalysis.from_layer(GeoLayer(atlas_calo_geo, layer_idx)) for layer_idx in [0, 2, 5]]
+    process_cache = ProcessCache(max_entries=1)
+    _process_layers(analyses, process_cache)
+
+    # A detector restored from the cache can still be updated incrementally
+    detector = _process_layers(analyses, process_cache)
+    detector.update_layer(analyses[2], thinned_layer_width=30)
+    expected = _process_layers([*analyses[:2], replace(analyses[2], thinned_layer_width=30)])
+    assert _get_bounds(detector.cylinders.processed) == _get_bounds(expected.cylinders.processed)
+    assert detector.resolution_log == expected.resolution_log
+
+    # Only the most recently used result is kept
+    _process_layers(analyses[:2], process_cache)
+    _process_layers(analyses, process_cache)
+    assert (process_cache.hits, process_cache.misses) == (1, 3)
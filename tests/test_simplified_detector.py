@@ -1,10 +1,16 @@
 import os
+from dataclasses import replace
 
+import matplotlib.pyplot as plt
 import pytest
 from test_load_geo import test_load_geometry as atlas_calo_geo  # noqa: F401
 
+from pygeosimplify.simplify.analysis import LayerAnalysis
+from pygeosimplify.simplify.cylinder import Cylinder
 from pygeosimplify.simplify.detector import SimplifiedDetector
+from pygeosimplify.simplify.helpers import find_rz_overlaps
 from pygeosimplify.simplify.layer import GeoLayer
+from pygeosimplify.vis.detector import plot_detector_rz
 
 
 def test_add_layer(atlas_calo_geo):  # noqa: F811
@@ -160,3 +166,268 @@ def test_save_to_gdml(atlas_calo_geo, tmpdir):  # noqa: F811
     detector.save_to_gdml(output_path=output_path)
 
     assert os.path.exists(output_path)
+
+
+def test_find_rz_overlaps(atlas_calo_geo):  # noqa: F811
+    detector = SimplifiedDetector()
+    detector.add_layer(GeoLayer(atlas_calo_geo, layer_idx=2))
+    detector.add_layer(GeoLayer(atlas_calo_geo, layer_idx=3))
+    detector.process()
+
+    # The analytic r-z overlaps agree with the overlap engine
+    for cyl_type in ["envelope", "thinned", "processed"]:
+        _, overlapping_layers = detector.check_overlaps(cyl_type=cyl_type, print_output=False)
+        assert find_rz_overlaps(detector._get_cylinder_dict(cyl_type)) == overlapping_layers
+
+    # Touching cylinders do not overlap
+    touching = {
+        "a": Cylinder(0, 1, 0, 1, True),
+        "b": Cylinder(1, 2, 0, 1, True),
+        "c": Cylinder(0.5, 1.5, 0.5, 2, False),
+    }
+    assert find_rz_overlaps(touching) == [["a", "c"], ["b", "c"]]
+
+
+def test_plot_rz(atlas_calo_geo):  # noqa: F811
+    detector = SimplifiedDetector()
+    for layer_idx in [2, 3]:
+        detector.add_layer(GeoLayer(atlas_calo_geo, layer_idx=layer_idx))
+    detector.process()
+
+    ax = detector.plot_rz(df=atlas_calo_geo, view="half")
+    labels = [collection.get_label() for collection in ax.collections]
+    # One collection per layer and per cylinder type, plus the overlapping envelopes
+    assert labels == ["Layer 2", "Layer 3", "envelope", "thinned", "processed"]
+    assert len(ax.collections[2].get_paths()) == 4
+    plt.close(ax.figure)
+
+    ax = plot_detector_rz(detector.cylinders, view="quarter", overlap_cyl_type="envelope")
+    labels = [collection.get_label() for collection in ax.collections]
+    assert labels == ["envelope", "thinned", "processed", "Overlaps (1)"]
+    assert ax.get_xlim()[0] == 0
+    plt.close(ax.figure)
+
+    with pytest.raises(ValueError):
+        plot_detector_rz(detector.cylinders, view="full")
+
+
+def test_process_variant(atlas_calo_geo):  # noqa: F811
+    detector = SimplifiedDetector()
+    for layer_idx in [0, 4, 21]:
+        detector.add_layer(GeoLayer(atlas_calo_geo, layer_idx))
+
+    thinned_before = {
+        name: (cyl.rmin, cyl.rmax, cyl.zmin, cyl.zmax) for name, cyl in detector.cylinders.thinned.items()
+    }
+
+    variants = [detector.process_variant(min_layer_dist=min_dist) for min_dist in [1, 5]]
+    # The variants share the layer analyses of the detector but not its cylinders
+    assert detector.processed == False
+    assert {name: (cyl.rmin, cyl.rmax, cyl.zmin, cyl.zmax) for name, cyl in detector.cylinders.thinned.items()} == (
+        thinned_before
+    )
+    assert all(variant.layers == detector.layers for variant in variants)
+    assert variants[0].min_dist == 1 and variants[1].min_dist == 5
+
+    # A variant with the parameters of the detector reproduces processing the detector itself
+    detector.process()
+    for name, cyl in detector.cylinders.processed.items():
+        variant_cyl = variants[0].cylinders.processed[name]
+        assert (variant_cyl.rmin, variant_cyl.rmax, variant_cyl.zmin, variant_cyl.zmax) == (
+            cyl.rmin,
+            cyl.rmax,
+            cyl.zmin,
+            cyl.zmax,
+        )
+    assert variants[0].cylinders.processed != variants[1].cylinders.processed
+
+    # Variants can also be processed from an already processed detector
+    variant = detector.process_variant(thinned_layer_width=20)
+    assert variant.cylinders.thinned["0_POS"].rmax - variant.cylinders.thinned["0_POS"].rmin == pytest.approx(20)
+    assert variant.layers["0"].thinned_layer_width == 20
+
+
+def test_add_layer_analysis(atlas_calo_geo):  # noqa: F811
+    layer = GeoLayer(atlas_calo_geo, layer_idx=0)
+    analysis = LayerAnalysis.from_layer(layer)
+
+    assert analysis.n_cells == len(layer.df)
+    assert analysis.envelope == layer.get_cell_envelope()
+    assert analysis.envelope is not analysis.envelope
+    assert analysis.thinned_cylinder(10) == layer.thinned_cylinder
+
+    detector = SimplifiedDetector()
+    detector.add_layer(analysis)
+    assert detector.cylinders.thinned["0"] == layer.thinned_cylinder
+    with pytest.raises(Exception):
+        detector.add_layer(layer)
+
+
+def test_sweep(atlas_calo_geo):  # noqa: F811
+    detector = SimplifiedDetector()
+    # The thinned cylinders of layers 2 and 5 overlap, such that an overlap resolution is required
+    for layer_idx in [2, 5]:
+        detector.add_layer(GeoLayer(atlas_calo_geo, layer_idx))
+
+    grid = {"min_layer_dist": [1, 5], "thinned_layer_width": [10, 20]}
+    table = detector.sweep(grid, workers=2)
+
+    assert table["variant"].nunique() == 4
+    assert table["error"].isna().all()
+    assert (table["n_overlaps"] == 0).all()
+    assert (table["n_resolutions"] > 0).all()
+    assert set(table.columns) >= {
+        "min_layer_dist",
+        "envelope_width",
+        "thinned_layer_width",
+        "rmin",
+        "rmax",
+        "zmin",
+        "zmax",
+    }
+    assert table.groupby("variant")["min_layer_dist"].first().tolist() == [1, 1, 5, 5]
+
+    # The sweep reproduces processing a single variant
+    variant = detector.process_variant(min_layer_dist=5, thinned_layer_width=20)
+    variant_rows = table[(table.min_layer_dist == 5) & (table.thinned_layer_width == 20)].set_index("cylinder")
+    assert set(variant_rows.index) == set(variant.cylinders.processed)
+    for cyl_name, cyl in variant.cylinders.processed.items():
+        assert variant_rows.loc[cyl_name, "rmin"] == cyl.rmin
+        assert variant_rows.loc[cyl_name, "zmax"] == cyl.zmax
+    assert variant_rows["resolutions"].iloc[0] == ";".join(
+        f"{resolution['barrel']}/{resolution['endcap']}:{resolution['option']}" for resolution in variant.resolution_log
+    )
+
+    # Sweeping in the current process gives the same table up to timings
+    serial_table = detector.sweep([{"min_layer_dist": 1}], workers=1)
+    assert serial_table.drop(columns="wall_time").equals(
+        table[table.variant == 0].drop(columns="wall_time").reset_index(drop=True)
+    )
+
+    with pytest.raises(ValueError):
+        detector.sweep({"invalid_param": [1]})
+
+
+def _process_layers(analyses):
+    detector = SimplifiedDetector()
+    for analysis in analyses:
+        detector.add_layer(analysis)
+    detector.process()
+
+    return detector
+
+
+def _get_bounds(cyl_dict):
+    return {name: (cyl.rmin, cyl.rmax, cyl.zmin, cyl.zmax, cyl.is_barrel) for name, cyl in cyl_dict.items()}
+
+
+def test_update_layer(atlas_calo_geo):  # noqa: F811
+    analyses = [LayerAnalysis.from_layer(GeoLayer(atlas_calo_geo, layer_idx)) for layer_idx in [0, 2, 5, 21]]
+    detector = _process_layers(analyses)
+    detector.instrumentation.reset()
+
+    # Updating a layer after processing gives the same result as processing all layers from scratch
+    detector.update_layer(analyses[2], thinned_layer_width=30)
+    expected = _process_layers([*analyses[:2], replace(analyses[2], thinned_layer_width=30), analyses[3]])
+    assert _get_bounds(detector.cylinders.processed) == _get_bounds(expected.cylinders.processed)
+    assert _get_bounds(detector.envelope) == _get_bounds(expected.envelope)
+    assert detector.resolution_log == expected.resolution_log
+    # Only the layers connected to the updated layer are resolved again and unaffected cylinders are not grown again
+    assert detector.report["counters"]["layers_reprocessed"] == 2
+    assert detector.report["counters"]["post_process_reused_growths"] > 0
+
+    # Updating a layer that is not connected to any other layer requires no overlap checks
+    detector.instrumentation.reset()
+    detector.update_layer(analyses[3], thinned_layer_width=50)
+    assert detector.report["counters"]["layers_reprocessed"] == 1
+    assert "overlap_engine_calls" not in detector.report["counters"]
+
+    with pytest.raises(Exception):
+        detector.update_layer(GeoLayer(atlas_calo_geo, layer_idx=4))
+
+
+def test_remove_layer(atlas_calo_geo):  # noqa: F811
+    analyses = [LayerAnalysis.from_layer(GeoLayer(atlas_calo_geo, layer_idx)) for layer_idx in [0, 2, 5, 21]]
+
+    # Removing a layer before processing
+    detector = SimplifiedDetector()
+    for analysis in analyses:
+        detector.add_layer(analysis)
+    detector.remove_layer(5)
+    assert list(detector.cylinders.thinned) == ["0", "2", "21"]
+    detector.process()
+    assert detector.resolution_log == []
+
+    # Removing a layer after processing gives the same result as processing the remaining layers from scratch
+    detector = _process_layers(analyses)
+    detector.remove_layer("2")
+    expected = _process_layers([analyses[0], analyses[2], analyses[3]])
+    assert _get_bounds(detector.cylinders.processed) == _get_bounds(expected.cylinders.processed)
+    assert detector.resolution_log == []
+
+    # Adding it back after processing
+    detector.add_layer(analyses[1])
+    expected = _process_layers([analyses[0], analyses[2], analyses[3], analyses[1]])
+    assert _get_bounds(detector.cylinders.processed) == _get_bounds(expected.cylinders.processed)
+    assert len(detector.resolution_log) == 1
+
+    with pytest.raises(Exception):
+        detector.remove_layer(4)
+
+
+def _add_cylinder_layers(detector: SimplifiedDetector, cylinders: dict[str, tuple]) -> None:
+    # With envelopes 10 wide in r (barrels) or z (endcaps), the thinned cylinders equal the envelopes
+    for idx, (rmin, rmax, zmin, zmax, is_barrel) in cylinders.items():
+        envelope = Cylinder(rmin, rmax, zmin, zmax, is_barrel)
+        detector.add_layer(LayerAnalysis(idx, is_barrel, False, 1, 10, _envelope=envelope))
+
+
+def test_global_overlap_resolution():
+    # The greedy resolution shortens barrels 3 and 2 for endcaps 0 and 1 and then shrinks endcap 4 in r for barrels 3
+    # and 5, after which all options for barrel 2 and endcap 4 are locked
+    cylinders = {
+        "0": (700, 900, 900, 910, False),
+        "1": (300, 500, 900, 910, False),
+        "3": (800, 810, 0, 950, True),
+        "4": (0, 1000, 500, 510, False),
+        "5": (100, 110, 0, 950, True),
+        "2": (400, 410, 0, 950, True),
+    }
+    detector = SimplifiedDetector()
+    _add_cylinder_layers(detector, cylinders)
+    with pytest.raises(Exception, match="All possible options are locked"):
+        detector._resolve_thinned_overlaps()
+
+    detector = SimplifiedDetector(overlap_solver="milp")
+    _add_cylinder_layers(detector, cylinders)
+    detector._resolve_thinned_overlaps()
+    assert find_rz_overlaps(detector.cylinders.thinned) == []
+    assert len(detector.resolution_log) == 5
+    assert detector.report["counters"]["overlap_resolution_solves"] == 1
+    # The rmin of endcap 4 is moved beyond barrel 2 instead of only beyond barrel 5, which the greedy resolution locked
+    assert (detector.cylinders.thinned["4"].rmin, detector.cylinders.thinned["4"].rmax) == (411, 799)
+    assert detector.cylinders.thinned["4"].is_locked("rmin")
+    assert detector.cylinders.thinned["2"].zmax == 899
+
+    # Overlaps between two barrels cannot be solved, so the greedy resolution is used
+    detector = SimplifiedDetector(overlap_solver="milp")
+    _add_cylinder_layers(detector, {"0": (100, 110, 0, 950, True), "1": (105, 115, 0, 950, True)})
+    with pytest.raises(Exception, match="Overlap between two barrel or two endcap layers"):
+        detector._resolve_thinned_overlaps()
+
+    with pytest.raises(ValueError):
+        SimplifiedDetector(overlap_solver="simplex")
+
+
+def test_global_overlap_resolution_atlas(atlas_calo_geo):  # noqa: F811
+    layers = [GeoLayer(atlas_calo_geo, layer_idx) for layer_idx in [2, 5, 6, 17, 18, 19]]
+    detector, solved_detector = SimplifiedDetector(), SimplifiedDetector(overlap_solver="milp")
+    detector.add_layers(layers)
+    solved_detector.add_layers(layers)
+    detector.process()
+    solved_detector.process()
+
+    # Overlaps resolved as a side effect of others are resolved explicitly by the solver, with the same result
+    assert len(solved_detector.resolution_log) > len(detector.resolution_log)
+    assert solved_detector.cylinders.processed == detector.cylinders.processed
+    assert solved_detector.process_variant(min_layer_dist=5).overlap_solver == "milp"
@@ -0,0 +1,42 @@
+import pytest
+from test_load_geo import test_load_geometry as atlas_calo_geo  # noqa: F401
+
+from pygeosimplify.cfg.test_data import ATLAS_CALO_DATA_DIR, ATLAS_CALO_DATA_TREE_NAME
+from pygeosimplify.simplify.analysis import LayerAnalysis
+from pygeosimplify.simplify.detector import SimplifiedDetector
+from pygeosimplify.simplify.layer import GeoLayer
+from pygeosimplify.simplify.streaming import LayerReducer, stream_layer_analyses
+
+
+def test_stream_layer_analyses(atlas_calo_geo):  # noqa: F811
+    # Small chunks, such that the cells of most layers are spread over several chunks
+    analyses = stream_layer_analyses(ATLAS_CALO_DATA_DIR, ATLAS_CALO_DATA_TREE_NAME, step_size=20000, workers=2)
+
+    assert list(analyses) == list(range(24))
+    for layer_idx, analysis in analyses.items():
+        assert analysis == LayerAnalysis.from_layer(GeoLayer(atlas_calo_geo, layer_idx))
+    assert sum(analysis.n_cells for analysis in analyses.values()) == len(atlas_calo_geo)
+
+    # The analyses can be processed like the layers of the loaded geometry
+    layer_list = [2, 5, 6, 17, 18, 19]
+    detector, streamed_detector = SimplifiedDetector(), SimplifiedDetector()
+    for layer_idx in layer_list:
+        detector.add_layer(GeoLayer(atlas_calo_geo, layer_idx))
+        streamed_detector.add_layer(analyses[layer_idx])
+    detector.process()
+    streamed_detector.process()
+    assert streamed_detector.cylinders.processed == detector.cylinders.processed
+
+
+def test_layer_reducer(atlas_calo_geo):  # noqa: F811
+    layer_df = atlas_calo_geo[atlas_calo_geo["layer"] == 14]
+
+    reducer = LayerReducer(14, "EtaPhiR")
+    for start in range(0, len(layer_df), 1000):
+        reducer.update(layer_df.iloc[start : start + 1000])
+    assert reducer.get_analysis(thinned_layer_width=20) == LayerAnalysis.from_layer(GeoLayer(atlas_calo_geo, 14, 20))
+
+    reducer = LayerReducer(14, "EtaPhiR")
+    reducer.update(layer_df[layer_df.z > 0])
+    with pytest.raises(ValueError):
+        reducer.get_analysis()
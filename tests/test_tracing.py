@@ -0,0 +1,77 @@
+import json
+
+from test_load_geo import test_load_geometry as atlas_calo_geo  # noqa: F401
+
+from pygeosimplify.cfg.config import GeometryConfig
+from pygeosimplify.cfg.test_data import ATLAS_CALO_DATA_DIR, ATLAS_CALO_DATA_TREE_NAME
+from pygeosimplify.simplify.batch import SimplificationJob, SimplificationSettings, run_batch
+from pygeosimplify.simplify.detector import SimplifiedDetector
+from pygeosimplify.simplify.layer import GeoLayer
+from pygeosimplify.utils.tracing import get_tracer, span, traced, tracing
+
+
+def test_tracing(tmpdir):
+    @traced()
+    def add(a, b):
+        return a + b
+
+    # Without tracing enabled no spans are recorded
+    assert add(1, 2) == 3
+    assert get_tracer() is None
+
+    trace_path = f"{tmpdir}/trace.json"
+    with tracing(trace_path) as tracer:
+        assert add(1, 2) == 3
+        with span("outer", value=1):
+            add(2, 3)
+
+    assert get_tracer() is None
+    assert [event["name"] for event in tracer.events] == [
+        "test_tracing.<locals>.add",
+        "test_tracing.<locals>.add",
+        "outer",
+    ]
+    assert tracer.events[2]["args"] == {"value": 1}
+    # The inner span lies within the outer span
+    inner, outer = tracer.events[1], tracer.events[2]
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+
+    with open(trace_path) as trace_file:
+        trace = json.load(trace_file)
+    assert trace["traceEvents"] == tracer.events
+    assert all(event["ph"] == "X" for event in trace["traceEvents"])
+
+
+def test_trace_detector(atlas_calo_geo, tmpdir):  # noqa: F811
+    with tracing() as tracer:
+        detector = SimplifiedDetector()
+        for layer_idx in [0, 4, 21]:
+            detector.add_layer(GeoLayer(atlas_calo_geo, layer_idx))
+        detector.process()
+        detector.save_to_gdml(output_path=f"{tmpdir}/detector.gdml")
+
+    names = [event["name"] for event in tracer.events]
+    assert names.count("GeoLayer.__init__") == 3
+    assert "check_pairwise_overlaps" in names
+    assert "post_process_cylinders" in names
+    assert "SimplifiedDetector.save_to_gdml" in names
+
+
+def test_trace_batch_workers(tmpdir):
+    config = GeometryConfig.from_dict(
+        {"XYZ": "isXYZ", "EtaPhiR": "isEtaPhiR", "EtaPhiZ": "isEtaPhiZ", "RPhiZ": "isRPhiZ"}
+    )
+    settings = SimplificationSettings(config=config, layer_list=(0, 4, 21))
+    jobs = [
+        SimplificationJob(ATLAS_CALO_DATA_DIR, ATLAS_CALO_DATA_TREE_NAME, f"{tmpdir}/detector_{idx}.gdml", settings)
+        for idx in range(2)
+    ]
+
+    with tracing() as tracer:
+        summaries = run_batch(jobs, workers=2)
+
+    assert all("trace_events" not in summary for summary in summaries)
+    load_events = [event for event in tracer.events if event["name"] == "load_geometry"]
+    assert len(load_events) == 2
+    # The events of the workers are recorded with their process ids
+    assert {event["pid"] for event in load_events} == {summary["pid"] for summary in summaries}